@@ -1,18 +1,94 @@
 from __future__ import annotations
+import hashlib
 import re
-from typing import Dict, List, Tuple
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import metrics
+import tracing
 
 # --------------------
 # Sentiment (VADER)
 # --------------------
+_NEUTRAL = {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+SENTIMENT_CACHE_SIZE = 2048
+
+_vader_lock = threading.Lock()
+_vader = None            # SentimentIntensityAnalyzer, built on first use
+_vader_failed = False    # lexicon/nltk missing: don't retry the load on every call
+
+_sentiment_cache: "OrderedDict[bytes, Dict[str, float]]" = OrderedDict()
+_sentiment_cache_lock = threading.Lock()
+
+
+def _get_vader():
+    """Load the VADER lexicon once per process (double-checked, thread-safe)."""
+    global _vader, _vader_failed
+    if _vader is None and not _vader_failed:
+        with _vader_lock:
+            if _vader is None and not _vader_failed:
+                try:
+                    from nltk.sentiment import SentimentIntensityAnalyzer
+                    _vader = SentimentIntensityAnalyzer()
+                except Exception:
+                    _vader_failed = True
+    return _vader
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+
+
+def _cached_sentiment(key: bytes) -> Optional[Dict[str, float]]:
+    with _sentiment_cache_lock:
+        hit = _sentiment_cache.get(key)
+        if hit is not None:
+            _sentiment_cache.move_to_end(key)
+        return hit
+
+
+def _store_sentiment(key: bytes, scores: Dict[str, float]) -> None:
+    with _sentiment_cache_lock:
+        _sentiment_cache[key] = scores
+        _sentiment_cache.move_to_end(key)
+        while len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+            _sentiment_cache.popitem(last=False)
+
+
 def sentiment_vader(text: str) -> Dict[str, float]:
-    try:
-        from nltk.sentiment import SentimentIntensityAnalyzer
-        sia = SentimentIntensityAnalyzer()
-        return sia.polarity_scores(text or "")
-    except Exception:
-        # Fallback neutral
-        return {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+    return sentiment_many([text])[0]
+
+
+def sentiment_many(texts: Iterable[str]) -> List[Dict[str, float]]:
+    """VADER scores for several texts. Repeated texts (same transcript across
+    /transcribe, /generate, /generate_variations) are served from an LRU keyed
+    by text hash; each distinct text is scored once per batch.
+    """
+    texts = [t or "" for t in texts]
+    keys = [_text_key(t) for t in texts]
+    scored: Dict[bytes, Dict[str, float]] = {}
+    sia = None
+    for key, text in zip(keys, texts):
+        if key in scored:
+            continue
+        hit = _cached_sentiment(key)
+        metrics.cache_result("sentiment", hit is not None)
+        if hit is None:
+            sia = sia or _get_vader()
+            if sia is None:
+                # Fallback neutral
+                scored[key] = dict(_NEUTRAL)
+                continue
+            try:
+                hit = sia.polarity_scores(text)
+            except Exception:
+                scored[key] = dict(_NEUTRAL)
+                continue
+            _store_sentiment(key, hit)
+        scored[key] = hit
+    # Copies, so callers can't mutate the cached entries
+    return [dict(scored[k]) for k in keys]
 
 
 # --------------------
@@ -126,16 +202,22 @@ def reading_level(text: str) -> Dict[str, float]:
 # --------------------
 # Agent 1: multimodal-style analyzer (transcript-proxy)
 # --------------------
-def analyze_agent(transcript_text: str) -> Dict:
-    sent = sentiment_vader(transcript_text)
-    phrases = key_phrases(transcript_text, max_phrases=8)
-    th = themes(transcript_text)
+def analyze_agent(transcript_text: str, ctx=None) -> Dict:
+    """Agent 1 output. Pass the request's TranscriptContext as `ctx` to reuse its
+    sentiment/keywords/themes instead of recomputing them.
+    """
+    if ctx is not None:
+        sent, phrases, th = ctx.sentiment, ctx.keywords, {"tags": ctx.themes}
+    else:
+        sent = sentiment_vader(transcript_text)
+        phrases = key_phrases(transcript_text, max_phrases=8)
+        th = themes(transcript_text)
     # Map compound to coarse tone
     comp = float(sent.get("compound", 0.0))
     tone = "positive" if comp >= 0.25 else ("neutral" if comp > -0.25 else "reassuring")
     # Speaker style cues (heuristic)
     st: List[str] = []
-    lower = (transcript_text or "").lower()
+    lower = ctx.lower if ctx is not None else (transcript_text or "").lower()
     if any(w in lower for w in ["ready","let's","let us","let’s","gotta","love","time for"]):
         st.append("energetic")
     if any(w in lower for w in ["calm","slow","soft","quiet"]):
@@ -155,36 +237,187 @@ def analyze_agent(transcript_text: str) -> Dict:
     }
 
 
+# --------------------
+# Audio features (streaming, frame-based)
+# --------------------
+AUDIO_FRAME_SECONDS = 0.05      # 50 ms analysis frames, no overlap
+AUDIO_BLOCK_FRAMES = 256        # frames decoded per block (~13 s) → fixed sample memory
+AUDIO_SILENCE_RMS = 0.01        # ≈ -40 dBFS
+ENERGY_CURVE_POINTS = 32
+FFMPEG_PCM_RATE = 16000         # ffmpeg pipe: mono float32 at 16 kHz
+
+
+def _ffmpeg_exe() -> Optional[str]:
+    import os, shutil
+    exe = shutil.which(os.getenv("FFMPEG_BIN", "ffmpeg")) or shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg  # type: ignore
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _ffmpeg_pcm_blocks(media_path: str, blocksize: int):
+    """Decode any container ffmpeg understands (mp4/mov/...) as a PCM stream."""
+    import subprocess
+    import numpy as np
+    exe = _ffmpeg_exe()
+    if not exe:
+        raise RuntimeError("ffmpeg not available")
+    proc = subprocess.Popen(
+        [exe, "-nostdin", "-v", "error", "-i", media_path, "-vn", "-ac", "1",
+         "-ar", str(FFMPEG_PCM_RATE), "-f", "f32le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            buf = proc.stdout.read(blocksize * 4)
+            if not buf:
+                break
+            yield np.frombuffer(buf[: len(buf) // 4 * 4], dtype="<f4")
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def _open_pcm(media_path: str):
+    """(sample_rate, frame_len, iterator of mono float32 blocks). soundfile first,
+    ffmpeg pipe for anything libsndfile can't open.
+    """
+    try:
+        import soundfile as sf
+        sr = int(sf.info(media_path).samplerate)
+        frame_len = max(64, int(sr * AUDIO_FRAME_SECONDS))
+        blocks = (b.mean(axis=1) for b in sf.blocks(media_path, blocksize=frame_len * AUDIO_BLOCK_FRAMES,
+                                                    dtype="float32", always_2d=True))
+        return sr, frame_len, blocks
+    except Exception:
+        sr = FFMPEG_PCM_RATE
+        frame_len = max(64, int(sr * AUDIO_FRAME_SECONDS))
+        return sr, frame_len, _ffmpeg_pcm_blocks(media_path, frame_len * AUDIO_BLOCK_FRAMES)
+
+
+def audio_features(media_path: str) -> Optional[Dict]:
+    """Stream the media's audio in blocks and summarise per-frame RMS, ZCR,
+    spectral centroid, spectral-flux onsets and silence. Only a few floats per
+    frame are kept (~1 MB per hour), so long media never sits in memory.
+    Returns None when nothing could be decoded.
+    """
+    import numpy as np
+    sr, frame_len, blocks = _open_pcm(media_path)
+    window = np.hanning(frame_len).astype("float32")
+    freqs = np.fft.rfftfreq(frame_len, 1.0 / sr).astype("float32")
+
+    rms_parts: List = []
+    zcr_parts: List = []
+    cent_parts: List = []
+    flux_parts: List = []
+    carry = np.empty(0, dtype="float32")
+    prev_mag = None
+    prev_sample = None
+    total = 0
+    sumsq = 0.0
+    crossings = 0
+    for x in blocks:
+        if x.size == 0:
+            continue
+        x = x.astype("float32", copy=False)
+        # Whole-signal RMS / ZCR, exact across block boundaries
+        total += x.size
+        sumsq += float(np.dot(x.astype("float64"), x.astype("float64")))
+        joined = x if prev_sample is None else np.concatenate(([prev_sample], x))
+        crossings += int(((joined[:-1] * joined[1:]) < 0).sum())
+        prev_sample = x[-1]
+
+        buf = np.concatenate((carry, x)) if carry.size else x
+        n = buf.size // frame_len
+        carry = buf[n * frame_len:].copy()
+        if n == 0:
+            continue
+        F = buf[: n * frame_len].reshape(n, frame_len)
+        rms_parts.append(np.sqrt(np.mean(F * F, axis=1)))
+        zcr_parts.append(((F[:, :-1] * F[:, 1:]) < 0).mean(axis=1))
+        mag = np.abs(np.fft.rfft(F * window, axis=1)).astype("float32")
+        msum = mag.sum(axis=1)
+        cent_parts.append(np.where(msum > 1e-9, (mag @ freqs) / np.maximum(msum, 1e-9), 0.0))
+        prev = np.vstack((prev_mag if prev_mag is not None else mag[:1], mag[:-1]))
+        flux_parts.append(np.maximum(mag - prev, 0.0).sum(axis=1))
+        prev_mag = mag[-1:]
+
+    if total == 0:
+        return None
+    duration = total / float(sr)
+    rms = float(np.sqrt(sumsq / total))
+    zcr = float(crossings / max(1, total - 1))
+    summary: Dict = {"duration": round(duration, 3), "sample_rate": sr, "rms": rms, "zcr": zcr}
+    if not rms_parts:
+        summary.update({"frames": 0, "silence_ratio": float(rms < AUDIO_SILENCE_RMS), "onset_rate": 0.0,
+                        "energy_curve": [round(rms, 4)]})
+        return summary
+
+    frame_rms = np.concatenate(rms_parts)
+    frame_zcr = np.concatenate(zcr_parts)
+    frame_cent = np.concatenate(cent_parts)
+    flux = np.concatenate(flux_parts)
+
+    # Onsets: local spectral-flux peaks above an adaptive threshold
+    thr = float(np.median(flux) + 1.5 * np.std(flux))
+    if flux.size >= 3 and thr > 0:
+        mid = flux[1:-1]
+        onsets = int(((mid > thr) & (mid >= flux[:-2]) & (mid > flux[2:])).sum())
+    else:
+        onsets = 0
+
+    def pct(a) -> Dict[str, float]:
+        p10, p50, p90 = np.percentile(a, [10, 50, 90])
+        return {"p10": round(float(p10), 4), "p50": round(float(p50), 4), "p90": round(float(p90), 4)}
+
+    voiced = frame_rms >= AUDIO_SILENCE_RMS
+    summary.update({
+        "frames": int(frame_rms.size),
+        "frame_seconds": round(frame_len / float(sr), 4),
+        "rms_percentiles": pct(frame_rms),
+        "zcr_percentiles": pct(frame_zcr),
+        "centroid_hz": pct(frame_cent[voiced]) if voiced.any() else {"p10": 0.0, "p50": 0.0, "p90": 0.0},
+        "onset_rate": round(onsets / duration, 3),
+        "silence_ratio": round(1.0 - float(voiced.mean()), 3),
+        "energy_curve": [round(float(c.mean()), 4)
+                         for c in np.array_split(frame_rms, min(ENERGY_CURVE_POINTS, frame_rms.size))],
+    })
+    return summary
+
+
 # --------------------
 # Agent 1 (media): audio-driven features + text
 # --------------------
-def analyze_media(media_path: str | None, transcript_text: str) -> Dict:
-    analysis = analyze_agent(transcript_text)
+@metrics.stage("analysis")
+def analyze_media(media_path: str | None, transcript_text: str, ctx=None) -> Dict:
+    with tracing.span("analyze_agent"):
+        analysis = dict(ctx.analysis) if ctx is not None else analyze_agent(transcript_text)
     if not media_path:
         return analysis
     try:
-        import soundfile as sf
-        import numpy as np
-        data, sr = sf.read(media_path, always_2d=False)
-        x = data.astype("float32") if hasattr(data, "dtype") else np.array(data, dtype="float32")
-        if x.ndim == 2:
-            x = x.mean(axis=1)
-        if x.size == 0:
+        with tracing.span("audio_features"):
+            feats = audio_features(media_path)
+        if not feats:
             return analysis
-        # RMS energy
-        rms = float(np.sqrt(np.mean(x**2)))
-        # Zero-crossing rate (simple tempo/activity proxy)
-        zcr = float(((x[:-1] * x[1:]) < 0).sum() / max(1, len(x)-1))
+        rms, zcr = feats["rms"], feats["zcr"]
         # Classify
         energy = "high" if rms > 0.2 else ("medium" if rms > 0.05 else "low")
         tempo_like = "fast" if zcr > 0.08 else ("medium" if zcr > 0.03 else "slow")
+        onset_rate = feats.get("onset_rate", 0.0)
+        pacing = "punchy" if onset_rate > 3.0 else ("steady" if onset_rate > 1.0 else "slow")
         tags = set(analysis.get("style_tags", []))
         if energy == "high":
             tags.add("energetic")
         if tempo_like == "slow":
             tags.add("calm")
         analysis.update({
-            "audio": {"rms": rms, "zcr": zcr, "energy": energy, "tempo": tempo_like},
+            "audio": {**feats, "energy": energy, "tempo": tempo_like, "pacing": pacing},
             "style_tags": sorted(tags),
         })
         return analysis
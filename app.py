@@ -3,16 +3,19 @@
 from __future__ import annotations
 import os
 import logging
+import signal
 import tempfile
+import threading
 import time
 import traceback
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 from contextlib import contextmanager
 
 from flask import (
     Flask, render_template, request, redirect, url_for,
-    flash, abort, jsonify, current_app
+    flash, abort, jsonify, current_app, send_file
 )
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -70,7 +73,7 @@ app.config.update(
 from config import Config
 app.config.from_object(Config)
 
-from extensions import db, login_manager, csrf, limiter as _limiter
+from extensions import db, login_manager, csrf, limiter as _limiter, configure_sqlite
 
 # Production-grade rate limiting with fallback
 class _NoLimiter:
@@ -78,6 +81,7 @@ class _NoLimiter:
     def limit(self, *a, **k):
         def deco(f): return f
         return deco
+    def exempt(self, f): return f
 
 # Enhanced rate limiter with production settings
 try:
@@ -104,27 +108,36 @@ except Exception as e:
 # -----------------------------------------------------------------------------
 # Optional modules (keep the app running even if they’re missing)
 # -----------------------------------------------------------------------------
-try:
-    from analysis import sentiment_vader, key_phrases, themes, analyze_agent, analyze_media
-except Exception:
-    def sentiment_vader(text: str) -> Dict: return {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
-    def key_phrases(text: str) -> List[str]: return []
-    def themes(text: str) -> Dict: return {}
+# The heavy ones (sklearn/scipy behind the review index, faster-whisper, the
+# generators, selenium behind the scrapers) resolve on first use or in the
+# post-start warm-up below, so importing app.py stays fast and the port binds
+# before any of them load.
+from lazy_import import LazyAttr
+
+def _fallback_sentiment(text: str) -> Dict: return {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+def _fallback_key_phrases(text: str) -> List[str]: return []
+def _fallback_themes(text: str) -> Dict: return {}
+
+sentiment_vader = LazyAttr("analysis", "sentiment_vader", _fallback_sentiment)
+key_phrases = LazyAttr("analysis", "key_phrases", _fallback_key_phrases)
+themes = LazyAttr("analysis", "themes", _fallback_themes)
+analyze_agent = LazyAttr("analysis", "analyze_agent")
+analyze_media = LazyAttr("analysis", "analyze_media")
 
 # Transcription helpers
-try:
-    from transcribe import transcribe_media, transcribe_from_url, download_from_url
-except Exception:
-    def transcribe_media(path: str) -> str:
-        return "Sample transcript (dev fallback). Install ffmpeg + faster-whisper for real transcription."
-    def transcribe_from_url(url: str) -> Optional[str]: return None
-    def download_from_url(url: str) -> Optional[str]: return None
+def _fallback_transcribe_media(path: str) -> str:
+    return "Sample transcript (dev fallback). Install ffmpeg + faster-whisper for real transcription."
+def _fallback_none(*_a, **_k) -> Optional[str]: return None
 
-# Brand-locked generator (your existing agent)
-try:
-    from generate import generate, generate_variations, generate_variations_text_only
-except Exception as e:
-    raise RuntimeError(f"generate.py not available or invalid: {e}")
+transcribe_media = LazyAttr("transcribe", "transcribe_media", _fallback_transcribe_media)
+transcribe_from_url = LazyAttr("transcribe", "transcribe_from_url", _fallback_none)
+download_from_url = LazyAttr("transcribe", "download_from_url", _fallback_none)
+
+# Brand-locked generator (your existing agent); no fallback, a broken generate.py should fail loudly
+generate = LazyAttr("generate", "generate")
+generate_variations = LazyAttr("generate", "generate_variations")
+generate_variations_text_only = LazyAttr("generate", "generate_variations_text_only")
+from transcript_context import TranscriptContext
 
 # Auto-scraper service
 try:
@@ -135,47 +148,55 @@ except Exception:
     def force_scrape_now():
         return False
 
-# Instagram scraper for training data
-try:
-    from instagram_scraper import scrape_instagram_posts
-except ImportError:
-    scrape_instagram_posts = None
-    print("Warning: instagram_scraper not available")
-
-# Website scraper for training data
-try:
-    from mymuse_website_scraper import scrape_and_train
-except ImportError:
-    scrape_and_train = None
-    print("Warning: mymuse_website_scraper not available")
+# Instagram / website scrapers for training data (selenium loads with them)
+scrape_instagram_posts = LazyAttr("instagram_scraper", "scrape_instagram_posts", None)
+scrape_and_train = LazyAttr("mymuse_website_scraper", "scrape_and_train", None)
 
 # Reviews index (training via CSV)
+class _NoReviewIndex:
+    @classmethod
+    def get(cls): return cls
+    @classmethod
+    def stats(cls): return {"total_docs": 0, "products": []}
+    @classmethod
+    def samples(cls, n: int = 6): return []
+    @classmethod
+    def import_csv(cls, file_obj): return {"added": 0, "total": 0}
+    @classmethod
+    def build(cls): return None
+    @classmethod
+    def search(cls, product_name: str, query: str, k: int = 6): return []
+    @classmethod
+    def import_csv_file(cls, path: str): return {"added": 0, "total": 0}
+    @classmethod
+    def import_csv_dir(cls, path: str): return {"added": 0, "total": 0}
+    @classmethod
+    def configure_snapshots(cls, dir_path): return None
+    @classmethod
+    def attach_snapshot(cls, force: bool = False): return False
+    @classmethod
+    def maybe_reload(cls, check_every: float = 10.0): return False
+
+ReviewIndex = LazyAttr("review_store", "ReviewIndex", _NoReviewIndex)
+
+import background_owner
+import warmup
+
+# Incremental scrape store (seen-review fingerprints + append-only CSV)
 try:
-    from review_store import ReviewIndex
+    from scrape_store import ScrapeStore
 except Exception:
-    class ReviewIndex:
-        @classmethod
-        def get(cls): return cls
-        @classmethod
-        def stats(cls): return {"total_docs": 0, "products": []}
-        @classmethod
-        def samples(cls, n: int = 6): return []
-        @classmethod
-        def import_csv(cls, file_obj): return {"added": 0, "total": 0}
-        @classmethod
-        def build(cls): return None
-        @classmethod
-        def search(cls, product_name: str, query: str, k: int = 6): return []
-        @classmethod
-        def import_csv_file(cls, path: str): return {"added": 0, "total": 0}
-        @classmethod
-        def import_csv_dir(cls, path: str): return {"added": 0, "total": 0}
+    ScrapeStore = None
+
+# Originality memory over shipped scripts (feeds the evaluator's memory caps; sklearn)
+OriginalityMemory = LazyAttr("originality_memory", "OriginalityMemory", None)
 
 # -----------------------------------------------------------------------------
 # Auto-index rebuilding system
 # -----------------------------------------------------------------------------
-def rebuild_index_automatically():
-    """Automatically rebuild the review index from all available data sources"""
+def rebuild_index_automatically(scrape: bool = True):
+    """Automatically rebuild the review index from all available data sources
+    (scrape=False rebuilds from the CSVs already on disk)"""
     try:
         print("Starting automatic index rebuild...")
         
@@ -198,7 +219,7 @@ def rebuild_index_automatically():
                 print(f"Could not import features CSV: {e}")
         
         # 3. Auto-scrape website content
-        if scrape_and_train:
+        if scrape and scrape_and_train:
             try:
                 result = scrape_and_train()
                 if result and result.get("success"):
@@ -207,7 +228,7 @@ def rebuild_index_automatically():
                 print(f"Could not auto-scrape website: {e}")
         
         # 4. Auto-scrape Instagram content
-        if scrape_instagram_posts:
+        if scrape and scrape_instagram_posts:
             try:
                 result = scrape_instagram_posts("mymuse.in", "mymuse", max_posts=50)
                 if result and result.get("success"):
@@ -215,7 +236,13 @@ def rebuild_index_automatically():
             except Exception as e:
                 print(f"Could not auto-scrape Instagram: {e}")
         
-        # 5. Import any other CSV files in data directory
+        # 5. Import any other CSV files in data directory (legacy timestamped
+        #    scrape CSVs are folded into the deduplicated store first)
+        if ScrapeStore:
+            try:
+                ScrapeStore().compact()
+            except Exception as e:
+                print(f"Could not compact scraped CSVs: {e}")
         data_dir = os.path.join(BASE_DIR, "data")
         if os.path.isdir(data_dir):
             for filename in os.listdir(data_dir):
@@ -243,40 +270,65 @@ def rebuild_index_automatically():
 def run_startup_tasks():
     """Run all startup tasks including index rebuild"""
     try:
+        # The scrape/rebuild pass extends the index warm-up builds, so let that finish first
+        warmup.wait()
         print("Running startup tasks...")
         
-        # Rebuild index automatically
-        rebuild_index_automatically()
-        
-        # Set up auto-scraper if available
         try:
             import auto_scraper as _auto_scraper_mod  # type: ignore
-            if hasattr(_auto_scraper_mod, 'start_auto_scraper'):
-                try:
-                    _auto_scraper_mod.start_auto_scraper()
-                    print("Auto-scraper started")
-                except Exception as e:
-                    print(f"Could not start auto-scraper: {e}")
         except Exception:
-            pass
+            _auto_scraper_mod = None
+        
+        # Rebuild index automatically; a restarted owner skips the scrape when
+        # this host scraped within the last interval
+        age = _auto_scraper_mod.last_scrape_age() if _auto_scraper_mod else None
+        scrape = age is None or age >= _auto_scraper_mod.AUTO_SCRAPE_INTERVAL
+        if not scrape:
+            print(f"Skipping startup scrape: last scrape was {age:.0f}s ago")
+        rebuild_index_automatically(scrape=scrape)
+        
+        # Set up auto-scraper if available. The rebuild above already scraped,
+        # so the scheduler's first run is one interval out; it only starts in
+        # the process holding the background lock.
+        if _auto_scraper_mod:
+            try:
+                _auto_scraper_mod.start_auto_scraper(initial_scrape=False)
+                if scrape:
+                    _auto_scraper_mod.auto_scraper.mark_scraped()
+                print("Auto-scraper started")
+            except Exception as e:
+                print(f"Could not start auto-scraper: {e}")
         
         print("Startup tasks completed")
     except Exception as e:
         print(f"Startup tasks failed: {e}")
 
-# Run startup tasks when app starts (only if not skipping)
-if not os.getenv("SKIP_STARTUP", "").lower() in ("1", "true", "yes", "on"):
-    # Run startup tasks in background to avoid blocking port binding
+SKIP_STARTUP = os.getenv("SKIP_STARTUP", "").lower() in ("1", "true", "yes", "on")
+# Endpoints that ship scripts (checked against / added to the originality memory)
+GENERATION_ENDPOINTS = {"transcribe_route", "generate_route", "auto_detect_product", "generate_variations_route"}
+ORIGINALITY_SYNC_SECONDS = float(os.getenv("ORIGINALITY_SYNC_SECONDS", "5"))
+BACKGROUND_LOCK = background_owner.DEFAULT_LOCK_PATH
+
+def start_startup_background():
+    """Run startup tasks in background to avoid blocking port binding"""
     import threading
     def run_startup_background():
         with app.app_context():
             run_startup_tasks()
-    
+
     startup_thread = threading.Thread(target=run_startup_background, daemon=True)
     startup_thread.start()
     print("Startup tasks started in background thread")
-else:
+
+# Run startup tasks when app starts (only if not skipping). Under gunicorn they
+# run in a dedicated background process (run_background_owner, started by
+# gunicorn.conf.py) so recycling request workers never re-runs them.
+if SKIP_STARTUP:
     print("Skipping startup tasks due to SKIP_STARTUP environment variable")
+elif background_owner.is_managed():
+    print("Startup tasks deferred to the background-owner process")
+else:
+    start_startup_background()
 
 # -----------------------------------------------------------------------------
 # Init extensions
@@ -329,28 +381,12 @@ os.makedirs(os.path.join(BASE_DIR, "logs"), exist_ok=True)
 # Structured logger with performance tracking
 logger = logging.getLogger("mymuse")
 
-# Performance monitoring
-class PerformanceMonitor:
-    def __init__(self):
-        self.request_times = {}
-        self.error_counts = {}
-        self.start_time = time.time()
-    
-    def start_request(self, request_id: str):
-        self.request_times[request_id] = time.time()
-    
-    def end_request(self, request_id: str, success: bool = True):
-        if request_id in self.request_times:
-            duration = time.time() - self.request_times[request_id]
-            logger.info(f"Request {request_id} completed in {duration:.3f}s (success: {success})")
-            del self.request_times[request_id]
-    
-    def log_error(self, error_type: str):
-        self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
-        logger.error(f"Error count for {error_type}: {self.error_counts[error_type]}")
-
-# Global performance monitor
-perf_monitor = PerformanceMonitor()
+# Metrics registry (counters + per-stage latency histograms, served on /metrics)
+import metrics
+# Per-request stage spans (Server-Timing header, /admin/traces waterfall)
+import tracing
+# On-demand / sampled request profiles (logs/profiles, /admin/profiles)
+import profiling
 
 # CSRF helper for templates
 @app.context_processor
@@ -361,15 +397,31 @@ def inject_csrf():
 @app.before_request
 def before_request():
     """Monitor all requests for performance and security"""
-    request_id = f"{request.method}_{request.endpoint}_{int(time.time() * 1000)}"
-    request.start_time = time.time()
+    request_id = f"{request.method}_{request.endpoint}_{uuid.uuid4().hex[:12]}"
+    request.start_time = time.perf_counter()
     request.request_id = request_id
+    tracing.start(request_id, request.method, request.path)
+    if profiling.enabled():
+        reason = profiling.wanted(request.headers.get("X-Profile") or request.args.get("profile"))
+        if reason:
+            request.profile_session = profiling.Session(reason, request.args.get("profile_mode", "")).start()
     
     # Log request details
     logger.info(f"Request started: {request_id} - {request.method} {request.path} from {request.remote_addr}")
-    
-    # Start performance monitoring
-    perf_monitor.start_request(request_id)
+
+    # Pick up a review-index snapshot published by the scheduler worker (once
+    # the index module is loaded; until then warm-up owns it)
+    if ReviewIndex.loaded:
+        with tracing.span("index_reload_check"):
+            ReviewIndex.maybe_reload()
+
+    # Scripts saved by other workers since our last look must count as shipped too
+    if request.endpoint in GENERATION_ENDPOINTS and OriginalityMemory:
+        with tracing.span("originality_sync"):
+            try:
+                OriginalityMemory.maybe_sync(db.session, check_every=ORIGINALITY_SYNC_SECONDS)
+            except Exception as e:
+                logger.warning("OriginalityMemory sync failed: %s", e)
     
     # Security checks
     if request.method == "POST":
@@ -384,15 +436,27 @@ def before_request():
 @app.after_request
 def after_request(response):
     """Log response details and performance metrics"""
+    session = getattr(request, "profile_session", None)
+    if session is not None:
+        profile_name = session.stop(request.endpoint or "unmatched")
+        if profile_name:
+            response.headers['X-Profile'] = profile_name
     if hasattr(request, 'request_id'):
         request_id = request.request_id
-        duration = time.time() - request.start_time
+        duration = time.perf_counter() - request.start_time
         
         # Log response details
         logger.info(f"Request completed: {request_id} - Status: {response.status_code} - Duration: {duration:.3f}s")
         
-        # End performance monitoring
-        perf_monitor.end_request(request_id, response.status_code < 400)
+        # Per-endpoint request counts and latency (unmatched paths share one label)
+        endpoint = request.endpoint or "unmatched"
+        metrics.HTTP_REQUESTS.labels(endpoint=endpoint, method=request.method, status=str(response.status_code)).inc()
+        metrics.HTTP_LATENCY.labels(endpoint=endpoint).observe(duration)
+
+        # Stage breakdown for browser devtools; slow ones are kept for /admin/traces
+        trace = tracing.finish(response.status_code)
+        if trace is not None:
+            response.headers['Server-Timing'] = tracing.server_timing(trace)
         
         # Add performance headers
         response.headers['X-Request-ID'] = request_id
@@ -404,6 +468,9 @@ def after_request(response):
 # Models (your existing)
 # -----------------------------------------------------------------------------
 from models import User, Record
+from record_writer import RecordWriter, RECORD_WRITE_BEHIND, register as register_record_writer
+from history import ensure_history_schema, query_history
+import text_store
 
 # SQLAlchemy 2.x safe loader
 @login_manager.user_loader
@@ -415,35 +482,133 @@ def load_user(user_id: str):
 
 login_manager.login_view = "login"
 
-# Ensure DB & warm up review index (+ auto-import CSVs)
+# Ensure DB schema at import (fast); the review index and memory load in warm-up
 with app.app_context():
+    configure_sqlite(db.engine)
+    text_store.register_sqlite_functions(db.engine)
     try:
         db.create_all()
     except Exception as e:
         logger.warning("DB create_all warning: %s", e)
     try:
-        # Auto-import CSVs at startup
-        csv_path = os.getenv("REVIEW_CSV", "")
-        csv_dir  = os.getenv("REVIEW_CSV_DIR", os.path.join(BASE_DIR, "data"))
-        try:
-            if csv_path:
-                ReviewIndex.import_csv_file(csv_path)
-            if csv_dir and os.path.isdir(csv_dir):
-                ReviewIndex.import_csv_dir(csv_dir)
-                # Also import features CSV for product context
-                features_csv = os.path.join(csv_dir, "mymuse_features.csv")
-                if os.path.exists(features_csv):
-                    try:
-                        ReviewIndex.import_csv_file(features_csv)
-                        logger.info("Imported product features CSV for enhanced context")
-                    except Exception as e:
-                        logger.warning("Features CSV import failed: %s", e)
-            ReviewIndex.build()
-        except Exception as e:
-            logger.warning("Review CSV import skipped: %s", e)
-        ReviewIndex.get()
+        text_store.migrate_inline_texts(db.engine)
+    except Exception as e:
+        logger.warning("Record text migration warning: %s", e)
+    try:
+        ensure_history_schema(db.engine)
     except Exception as e:
-        logger.warning("ReviewIndex init warning: %s", e)
+        logger.warning("History schema warning: %s", e)
+    # Nothing opened during preload may be shared with forked workers
+    db.engine.dispose()
+
+# -----------------------------------------------------------------------------
+# Warm-up (runs after the port is bound; /readyz flips to 200 when done)
+# -----------------------------------------------------------------------------
+@warmup.task("imports")
+def _warm_imports():
+    # Resolve the lazy modules so the first real request doesn't pay for them
+    for attr in (analyze_agent, transcribe_media, generate, ReviewIndex):
+        attr.resolve()
+    import evaluator  # noqa: F401  (sklearn; generate imports it per call)
+
+REVIEW_INDEX_DIR = os.getenv("REVIEW_INDEX_DIR", os.path.join(BASE_DIR, "instance", "review_index"))
+REVIEW_INDEX_WAIT_SECONDS = float(os.getenv("REVIEW_INDEX_WAIT_SECONDS", "30"))
+
+def _build_review_index():
+    """Import the review CSVs (folding legacy scrape CSVs into the store first)
+    and build the index; under gunicorn only the background owner calls this."""
+    csv_path = os.getenv("REVIEW_CSV", "")
+    csv_dir  = os.getenv("REVIEW_CSV_DIR", os.path.join(BASE_DIR, "data"))
+    try:
+        if csv_path:
+            ReviewIndex.import_csv_file(csv_path)
+        if csv_dir and os.path.isdir(csv_dir):
+            if ScrapeStore:
+                ScrapeStore().compact()
+            ReviewIndex.import_csv_dir(csv_dir)
+            # Also import features CSV for product context
+            features_csv = os.path.join(csv_dir, "mymuse_features.csv")
+            if os.path.exists(features_csv):
+                try:
+                    ReviewIndex.import_csv_file(features_csv)
+                    logger.info("Imported product features CSV for enhanced context")
+                except Exception as e:
+                    logger.warning("Features CSV import failed: %s", e)
+        ReviewIndex.build()
+    except Exception as e:
+        logger.warning("Review CSV import skipped: %s", e)
+
+@warmup.task("review_index")
+def _warm_review_index():
+    # Under a multi-process server the background owner builds and publishes
+    # mmap-able snapshots; request workers only attach to them
+    if background_owner.is_managed():
+        ReviewIndex.configure_snapshots(REVIEW_INDEX_DIR)
+        deadline = time.monotonic() + REVIEW_INDEX_WAIT_SECONDS
+        while not ReviewIndex.attach_snapshot() and not background_owner.is_owner():
+            if ReviewIndex.snapshot_version() or time.monotonic() >= deadline:
+                # maybe_reload() attaches it once the owner has published one
+                logger.warning("No review index snapshot to attach yet")
+                break
+            time.sleep(0.5)
+        return
+    _build_review_index()
+    ReviewIndex.get()
+
+@warmup.task("originality_memory")
+def _warm_originality_memory():
+    # Seed the originality memory with every script we have already shipped
+    if not OriginalityMemory:
+        return
+    with app.app_context():
+        try:
+            OriginalityMemory.sync(db.session)
+        finally:
+            db.session.remove()
+
+def on_worker_exit():
+    """gunicorn worker_exit hook: commit queued records before the worker goes."""
+    record_writer.close()
+    metrics.mark_process_dead()
+
+def on_worker_start():
+    """gunicorn post_worker_init hook (see gunicorn.conf.py)."""
+    with app.app_context():
+        # Pooled connections inherited from the master belong to the master
+        db.engine.dispose(close=False)
+    warmup.start()
+
+def run_background_owner() -> int:
+    """Main loop of the background-owner process gunicorn.conf.py starts next to
+    the request workers: it holds the background lock, runs the startup
+    scrape/rebuild once and the scrape scheduler for as long as it lives, and
+    is never recycled by max_requests. Returns an exit code.
+    """
+    if not background_owner.claim(BACKGROUND_LOCK):
+        logger.warning("Another process already owns background tasks; exiting")
+        return 1
+    parent = os.getppid()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    # Index snapshots this process builds are what the request workers attach;
+    # publish one right away if there is none yet
+    ReviewIndex.configure_snapshots(REVIEW_INDEX_DIR)
+    if not ReviewIndex.attach_snapshot():
+        _build_review_index()
+    warmup.start()
+    with app.app_context():
+        run_startup_tasks()
+    # Exit with the gunicorn master rather than outlive it holding the lock
+    while not stop.wait(5) and os.getppid() == parent:
+        pass
+    try:
+        import auto_scraper as _auto_scraper_mod  # type: ignore
+        _auto_scraper_mod.stop_auto_scraper()
+    except Exception:
+        pass
+    background_owner.release()
+    return 0
 
 # -----------------------------------------------------------------------------
 # Helpers
@@ -453,19 +618,32 @@ ALLOWED_MEDIA = {"mp4", "mov", "webm", "mp3", "wav", "m4a"}
 def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_MEDIA
 
+_public_user_id: Optional[int] = None
+_public_user_lock = threading.Lock()
+
 def _get_public_user_id() -> int:
-    """Return an ID for a public fallback user, creating it if necessary."""
-    try:
-        public_email = "public@mymuse.local"
-        user = User.query.filter_by(email=public_email).first()
-        if not user:
-            user = User(email=public_email, password_hash=generate_password_hash("public"), is_admin=False, created_at=datetime.utcnow())
-            db.session.add(user)
-            db.session.commit()
-        return int(user.id)
-    except Exception:
-        # As a last resort, return 0; callers should ensure a valid FK
-        return 0
+    """Return an ID for a public fallback user, creating it if necessary.
+    Cached for the process lifetime; the row is never deleted.
+    """
+    global _public_user_id
+    if _public_user_id is not None:
+        return _public_user_id
+    with _public_user_lock:
+        if _public_user_id is not None:
+            return _public_user_id
+        try:
+            public_email = "public@mymuse.local"
+            user = User.query.filter_by(email=public_email).first()
+            if not user:
+                user = User(email=public_email, password_hash=generate_password_hash("public"), is_admin=False, created_at=datetime.utcnow())
+                db.session.add(user)
+                db.session.commit()
+            _public_user_id = int(user.id)
+            return _public_user_id
+        except Exception:
+            db.session.rollback()
+            # As a last resort, return 0; callers should ensure a valid FK
+            return 0
 
 def _current_user_id_or_public() -> int:
     try:
@@ -475,16 +653,57 @@ def _current_user_id_or_public() -> int:
         pass
     return _get_public_user_id()
 
+def _current_user_is_admin() -> bool:
+    try:
+        return bool(getattr(current_user, "is_authenticated", False) and getattr(current_user, "is_admin", False))
+    except Exception:
+        return False
+
+def _record_objects(rows: List[Dict[str, Any]]) -> List[Record]:
+    """Intern the texts of a batch (stored once by hash) and build its Records."""
+    hashes = text_store.intern_many(db.session, [v for r in rows for v in (r["transcript"], r["generated_text"])])
+    return [
+        Record(user_id=r["user_id"], product_name=r["product_name"], created_at=r["created_at"],
+               transcript_hash=hashes[2 * i], generated_hash=hashes[2 * i + 1])
+        for i, r in enumerate(rows)
+    ]
+
+def _write_records(rows: List[Dict[str, Any]]) -> None:
+    """Insert a batch of records in one transaction (runs on the writer thread)."""
+    with app.app_context(), metrics.stage("db_save"):
+        try:
+            db.session.add_all(_record_objects(rows))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+# Write-behind: generation routes enqueue; one thread per process commits in batches
+record_writer = register_record_writer(RecordWriter(_write_records))
+metrics.register_collector(
+    lambda: metrics.QUEUE_DEPTH.labels(queue="record_writer").set(record_writer.stats()["queued"]))
+
 def _save_record(user_id: int, product: str, transcript: str, generated: str) -> None:
-    rec = Record(
+    row = dict(
         user_id=user_id,
         product_name=product,
         transcript=transcript,
         generated_text=generated,
         created_at=datetime.utcnow()
     )
-    db.session.add(rec)
-    db.session.commit()
+    if RECORD_WRITE_BEHIND:
+        record_writer.submit(row)
+    else:
+        with metrics.stage("db_save"):
+            db.session.add_all(_record_objects([row]))
+            db.session.commit()
+    if OriginalityMemory:
+        try:
+            OriginalityMemory.add(generated)
+        except Exception as e:
+            logger.warning("OriginalityMemory update failed: %s", e)
 
 def _require_admin():
     # Auth disabled (Option A): no-op to allow public access
@@ -555,7 +774,8 @@ def transcribe_route():
 
         # 1) Prefer URL if provided
         if media_url:
-            transcript_text = transcribe_from_url(media_url)  # returns transcript or None
+            with tracing.span("transcribe_url"):
+                transcript_text = transcribe_from_url(media_url)  # returns transcript or None
             if not transcript_text:
                 path = download_from_url(media_url)  # returns local path or None
                 if path:
@@ -584,7 +804,8 @@ def transcribe_route():
                 if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
                     raise ValueError("File upload failed")
                 
-                transcript_text = transcribe_media(tmp_path)
+                with tracing.span("transcribe_upload"):
+                    transcript_text = transcribe_media(tmp_path)
                 logger.info(f"File transcription completed: {fname} -> {len(transcript_text or '')} chars")
                 
             except Exception as e:
@@ -607,9 +828,12 @@ def transcribe_route():
             logger.warning(f"Media analysis setup failed: {e}")
             media_for_analysis = None
         
+        # One transcript context for the whole request: every stage reuses its analyses
+        ctx = TranscriptContext(transcript_text)
+
         # Enhanced media analysis
         try:
-            media_analysis = analyze_media(media_for_analysis, transcript_text)
+            media_analysis = analyze_media(media_for_analysis, transcript_text, ctx=ctx)
             sent = media_analysis.get("sentiment", {})
             phrases_list = media_analysis.get("keywords", [])
             theme_map = {"tags": media_analysis.get("themes", [])}
@@ -653,8 +877,6 @@ def transcribe_route():
             
             logger.info(f"Calling generate_variations: product={product_name}, transcript_length={len(transcript_text)}, modes=[instagram:{instagram_mode}, pg13:{pg13_mode}, genz:{genz_mode}]")
             
-            # Performance monitoring for script generation
-            gen_start_time = time.time()
             result = generate_variations(
                 product_name, 
                 transcript_text, 
@@ -662,15 +884,14 @@ def transcribe_route():
                 rel_reviews=rel_reviews, 
                 instagram_mode=instagram_mode, 
                 pg13_mode=pg13_mode, 
-                genz_mode=genz_mode
+                genz_mode=genz_mode,
+                ctx=ctx,
             )
-            gen_duration = time.time() - gen_start_time
-            
-            logger.info(f"Script generation completed in {gen_duration:.3f}s: {len(result.get('variations', []))} variations")
+            logger.info(f"Script generation completed: {len(result.get('variations', []))} variations")
             
         except Exception as e:
             logger.error(f"Script generation failed: {e}")
-            perf_monitor.log_error("script_generation")
+            metrics.ERRORS.labels(kind="script_generation").inc()
             result = {"variations": [], "summary": "Generation failed due to system error"}
         
         # Enhanced result processing
@@ -692,7 +913,7 @@ def transcribe_route():
             logger.info(f"Record saved successfully for user {current_user.id}")
         except Exception as e:
             logger.error(f"Failed to save record: {e}")
-            perf_monitor.log_error("database_save")
+            metrics.ERRORS.labels(kind="database_save").inc()
             # Don't fail the entire request if saving fails
 
         # Calculate total processing time
@@ -713,7 +934,7 @@ def transcribe_route():
         # Enhanced error handling with detailed logging
         error_msg = f"Transcription failed: {str(e)}"
         logger.exception(f"Critical error in transcription route: {error_msg}")
-        perf_monitor.log_error("transcription_critical")
+        metrics.ERRORS.labels(kind="transcription_critical").inc()
         
         # User-friendly error message
         flash("Something went wrong while processing your media. Please try again.", "error")
@@ -754,7 +975,8 @@ def generate_route():
 
     try:
         # Agent 1 for given transcript only (no media here)
-        analysis = analyze_agent(transcript_text)
+        ctx = TranscriptContext(transcript_text)
+        analysis = ctx.analysis
         sent = analysis.get("sentiment", {})
         phrases_list = analysis.get("keywords", [])
         theme_map = {"tags": analysis.get("themes", [])}
@@ -779,6 +1001,7 @@ def generate_route():
                 rel_reviews=rel_reviews,
                 output_style=None,
                 gen_z=genz_mode,
+                ctx=ctx,
             )
             generated = (result.get("generated_script") or "").strip() or "No output."
             variations = result.get("variations", [])
@@ -822,7 +1045,8 @@ def auto_detect_product():
         product_name = _detect_product_from_transcript(transcript_text)
         
         # Agent 1 for given transcript only (no media here)
-        analysis = analyze_agent(transcript_text)
+        ctx = TranscriptContext(transcript_text)
+        analysis = ctx.analysis
         sent = analysis.get("sentiment", {})
         phrases_list = analysis.get("keywords", [])
         theme_map = {"tags": analysis.get("themes", [])}
@@ -837,7 +1061,7 @@ def auto_detect_product():
         genz_mode = request.form.get("genz_mode") == "on"
         
         try:
-            result = generate_variations(product_name, transcript_text, analysis, rel_reviews=rel_reviews, instagram_mode=instagram_mode, pg13_mode=pg13_mode, genz_mode=genz_mode)
+            result = generate_variations(product_name, transcript_text, analysis, rel_reviews=rel_reviews, instagram_mode=instagram_mode, pg13_mode=pg13_mode, genz_mode=genz_mode, ctx=ctx)
             generated = (result.get("variations", [{}])[0].get("text", "") or "").strip() or "No output."
             variations = result.get("variations", [])
             summary = result.get("summary", "")
@@ -917,7 +1141,8 @@ def generate_variations_route():
         return redirect(url_for("dashboard"))
 
     try:
-        analysis = analyze_agent(transcript_text)
+        ctx = TranscriptContext(transcript_text)
+        analysis = ctx.analysis
         instagram_mode = request.form.get("instagram_mode") == "on"
         pg13_mode = request.form.get("pg13_mode") == "on"
         genz_mode = request.form.get("genz_mode") == "on"
@@ -925,7 +1150,7 @@ def generate_variations_route():
             rel_reviews = ReviewIndex.search(product_name, transcript_text, k=8)
         except Exception:
             rel_reviews = []
-        payload = generate_variations(product_name, transcript_text, analysis, rel_reviews=rel_reviews, instagram_mode=instagram_mode, pg13_mode=pg13_mode, genz_mode=genz_mode)
+        payload = generate_variations(product_name, transcript_text, analysis, rel_reviews=rel_reviews, instagram_mode=instagram_mode, pg13_mode=pg13_mode, genz_mode=genz_mode, ctx=ctx)
         variations = payload.get("variations", [])
         summary = payload.get("summary", "")
         flash("Generated variations successfully.", "success")
@@ -975,6 +1200,101 @@ def generate_variations_text_only_route():
         flash("Something went wrong while generating variations.", "error")
         return render_template("main/dashboard.html")
 
+# -----------------------------------------------------------------------------
+# Routes: Generation history (keyset-paginated, FTS search)
+# -----------------------------------------------------------------------------
+def _history_all_users() -> bool:
+    """?all=1 lists every user's records; honoured for admins only."""
+    return bool(request.args.get("all")) and _current_user_is_admin()
+
+def _history_page() -> Dict[str, Any]:
+    user_id = None if _history_all_users() else _current_user_id_or_public()
+    return query_history(
+        db.session, Record,
+        user_id=user_id,
+        product=(request.args.get("product") or "").strip() or None,
+        q=(request.args.get("q") or "").strip() or None,
+        cursor=request.args.get("cursor"),
+        limit=request.args.get("limit", type=int) or 20,
+    )
+
+@app.route("/api/history", methods=["GET"])
+def api_history():
+    return jsonify(_history_page())
+
+@app.route("/api/history/<int:record_id>", methods=["GET"])
+def api_history_record(record_id: int):
+    rec = db.session.get(Record, record_id)
+    # Someone else's record is indistinguishable from a missing one
+    if rec is None or (rec.user_id != _current_user_id_or_public() and not _current_user_is_admin()):
+        # JSON 404 rather than the app-wide redirect to the dashboard
+        return jsonify({"error": "not found"}), 404
+    return jsonify({
+        "id": rec.id,
+        "user_id": rec.user_id,
+        "product_name": rec.product_name,
+        "created_at": rec.created_at.isoformat() if rec.created_at else None,
+        "transcript": rec.transcript,
+        "generated_text": rec.generated_text,
+    })
+
+@app.route("/history", methods=["GET"])
+def history():
+    page = _history_page()
+    return render_template("main/history.html", page=page, q=request.args.get("q", ""),
+                           product=request.args.get("product", ""), all_users=_history_all_users())
+
+# -----------------------------------------------------------------------------
+# Route: Prometheus metrics (all gunicorn workers, see metrics.py)
+# -----------------------------------------------------------------------------
+@app.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics_route():
+    return app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# -----------------------------------------------------------------------------
+# Routes: Liveness vs readiness (load balancers / orchestrators)
+# -----------------------------------------------------------------------------
+@app.route("/healthz", methods=["GET"])
+@limiter.exempt
+def healthz():
+    # The process is up and serving; says nothing about warm-up
+    return jsonify(status="ok")
+
+@app.route("/readyz", methods=["GET"])
+@limiter.exempt
+def readyz():
+    # 503 until the warm-up tasks (imports, review index, memory) have run
+    state = warmup.status()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+# -----------------------------------------------------------------------------
+# Route: Slowest requests (stage waterfall)
+# -----------------------------------------------------------------------------
+@app.route("/admin/traces", methods=["GET"])
+def admin_traces():
+    n = max(1, min(request.args.get("n", type=int) or 10, tracing.TRACE_KEEP))
+    return render_template("main/admin_traces.html", traces=tracing.slowest(n), n=n)
+
+# -----------------------------------------------------------------------------
+# Routes: Request profiles (captured with PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
+# -----------------------------------------------------------------------------
+@app.route("/admin/profiles", methods=["GET"])
+def admin_profiles():
+    return render_template("main/admin_profiles.html", profiles=profiling.list_profiles(),
+                           on_demand=bool(profiling.PROFILE_TOKEN), sample_rate=profiling.PROFILE_SAMPLE_RATE,
+                           mode=profiling.PROFILE_MODE)
+
+@app.route("/admin/profiles/<name>", methods=["GET"])
+def admin_profile_download(name: str):
+    path = profiling.resolve(name)
+    if path is None:
+        abort(404)
+    if name.endswith(".prof"):
+        return send_file(path, as_attachment=True, download_name=name, mimetype="application/octet-stream")
+    return send_file(path, mimetype="text/plain", as_attachment=request.args.get("download") == "1",
+                     download_name=name)
+
 # -----------------------------------------------------------------------------
 # Routes: Admin — Reviews (CSV training)
 # -----------------------------------------------------------------------------
@@ -1009,7 +1329,7 @@ def admin_auto_scraper():
         if action == "force_scrape":
             success = force_scrape_now()
             if success:
-                flash("Manual scrape triggered successfully.", "success")
+                flash("Manual scrape triggered; the scheduler worker runs it and publishes the new index.", "success")
             else:
                 flash("Manual scrape failed.", "error")
         return redirect(url_for("admin_auto_scraper"))
@@ -1038,10 +1358,9 @@ def admin_website_scrape():
             if result.get('success'):
                 # Auto-import into review index
                 try:
-                    from review_store import ReviewIndex
-                    info = ReviewIndex.import_csv_file(result['csv_path'])
+                    info = ReviewIndex.import_csv(ScrapeStore.to_csv_bytes(result.get('new_rows') or []))
                     ReviewIndex.build()
-                    flash(f'Successfully scraped {result["training_examples"]} training examples and imported into review index!', 'success')
+                    flash(f'Successfully scraped {result["training_examples"]} training examples ({result.get("new_examples", 0)} new) and imported into review index!', 'success')
                 except Exception as e:
                     flash(f'Scraping successful but import failed: {str(e)}', 'warning')
             else:
@@ -1072,10 +1391,9 @@ def admin_instagram_scrape():
                 if result.get('success'):
                     # Auto-import into review index
                     try:
-                        from review_store import ReviewIndex
-                        info = ReviewIndex.import_csv_file(result['csv_path'])
+                        info = ReviewIndex.import_csv(ScrapeStore.to_csv_bytes(result.get('new_rows') or []))
                         ReviewIndex.build()
-                        flash(f'Successfully scraped {result["training_examples"]} Instagram posts and imported into review index!', 'success')
+                        flash(f'Successfully scraped {result["training_examples"]} Instagram posts ({result.get("new_examples", 0)} new) and imported into review index!', 'success')
                     except Exception as e:
                         flash(f'Instagram scraping successful but import failed: {str(e)}', 'warning')
                 else:
@@ -1112,6 +1430,14 @@ def server_error(e):
     flash("Server error. Please try again.", "error")
     return redirect(url_for("dashboard"))
 
+# -----------------------------------------------------------------------------
+# Warm-up kick-off (last, so the routes above are registered first). Under
+# gunicorn the app is preloaded in the master, so each worker warms up in
+# on_worker_start() instead.
+# -----------------------------------------------------------------------------
+if not background_owner.is_managed():
+    warmup.start()
+
 # -----------------------------------------------------------------------------
 # Entrypoint
 # -----------------------------------------------------------------------------
@@ -1,144 +1,260 @@
 from __future__ import annotations
 import os
+import json
 import time
+import random
 import logging
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+import background_owner
 
 logger = logging.getLogger("mymuse")
 
 # Configuration
 AUTO_SCRAPE_ENABLED = os.getenv("AUTO_SCRAPE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
 AUTO_SCRAPE_INTERVAL = int(os.getenv("AUTO_SCRAPE_INTERVAL", "3600"))  # Default: 1 hour
+AUTO_SCRAPE_JITTER = float(os.getenv("AUTO_SCRAPE_JITTER", "0.1"))     # ±10% on every delay
+AUTO_SCRAPE_BACKOFF = int(os.getenv("AUTO_SCRAPE_BACKOFF", "300"))     # first retry after a failure, doubles up to the interval
 MYMUSE_WEBSITE_URL = os.getenv("MYMUSE_WEBSITE_URL", "https://mymuse.in/collections/deal-of-the-day")
 MAX_POSTS_PER_SCRAPE = int(os.getenv("MAX_POSTS_PER_SCRAPE", "100"))
 DATA_DIR = os.getenv("DATA_DIR", "data")
 
+# Shared between the leader and the other workers on this host
+STATE_DIR = os.path.dirname(background_owner.DEFAULT_LOCK_PATH)
+STATUS_FILE = os.path.join(STATE_DIR, "auto_scraper_status.json")
+TRIGGER_FILE = os.path.join(STATE_DIR, "auto_scraper.trigger")
+SCHEDULER_TICK = 15  # seconds between checks for a due run or a queued manual scrape
+
+
 class AutoScraper:
-    """Automated Instagram scraper that runs in the background."""
-    
+    """
+    Automated website scraper that runs in the background.
+    Only the leader (the process holding background_owner's lock) schedules
+    scrapes; other workers read its status file and queue manual scrapes via a
+    trigger file. Runs are spaced by a jittered interval, failures back off
+    exponentially, and each successful import publishes a new review-index
+    snapshot that the other workers hot-reload. A restarted leader picks the
+    schedule and backoff back up from the status file.
+    """
+
     def __init__(self):
         self.is_running = False
         self.last_scrape_time: Optional[datetime] = None
         self.scrape_thread: Optional[threading.Thread] = None
         self.scrape_stats: Dict[str, Any] = {}
-        
-    def start(self):
-        """Start the automated scraping service."""
+        self.failures = 0
+        self.next_run: Optional[float] = None
+        self._stop = threading.Event()
+        self._scrape_lock = threading.Lock()
+
+    def start(self, initial_scrape: bool = True):
+        """Start the automated scraping service (leader only)."""
         if self.is_running:
             logger.info("Auto-scraper is already running")
             return
-            
+
         if not AUTO_SCRAPE_ENABLED:
             logger.info("Auto-scraping is disabled")
             return
-            
+
+        if not background_owner.claim():
+            logger.info("Auto-scraper not started: another process is the scheduler leader")
+            return
+
         self.is_running = True
+        self._stop.clear()
+        previous_next_run = self._restore_status()
+        now = time.time()
+        if previous_next_run and previous_next_run > now:
+            # Keep the previous leader's schedule (and any backoff it was in)
+            self.next_run = previous_next_run
+        else:
+            # First run now, or one (jittered) interval out when startup already scraped
+            self.next_run = now if initial_scrape else now + self._next_delay()
         self.scrape_thread = threading.Thread(target=self._run_scraping_loop, daemon=True)
         self.scrape_thread.start()
+        self._write_status()
         logger.info("Auto-scraper started")
-        
-        # Run initial scrape immediately
-        self._run_single_scrape()
-        
+
     def stop(self):
         """Stop the automated scraping service."""
         self.is_running = False
+        self._stop.set()
         if self.scrape_thread:
             self.scrape_thread.join(timeout=5)
         logger.info("Auto-scraper stopped")
-        
+
+    def _restore_status(self) -> Optional[float]:
+        """Load failures / last run / stats from the status file a previous
+        leader wrote; returns its next_run (epoch seconds) if it had one."""
+        try:
+            with open(STATUS_FILE, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            self.failures = int(previous.get("consecutive_failures") or 0)
+            self.scrape_stats = previous.get("stats") or {}
+            if previous.get("last_scrape"):
+                self.last_scrape_time = datetime.fromisoformat(previous["last_scrape"])
+            return datetime.fromisoformat(previous["next_run"]).timestamp() if previous.get("next_run") else None
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def mark_scraped(self) -> None:
+        """Record a scrape run outside the scheduler (the startup rebuild)."""
+        if self.is_running:
+            self.last_scrape_time = datetime.now()
+            self._write_status()
+
+    def _next_delay(self) -> float:
+        """Seconds until the next run: the interval, or exponential backoff
+        after consecutive failures; ±AUTO_SCRAPE_JITTER so hosts don't align.
+        """
+        if self.failures:
+            base = min(AUTO_SCRAPE_INTERVAL, AUTO_SCRAPE_BACKOFF * (2 ** (self.failures - 1)))
+        else:
+            base = AUTO_SCRAPE_INTERVAL
+        return base * random.uniform(1.0 - AUTO_SCRAPE_JITTER, 1.0 + AUTO_SCRAPE_JITTER)
+
     def _run_scraping_loop(self):
-        """Main scraping loop that runs continuously."""
-        while self.is_running:
+        """Main scheduler loop: run when due or when a manual scrape is queued."""
+        while self.is_running and not self._stop.is_set():
             try:
-                # Wait for next scrape interval
-                time.sleep(AUTO_SCRAPE_INTERVAL)
-                
-                if self.is_running:
-                    self._run_single_scrape()
-                    
+                triggered = os.path.exists(TRIGGER_FILE)
+                if triggered:
+                    try:
+                        os.remove(TRIGGER_FILE)
+                    except OSError:
+                        pass
+                if triggered or (self.next_run is not None and time.time() >= self.next_run):
+                    ok = self._run_single_scrape()
+                    self.failures = 0 if ok else self.failures + 1
+                    self.next_run = time.time() + self._next_delay()
+                    self._write_status()
             except Exception as e:
                 logger.error(f"Error in scraping loop: {e}")
-                time.sleep(300)  # Wait 5 minutes before retrying
-                
-    def _run_single_scrape(self):
-        """Run a single scraping operation."""
-        try:
-            logger.info("Starting automated MyMuse website scrape")
-            
-            # Import here to avoid circular imports
-            from mymuse_website_scraper import scrape_and_train
-            
-            # Run the scrape
-            result = scrape_and_train(
-                url=MYMUSE_WEBSITE_URL,
-                product_name="mymuse"
-            )
-            
-            if result.get("success"):
-                # Auto-import into review index
-                self._auto_import_training_data(result.get("csv_path", ""))
-                
-                # Update stats
-                self.scrape_stats = {
-                    "last_successful": datetime.now().isoformat(),
-                    "products_scraped": result.get("products_scraped", 0),
-                    "reviews_scraped": result.get("reviews_scraped", 0),
-                    "testimonials_scraped": result.get("testimonials_scraped", 0),
-                    "training_examples": result.get("training_examples", 0),
-                    "csv_path": result.get("csv_path", ""),
-                    "categories": result.get("categories", [])
-                }
-                
-                self.last_scrape_time = datetime.now()
-                logger.info(f"Automated website scrape completed successfully: {result.get('training_examples', 0)} training examples")
-                
-            else:
+                self.failures += 1
+                self.next_run = time.time() + self._next_delay()
+            self._stop.wait(SCHEDULER_TICK)
+
+    def _run_single_scrape(self) -> bool:
+        """Run a single scraping operation. Returns True on success."""
+        with self._scrape_lock:
+            try:
+                logger.info("Starting automated MyMuse website scrape")
+
+                # Import here to avoid circular imports
+                from mymuse_website_scraper import scrape_and_train
+
+                # Run the scrape
+                result = scrape_and_train(
+                    url=MYMUSE_WEBSITE_URL,
+                    product_name="mymuse"
+                )
+
+                if result.get("success"):
+                    # Auto-import the rows this scrape saw for the first time
+                    self._auto_import_training_data(result.get("new_rows") or [])
+
+                    # Update stats
+                    self.scrape_stats = {
+                        "last_successful": datetime.now().isoformat(),
+                        "products_scraped": result.get("products_scraped", 0),
+                        "reviews_scraped": result.get("reviews_scraped", 0),
+                        "testimonials_scraped": result.get("testimonials_scraped", 0),
+                        "training_examples": result.get("training_examples", 0),
+                        "new_examples": result.get("new_examples", 0),
+                        "csv_path": result.get("csv_path", ""),
+                        "categories": result.get("categories", [])
+                    }
+
+                    self.last_scrape_time = datetime.now()
+                    logger.info(f"Automated website scrape completed successfully: {result.get('training_examples', 0)} training examples")
+                    return True
+
                 logger.error(f"Automated website scrape failed: {result.get('error', 'Unknown error')}")
-                
-        except Exception as e:
-            logger.error(f"Error during automated website scrape: {e}")
-            
-    def _auto_import_training_data(self, csv_path: str):
-        """Automatically import scraped data into the review index."""
-        if not csv_path or not os.path.exists(csv_path):
-            logger.warning(f"CSV file not found: {csv_path}")
+                return False
+
+            except Exception as e:
+                logger.error(f"Error during automated website scrape: {e}")
+                return False
+
+    def _auto_import_training_data(self, new_rows: List[Dict[str, Any]]):
+        """Automatically import newly scraped rows into the review index."""
+        if not new_rows:
+            logger.info("No new training examples in this scrape; index unchanged")
             return
-            
+
         try:
             from review_store import ReviewIndex
-            
-            # Import the new data
-            info = ReviewIndex.import_csv_file(csv_path)
+            from scrape_store import ScrapeStore
+
+            # Import the new data; build() publishes a snapshot the other workers hot-reload
+            info = ReviewIndex.import_csv(ScrapeStore.to_csv_bytes(new_rows))
             ReviewIndex.build()
-            
+
             logger.info(f"Auto-imported {info.get('added', 0)} new training examples into review index")
-            
+
         except Exception as e:
             logger.error(f"Failed to auto-import training data: {e}")
-            
-    def get_status(self) -> Dict[str, Any]:
-        """Get current scraper status."""
+
+    def _write_status(self) -> None:
+        """Publish the leader's status for the other workers (atomic replace)."""
+        try:
+            os.makedirs(STATE_DIR, exist_ok=True)
+            tmp = f"{STATUS_FILE}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._local_status(), f)
+            os.replace(tmp, STATUS_FILE)
+        except Exception as e:
+            logger.debug(f"Could not write scraper status: {e}")
+
+    def _local_status(self) -> Dict[str, Any]:
         return {
             "is_running": self.is_running,
             "enabled": AUTO_SCRAPE_ENABLED,
             "interval_seconds": AUTO_SCRAPE_INTERVAL,
             "last_scrape": self.last_scrape_time.isoformat() if self.last_scrape_time else None,
+            "next_run": datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            "consecutive_failures": self.failures,
+            "leader_pid": os.getpid(),
             "stats": self.scrape_stats,
             "target_website": MYMUSE_WEBSITE_URL
         }
-        
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get current scraper status (the leader's, when asked from another worker)."""
+        if self.is_running:
+            status = self._local_status()
+        else:
+            try:
+                with open(STATUS_FILE, "r", encoding="utf-8") as f:
+                    status = json.load(f)
+            except (OSError, ValueError):
+                status = self._local_status()
+        status["is_leader"] = self.is_running
+        return status
+
     def force_scrape(self):
-        """Force an immediate scrape (can be called from admin or API)."""
+        """Force an immediate scrape (can be called from admin or API).
+        On a non-leader worker this queues the scrape for the leader.
+        """
         if not self.is_running:
-            logger.warning("Auto-scraper is not running")
-            return False
-            
+            try:
+                os.makedirs(STATE_DIR, exist_ok=True)
+                with open(TRIGGER_FILE, "a", encoding="utf-8"):
+                    pass
+                logger.info("Manual scrape queued for the scheduler leader")
+                return True
+            except OSError as e:
+                logger.warning(f"Could not queue manual scrape: {e}")
+                return False
+
         try:
-            self._run_single_scrape()
-            return True
+            ok = self._run_single_scrape()
+            self.failures = 0 if ok else self.failures + 1
+            self._write_status()
+            return ok
         except Exception as e:
             logger.error(f"Forced scrape failed: {e}")
             return False
@@ -148,9 +264,19 @@ class AutoScraper:
 auto_scraper = AutoScraper()
 
 
-def start_auto_scraper():
-    """Start the automated scraper service."""
-    auto_scraper.start()
+def start_auto_scraper(initial_scrape: bool = True):
+    """Start the automated scraper service (no-op unless this process is the leader)."""
+    auto_scraper.start(initial_scrape=initial_scrape)
+
+
+def last_scrape_age() -> Optional[float]:
+    """Seconds since the last recorded scrape on this host (None if never)."""
+    try:
+        with open(STATUS_FILE, "r", encoding="utf-8") as f:
+            last = json.load(f).get("last_scrape")
+        return (datetime.now() - datetime.fromisoformat(last)).total_seconds() if last else None
+    except (OSError, ValueError, TypeError):
+        return None
 
 
 def stop_auto_scraper():
@@ -166,10 +292,3 @@ def get_scraper_status() -> Dict[str, Any]:
 def force_scrape_now() -> bool:
     """Force an immediate scrape."""
     return auto_scraper.force_scrape()
-
-
-# Auto-start when module is imported (if enabled)
-if AUTO_SCRAPE_ENABLED:
-    # Start in a separate thread to avoid blocking
-    startup_thread = threading.Thread(target=start_auto_scraper, daemon=True)
-    startup_thread.start()
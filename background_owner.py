@@ -0,0 +1,69 @@
+# background_owner.py — exactly one process per host owns background work (scrapes, index rebuilds)
+from __future__ import annotations
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger("mymuse")
+
+# Set by gunicorn.conf.py before the app is preloaded. Under a managed server the
+# app must not start threads at import time (they would live in the master and
+# not survive the fork); the dedicated background process gunicorn.conf.py
+# starts (app.run_background_owner) claims ownership instead.
+MANAGED_ENV = "MYMUSE_SERVER"
+DEFAULT_LOCK_PATH = os.getenv(
+    "BACKGROUND_LOCK",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "background.lock"),
+)
+
+_lock_fd: Optional[int] = None
+
+
+def is_managed() -> bool:
+    return os.getenv(MANAGED_ENV, "").lower() == "gunicorn"
+
+
+def claim(lock_path: Optional[str] = None) -> bool:
+    """Try to become the background owner. Non-blocking flock on `lock_path`:
+    the first process wins and holds it until it exits, at which point the OS
+    releases the lock and the next owner to start can claim it.
+    """
+    global _lock_fd
+    if _lock_fd is not None:
+        return True
+    lock_path = lock_path or DEFAULT_LOCK_PATH
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows dev server): single process, so it owns everything
+        _lock_fd = -1
+        return True
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, f"{os.getpid()}\n".encode())
+    _lock_fd = fd
+    logger.info("Process %d owns background tasks (%s)", os.getpid(), lock_path)
+    return True
+
+
+def is_owner() -> bool:
+    return _lock_fd is not None
+
+
+def release() -> None:
+    global _lock_fd
+    if _lock_fd is not None and _lock_fd >= 0:
+        try:
+            os.close(_lock_fd)
+        except OSError:
+            pass
+    _lock_fd = None
+
+
+__all__ = ["MANAGED_ENV", "DEFAULT_LOCK_PATH", "is_managed", "claim", "is_owner", "release"]
@@ -0,0 +1 @@
+# bench — latency/throughput benchmarks for the generation pipeline (python -m bench.run)
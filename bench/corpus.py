@@ -0,0 +1,81 @@
+# bench/corpus.py — representative Reel transcripts and reviews for benchmarks
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+# Two per category: one short hook-style Reel, one long rambling one
+TRANSCRIPTS: Dict[str, List[str]] = {
+    "travel": [
+        "Okay so I just got back from Goa and honestly the best thing I packed was this tiny thing. "
+        "Went through airport security, nobody even looked twice, it has a travel lock so it never turns on in the bag.",
+        "Packing hacks for a long weekend, let's go. Passport, charger, sunscreen, and my little secret. "
+        "I've done three flights this month and the travel lock means no buzzing in the overhead bin, ever. "
+        "It's quiet enough for a hostel with thin walls, charges with the same USB-C as my phone, and fits in my "
+        "makeup pouch. Honestly if you travel for work you need this, hotel nights are so much better now.",
+    ],
+    "feature_heavy": [
+        "Ten speed modes, app control, whisper quiet motor, body-safe silicone, IPX7 waterproof, 90 minute battery.",
+        "Let me break down the specs because people keep asking. It's medical grade silicone, fully waterproof so "
+        "yes the shower is an option, the app lets you make custom patterns and your partner can control it from "
+        "another city. Magnetic charging, two hours to full, and it lasts through like five sessions. The motor is "
+        "under forty decibels which is quieter than my fan. Two year warranty, discreet packaging, no branding on the box.",
+    ],
+    "sexual": [
+        "Real talk, self-pleasure is self-care and I'm done being shy about it. This changed my nights.",
+        "Nobody talks about how normal it is to explore your own body, so I will. I spent years thinking pleasure "
+        "was something that only happened with a partner. Then I tried this and learned what I actually like, "
+        "which made things with my partner so much better too. Foreplay matters, lube matters, communication matters. "
+        "If you're nervous, start slow, lowest setting, lots of lube, and give yourself permission to enjoy it.",
+    ],
+    "anal_play": [
+        "First time trying anal play? Start small, use a lot of lube, and go slow. Comfort first.",
+        "Okay a beginner's guide to anal play because my DMs are full of questions. Number one, relax, breathe, "
+        "and never rush. Number two, water-based lube and a lot of it. Number three, start with something small "
+        "with a flared base, that is non-negotiable for safety. Talk to your partner, stop if anything hurts, "
+        "and clean everything before and after. It can feel amazing when you're relaxed and in control.",
+    ],
+    "casual": [
+        "Sunday reset: face mask, jazz on, candles lit, phone on do not disturb. Main character energy.",
+        "So this is my little evening routine after a long week. Hot shower, skincare, comfy clothes, and I light "
+        "the vanilla candle my sister gave me. Then I put on some lo-fi, journal for ten minutes about what went "
+        "well, and I do something just for me. It sounds so simple but honestly it's the only hour of the week "
+        "that nobody needs anything from me and I come out of it feeling like a whole new person.",
+    ],
+}
+
+# Category -> product a user would pick for it
+PRODUCT_FOR: Dict[str, str] = {
+    "travel": "dive+",
+    "feature_heavy": "link+",
+    "sexual": "groove+",
+    "anal_play": "edge",
+    "casual": "oh! please gel",
+}
+
+
+def cases() -> List[Tuple[str, str, str]]:
+    """(category, product, transcript) for every corpus transcript."""
+    return [(cat, PRODUCT_FOR[cat], t) for cat, ts in TRANSCRIPTS.items() for t in ts]
+
+
+_REVIEW_BITS = [
+    "so quiet my roommate never noticed", "battery lasts forever", "travel lock is a lifesaver at airports",
+    "app control with my long distance partner is amazing", "silicone feels soft and premium",
+    "discreet packaging, nobody knew", "waterproof so the bath is an option", "the gel warms up nicely",
+    "took a while to find my favourite mode", "worth every rupee", "charging is quick with USB-C",
+    "the flared base made me feel safe trying something new", "perfect size for beginners",
+]
+
+
+def reviews(per_product: int = 60) -> List[Tuple[str, str]]:
+    """Deterministic synthetic (product, review) rows for building a ReviewIndex."""
+    out = []
+    products = sorted(set(PRODUCT_FOR.values())) + ["beat", "breeze", "pulse", "flick"]
+    for p_i, product in enumerate(products):
+        for i in range(per_product):
+            a = _REVIEW_BITS[(i + p_i) % len(_REVIEW_BITS)]
+            b = _REVIEW_BITS[(i * 7 + 3 * p_i) % len(_REVIEW_BITS)]
+            out.append((product, f"Review {i}: {a}, and {b}. Loving the {product}."))
+    return out
+
+
+__all__ = ["TRANSCRIPTS", "PRODUCT_FOR", "cases", "reviews"]
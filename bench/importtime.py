@@ -0,0 +1,146 @@
+# bench/importtime.py — import-time budget and cold-start report for app.py
+"""
+Parses `python -X importtime -c "import app"` to show what importing the app
+costs and which heavy modules (sklearn, faster-whisper, selenium, the
+generators...) it pulls in eagerly. With --cold-start it also launches gunicorn
+and times port bound, /healthz and /readyz from process start.
+
+    python -m bench.importtime                       # import report, 1 s budget
+    python -m bench.importtime --budget-ms 800 --top 25
+    python -m bench.importtime --cold-start --bind-budget-ms 1000
+
+Exits 1 when the import exceeds --budget-ms, a --forbid module is imported
+eagerly, or (with --cold-start) the port takes longer than --bind-budget-ms.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from bench.loadtest import REPO_ROOT, Server
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# Modules that must load on first use / in warm-up, never while importing app
+HEAVY = ("sklearn", "scipy", "numpy", "faster_whisper", "ctranslate2", "nltk", "selenium",
+         "undetected_chromedriver", "yt_dlp", "generate", "enhanced_script_generator", "evaluator",
+         "review_store", "originality_memory", "transcribe", "analysis")
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def parse(stderr: str) -> List[Dict]:
+    """-X importtime lines -> [{name, self_us, cumulative_us, depth}] in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append({"name": m.group(4), "self_us": int(m.group(1)), "cumulative_us": int(m.group(2)),
+                         "depth": (len(m.group(3)) - 1) // 2})
+    return rows
+
+
+def profile_import(module: str = "app", env: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """Import `module` in a fresh interpreter with a scratch database and no warm-up."""
+    with tempfile.TemporaryDirectory(prefix="mm-importtime-") as d:
+        run_env = dict(os.environ)
+        run_env.update({"SKIP_STARTUP": "1", "WARMUP": "off",
+                        "DATABASE_URL": f"sqlite:///{os.path.join(d, 'app.db')}"})
+        run_env.update(env or {})
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_ROOT,
+                              env=run_env, capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse(proc.stderr)
+
+
+def report(rows: List[Dict], module: str = "app", top: int = 15, forbid=HEAVY) -> Dict:
+    """Total import time of `module`, its heaviest imports, and eager heavy modules."""
+    total = next((r["cumulative_us"] for r in rows if r["name"] == module and r["depth"] == 0), 0)
+    # Direct imports of `module` sit one level deeper and precede its own line
+    end = next((i for i, r in enumerate(rows) if r["name"] == module and r["depth"] == 0), len(rows))
+    start = end
+    while start > 0 and rows[start - 1]["depth"] > 0:
+        start -= 1
+    direct = [r for r in rows[start:end] if r["depth"] == 1]
+    loaded = {r["name"] for r in rows}
+    eager = sorted({f for f in forbid for name in loaded if name == f or name.startswith(f + ".")})
+    return {
+        "module": module,
+        "total_ms": round(total / 1000, 1),
+        "self_ms": round(next((r["self_us"] for r in rows[end:end + 1]), 0) / 1000, 1),
+        "modules_loaded": len(loaded),
+        "heaviest": [{"name": r["name"], "cumulative_ms": round(r["cumulative_us"] / 1000, 1)}
+                     for r in sorted(direct, key=lambda r: -r["cumulative_us"])[:top]],
+        "eager_heavy": eager,
+    }
+
+
+def cold_start(workers: int = 1, threads: int = 4) -> Dict[str, float]:
+    """Launch gunicorn and time port bound, /healthz and /readyz from process start."""
+    server = Server(None, workers, threads)
+    try:
+        bound = server.wait_port()
+        health = server.wait_path("/healthz")
+        ready = server.wait_ready()
+        return {"port_bound_s": round(bound, 3), "healthz_s": round(health, 3), "readyz_s": round(ready, 3)}
+    finally:
+        server.stop()
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="Import-time budget and cold-start report")
+    ap.add_argument("--module", default="app")
+    ap.add_argument("--budget-ms", type=float, default=1000.0, help="fail if importing the module takes longer")
+    ap.add_argument("--top", type=int, default=15, help="heaviest direct imports to list")
+    ap.add_argument("--runs", type=int, default=3, help="import runs; the fastest is reported")
+    ap.add_argument("--forbid", default=",".join(HEAVY), help="comma-separated modules that must not load eagerly")
+    ap.add_argument("--cold-start", action="store_true", help="also time gunicorn port bind / healthz / readyz")
+    ap.add_argument("--bind-budget-ms", type=float, default=1000.0)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--out", default=None, help="results JSON (default bench/results/importtime-<timestamp>.json)")
+    args = ap.parse_args(argv)
+
+    forbid = tuple(f.strip() for f in args.forbid.split(",") if f.strip())
+    runs = [report(profile_import(args.module), args.module, args.top, forbid) for _ in range(max(1, args.runs))]
+    rep = min(runs, key=lambda r: r["total_ms"])
+    rep["runs_ms"] = [r["total_ms"] for r in runs]
+
+    print(f"📦 import {args.module}: {rep['total_ms']:.0f} ms (self {rep['self_ms']:.0f} ms, "
+          f"{rep['modules_loaded']} modules; runs {', '.join('%.0f' % t for t in rep['runs_ms'])} ms)")
+    for h in rep["heaviest"]:
+        print(f"   {h['cumulative_ms']:>8.1f} ms  {h['name']}")
+    failures = []
+    if rep["total_ms"] > args.budget_ms:
+        failures.append(f"import took {rep['total_ms']:.0f} ms > budget {args.budget_ms:.0f} ms")
+    if rep["eager_heavy"]:
+        failures.append(f"heavy modules imported eagerly: {', '.join(rep['eager_heavy'])}")
+
+    if args.cold_start:
+        cs = cold_start(args.workers)
+        rep["cold_start"] = cs
+        print(f"🚀 gunicorn: port bound {cs['port_bound_s'] * 1000:.0f} ms, /healthz {cs['healthz_s'] * 1000:.0f} ms, "
+              f"/readyz {cs['readyz_s'] * 1000:.0f} ms")
+        if cs["port_bound_s"] * 1000 > args.bind_budget_ms:
+            failures.append(f"port bound after {cs['port_bound_s'] * 1000:.0f} ms > budget {args.bind_budget_ms:.0f} ms")
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("importtime-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"config": vars(args), "report": rep, "failures": failures}, f, indent=2)
+    print(f"💾 Results written to {out}")
+
+    for msg in failures:
+        print(f"❌ {msg}")
+    if failures:
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
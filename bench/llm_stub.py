@@ -0,0 +1,140 @@
+# bench/llm_stub.py — local OpenAI-compatible stub (chat completions + Whisper) with tunable latency
+"""
+Stands in for OpenAI/Groq during benchmarks and load tests so numbers measure
+this app, not the provider. Latency model per request:
+
+    time-to-first-token (--latency-ms)  +  completion_tokens / --tokens-per-s
+
+Run standalone:  python -m bench.llm_stub --port 8089 --latency-ms 400 --tokens-per-s 80
+Point the app at it with OPENAI_ENDPOINT=http://127.0.0.1:8089/v1/chat/completions
+and OPENAI_API_KEY=anything (and TRANSCRIBE_BACKEND=openai for the Whisper route).
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+_SCRIPT = ("Okay so real talk, I almost didn't post this. {product} has been in my bag for a month and "
+           "it's quiet, discreet and the travel lock means zero surprises. Charging is quick, the silicone "
+           "feels premium, and honestly my nights are calmer now. Try it, thank me later.")
+
+
+def _completion_text(messages: List[Dict], variations: int = 10) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    product = "MyMuse"
+    for line in prompt.splitlines():
+        if line.lower().startswith("product:"):
+            product = line.split(":", 1)[1].strip() or product
+            break
+    if "Variation" in prompt:
+        return "\n".join(f"Variation {i}: " + _SCRIPT.format(product=product).replace("real talk", f"take {i}")
+                         for i in range(1, variations + 1))
+    return _SCRIPT.format(product=product)
+
+
+class StubLLM:
+    """ThreadingHTTPServer on 127.0.0.1 serving /v1/chat/completions and
+    /v1/audio/transcriptions. Use as a context manager; `.endpoint` is the
+    chat URL. `requests` counts calls, for asserting the stub was hit.
+    """
+
+    def __init__(self, latency_ms: float = 200.0, tokens_per_s: float = 200.0, port: int = 0,
+                 transcript: str = "Okay so this is a stub transcript from the benchmark Whisper endpoint."):
+        self.latency_s = max(0.0, latency_ms) / 1000.0
+        self.tokens_per_s = tokens_per_s
+        self.transcript = transcript
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload: Dict, status: int = 200) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._lock:
+                    stub.requests += 1
+                if self.path.endswith("/chat/completions"):
+                    try:
+                        req = json.loads(raw or b"{}")
+                    except ValueError:
+                        return self._reply({"error": {"message": "bad json"}}, 400)
+                    text = _completion_text(req.get("messages") or [])
+                    tokens = min(len(text) // 4, int(req.get("max_tokens") or 10 ** 6))
+                    stub._wait(tokens)
+                    return self._reply({
+                        "id": "chatcmpl-stub", "object": "chat.completion", "model": req.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": len(raw) // 4, "completion_tokens": tokens,
+                                  "total_tokens": len(raw) // 4 + tokens},
+                    })
+                if self.path.endswith("/audio/transcriptions"):
+                    stub._wait(len(stub.transcript) // 4)
+                    return self._reply({"text": stub.transcript})
+                self._reply({"error": {"message": "not found"}}, 404)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def _wait(self, tokens: int) -> None:
+        delay = self.latency_s + (tokens / self.tokens_per_s if self.tokens_per_s > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.base_url}/chat/completions"
+
+    def start(self) -> "StubLLM":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLM":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=200.0)
+    ap.add_argument("--tokens-per-s", type=float, default=200.0)
+    args = ap.parse_args()
+    stub = StubLLM(args.latency_ms, args.tokens_per_s, args.port)
+    print(f"LLM stub on {stub.endpoint} (ttft {args.latency_ms:.0f} ms, {args.tokens_per_s:.0f} tok/s)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+# bench/loadtest.py — replay request mixes against gunicorn with stubbed LLM/Whisper backends
+"""
+Drives the real server (gunicorn -c gunicorn.conf.py app:app) with closed-loop
+virtual users replaying a weighted request mix, stepping concurrency up a
+ramp, and reports per step: throughput, latency percentiles, errors and
+worker RSS. The step where adding users stops adding throughput is the box's
+saturation point.
+
+    python -m bench.loadtest                                   # default mix, ramp 1,2,4,8
+    python -m bench.loadtest --ramp 2,4,8,16,32 --step-seconds 30 --workers 3 --threads 8
+    python -m bench.loadtest --media-dir ~/reels --stub-latency-ms 900
+    python -m bench.loadtest --url http://127.0.0.1:10000 --server-pid 4242   # existing server
+    python -m bench.loadtest --record-mix bench/mixes/recorded.jsonl --database-url sqlite:///instance/app.db
+
+Mix files are JSONL, one request shape per line:
+    {"weight": 3, "route": "/generate", "product": "dive+", "category": "travel", "length": "long",
+     "flags": {"pg13_mode": "on"}}
+    {"weight": 1, "route": "/transcribe", "product": "dive+", "media": "short"}
+`transcript` may replace category/length; `media` is a file name or glob in
+--media-dir, or "short"/"long" for generated WAVs when no folder is given.
+--record-mix builds a mix from the products and transcripts saved in a
+records table, weighted by how often each was generated.
+"""
+from __future__ import annotations
+import argparse
+import fnmatch
+import json
+import math
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+from bench import corpus
+from bench.llm_stub import StubLLM
+from bench.report import summarize
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mixes", "default.jsonl")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+_CSRF_RE = re.compile(r'name="csrf_token" value="([^"]+)"')
+_UNLIMITED = "1000000 per minute"
+
+
+# --------------- Mix ---------------
+def load_mix(path: str) -> List[Dict[str, Any]]:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            e = json.loads(line)
+            if "route" not in e:
+                raise ValueError(f"{path}:{n}: mix entry needs a route")
+            e.setdefault("weight", 1)
+            entries.append(e)
+    if not entries:
+        raise ValueError(f"{path}: empty mix")
+    return entries
+
+
+def _transcript(entry: Dict[str, Any]) -> str:
+    if entry.get("transcript"):
+        return entry["transcript"]
+    texts = corpus.TRANSCRIPTS.get(entry.get("category") or "casual") or corpus.TRANSCRIPTS["casual"]
+    return texts[-1] if entry.get("length") == "long" else texts[0]
+
+
+def _write_wav(path: str, seconds: float, rate: int = 16000) -> None:
+    # Quiet 220 Hz tone: a valid upload without shipping binary fixtures
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        frames = bytearray()
+        for i in range(int(seconds * rate)):
+            frames += struct.pack("<h", int(3000 * math.sin(2 * math.pi * 220 * i / rate)))
+        w.writeframes(bytes(frames))
+
+
+class MediaLibrary:
+    """Resolves mix `media` entries to files in --media-dir, or to generated
+    short (3 s) / long (30 s) WAVs when no folder is given."""
+
+    def __init__(self, media_dir: Optional[str]):
+        self._tmp = None
+        if not media_dir:
+            self._tmp = tempfile.mkdtemp(prefix="mm-load-media-")
+            _write_wav(os.path.join(self._tmp, "short.wav"), 3)
+            _write_wav(os.path.join(self._tmp, "long.wav"), 30)
+            media_dir = self._tmp
+        self.dir = media_dir
+        self.files = sorted(f for f in os.listdir(media_dir) if os.path.isfile(os.path.join(media_dir, f)))
+
+    def pick(self, spec: str, rng: random.Random) -> str:
+        if spec in ("short", "long") and self._tmp:
+            spec = spec + ".wav"
+        matches = fnmatch.filter(self.files, spec) or ([spec] if spec in self.files else [])
+        if not matches:
+            raise FileNotFoundError(f"no media matching {spec!r} in {self.dir}")
+        return os.path.join(self.dir, rng.choice(matches))
+
+    def close(self) -> None:
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def record_mix(database_url: str, out_path: str, limit: int = 1000) -> int:
+    """Write a mix from the newest `limit` saved records: one /generate entry
+    per distinct (product, transcript), weighted by count."""
+    from sqlalchemy import create_engine, text as sql
+    import text_store
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        rows = conn.execute(sql("SELECT product_name, transcript_hash FROM records ORDER BY id DESC LIMIT :n"),
+                            {"n": limit}).all()
+        texts = text_store.load_many(conn, [h for _, h in rows])
+    counts: Dict[Tuple[str, str], int] = {}
+    for product, h in rows:
+        t = (texts.get(h) or "").strip()
+        if t:
+            counts[(product, t)] = counts.get((product, t), 0) + 1
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        for (product, t), n in sorted(counts.items(), key=lambda kv: -kv[1]):
+            f.write(json.dumps({"weight": n, "route": "/generate", "product": product, "transcript": t}) + "\n")
+    return len(counts)
+
+
+# --------------- Server ---------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """gunicorn with the production config, pointed at the stub (or local
+    generation when stub is None) and a scratch database/instance dir. Rate
+    limits are lifted (all load comes from one address) and worker recycling
+    is off so memory growth stays visible."""
+
+    def __init__(self, stub: Optional[StubLLM], workers: int, threads: int):
+        self.port = _free_port()
+        self.workers = workers
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._scratch = tempfile.mkdtemp(prefix="mm-load-")
+        env = dict(os.environ)
+        env.update({
+            "PORT": str(self.port),
+            "WEB_CONCURRENCY": str(workers),
+            "GUNICORN_THREADS": str(threads),
+            "GUNICORN_MAX_REQUESTS": "0",
+            "LOG_LEVEL": "warning",
+            "SKIP_STARTUP": "1",
+            "DATABASE_URL": f"sqlite:///{os.path.join(self._scratch, 'load.db')}",
+            "METRICS_DIR": os.path.join(self._scratch, "metrics"),
+            "TRACE_DIR": os.path.join(self._scratch, "traces"),
+            "GENERATE_RATE": _UNLIMITED,
+            "TRANSCRIBE_RATE": _UNLIMITED,
+            "GLOBAL_DAILY_LIMIT": _UNLIMITED,
+            "GLOBAL_HOURLY_LIMIT": _UNLIMITED,
+        })
+        if stub is not None:
+            env.update({
+                "GENERATOR": "openai",
+                "OPENAI_API_KEY": "loadtest-stub",
+                "OPENAI_ENDPOINT": stub.endpoint,
+                "OPENAI_WHISPER_ENDPOINT": f"{stub.base_url}/audio/transcriptions",
+                "TRANSCRIBE_BACKEND": "openai",
+            })
+        else:
+            env.update({"GENERATOR": "local", "OPENAI_API_KEY": ""})
+        env.pop("GROQ_API_KEY", None)
+        self._log = open(os.path.join(self._scratch, "gunicorn.log"), "w")
+        self.launched = time.perf_counter()
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+            cwd=REPO_ROOT, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+        self.pid = self.proc.pid
+
+    def _alive(self) -> None:
+        if self.proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {self.proc.returncode}; see {self._log.name}")
+
+    def wait_port(self, timeout: float = 60.0) -> float:
+        """Seconds from launch until the listening socket accepts connections."""
+        while time.perf_counter() - self.launched < timeout:
+            self._alive()
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return time.perf_counter() - self.launched
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"port {self.port} not bound after {timeout:.0f}s; see {self._log.name}")
+
+    def wait_path(self, path: str, timeout: float = 120.0) -> float:
+        """Seconds from launch until `path` answers 200."""
+        import requests
+        while time.perf_counter() - self.launched < timeout:
+            self._alive()
+            try:
+                if requests.get(self.url + path, timeout=2).status_code == 200:
+                    return time.perf_counter() - self.launched
+            except requests.RequestException:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"{path} not 200 after {timeout:.0f}s; see {self._log.name}")
+
+    def wait_ready(self, timeout: float = 120.0) -> float:
+        # Every worker warms up on its own and /readyz answers from whichever
+        # one accepts, so require several ready answers in a row
+        t = 0.0
+        for _ in range(2 * self.workers):
+            t = self.wait_path("/readyz", timeout)
+        return t
+
+    def stop(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=40)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        self._log.close()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+
+
+# --------------- Memory ---------------
+class MemorySampler(threading.Thread):
+    """Samples RSS of the server's worker processes every `interval` seconds."""
+
+    def __init__(self, server_pid: Optional[int], interval: float = 1.0):
+        super().__init__(name="mem-sampler", daemon=True)
+        self.server_pid, self.interval = server_pid, interval
+        self.samples: List[Dict[str, Any]] = []
+        self.step = 0
+        self._stop = threading.Event()
+        self._t0 = time.perf_counter()
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        if psutil is None or not self.server_pid:
+            return None
+        try:
+            workers = psutil.Process(self.server_pid).children()
+        except psutil.Error:
+            return None
+        rss: Dict[str, float] = {}
+        for p in workers:
+            try:
+                rss[str(p.pid)] = round(p.memory_info().rss / 2 ** 20, 1)
+            except psutil.Error:
+                continue
+        s = {"t": round(time.perf_counter() - self._t0, 2), "step": self.step, "rss_mb": rss,
+             "total_mb": round(sum(rss.values()), 1)}
+        self.samples.append(s)
+        return s
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.sample()
+
+    def growth(self) -> Dict[str, Dict[str, float]]:
+        """Per worker: first/last/peak RSS and growth over the run."""
+        seen: Dict[str, List[float]] = {}
+        for s in self.samples:
+            for pid, mb in s["rss_mb"].items():
+                seen.setdefault(pid, []).append(mb)
+        return {pid: {"first_mb": v[0], "last_mb": v[-1], "peak_mb": max(v), "growth_mb": round(v[-1] - v[0], 1)}
+                for pid, v in seen.items()}
+
+
+# --------------- Load ---------------
+class VirtualUser(threading.Thread):
+    """Closed loop: fetch a CSRF token once, then send mix requests back to
+    back until the step deadline."""
+
+    def __init__(self, uid: int, base_url: str, mix: List[Dict[str, Any]], media: MediaLibrary,
+                 deadline: float, results: List[Tuple], lock: threading.Lock, seed: int):
+        super().__init__(name=f"vu-{uid}", daemon=True)
+        self.base_url, self.mix, self.media, self.deadline = base_url, mix, media, deadline
+        self.results, self.lock = results, lock
+        self.rng = random.Random(seed * 1000 + uid)
+        self.weights = [e["weight"] for e in mix]
+
+    def _send(self, session, entry: Dict[str, Any], csrf: str):
+        route = entry["route"]
+        if entry.get("method", "POST").upper() == "GET":
+            return session.get(self.base_url + route, params=entry.get("params"), timeout=180)
+        data = {"csrf_token": csrf, **(entry.get("flags") or {})}
+        if route == "/generate_variations_text_only":
+            data["transcript_text_textonly"] = _transcript(entry)
+        elif route != "/transcribe":
+            data.update(product_name=entry.get("product", "dive+"), transcript_text=_transcript(entry))
+        else:
+            data["product_name"] = entry.get("product", "dive+")
+        if entry.get("media"):
+            path = self.media.pick(entry["media"], self.rng)
+            with open(path, "rb") as f:
+                return session.post(self.base_url + route, data=data, timeout=180,
+                                    files={"media": (os.path.basename(path), f, "application/octet-stream")})
+        return session.post(self.base_url + route, data=data, timeout=180)
+
+    def run(self) -> None:
+        import requests
+        session = requests.Session()
+        try:
+            m = _CSRF_RE.search(session.get(self.base_url + "/dashboard", timeout=30).text)
+            csrf = m.group(1) if m else ""
+        except requests.RequestException:
+            csrf = ""
+        while time.perf_counter() < self.deadline:
+            entry = self.rng.choices(self.mix, self.weights)[0]
+            t0 = time.perf_counter()
+            try:
+                status = self._send(session, entry, csrf).status_code
+            except Exception:
+                status = 0
+            with self.lock:
+                self.results.append((entry["route"], status, time.perf_counter() - t0))
+
+
+def run_step(base_url: str, mix, media, concurrency: int, seconds: float, seed: int) -> Dict[str, Any]:
+    results: List[Tuple] = []
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    users = [VirtualUser(i, base_url, mix, media, t0 + seconds, results, lock, seed) for i in range(concurrency)]
+    for u in users:
+        u.start()
+    for u in users:
+        u.join()
+    wall = time.perf_counter() - t0
+
+    ok = [lat for _, status, lat in results if 200 <= status < 400]
+    by_route: Dict[str, List[float]] = {}
+    for route, status, lat in results:
+        if 200 <= status < 400:
+            by_route.setdefault(route, []).append(lat)
+    errors: Dict[str, int] = {}
+    for _, status, _ in results:
+        if not 200 <= status < 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    return {"concurrency": concurrency, "requests": len(results), "errors": errors,
+            "latency": summarize(ok, wall), "routes": {r: summarize(v, wall) for r, v in sorted(by_route.items())}}
+
+
+def saturation(steps: List[Dict[str, Any]], gain: float = 0.10) -> Dict[str, Any]:
+    """Peak throughput, and the knee: the first step whose throughput grew by
+    less than `gain` over the previous one while latency rose."""
+    if not steps:
+        return {}
+    peak = max(steps, key=lambda s: s["latency"]["rps"])
+    knee = None
+    for prev, cur in zip(steps, steps[1:]):
+        if cur["latency"]["rps"] < prev["latency"]["rps"] * (1 + gain) and \
+                cur["latency"]["p95_ms"] > prev["latency"]["p95_ms"]:
+            knee = prev
+            break
+    return {"peak_rps": peak["latency"]["rps"], "peak_concurrency": peak["concurrency"],
+            "knee_concurrency": knee["concurrency"] if knee else None,
+            "knee_rps": knee["latency"]["rps"] if knee else None}
+
+
+def format_steps(steps: List[Dict[str, Any]]) -> str:
+    lines = [f"{'users':>6}{'reqs':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}"]
+    for s in steps:
+        lat = s["latency"]
+        lines.append(f"{s['concurrency']:>6}{s['requests']:>7}{sum(s['errors'].values()):>8}{lat['rps']:>9.2f}"
+                     f"{lat['p50_ms']:>10.0f}{lat['p95_ms']:>10.0f}{lat['p99_ms']:>10.0f}"
+                     f"{s.get('rss_total_mb') or 0:>9.0f}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="Replay request mixes against gunicorn")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="JSONL request mix")
+    ap.add_argument("--media-dir", default=None, help="sample uploads for /transcribe (default: generated WAVs)")
+    ap.add_argument("--ramp", default="1,2,4,8", help="comma-separated concurrency steps")
+    ap.add_argument("--step-seconds", type=float, default=20.0)
+    ap.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    ap.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    ap.add_argument("--stub-latency-ms", type=float, default=300.0)
+    ap.add_argument("--stub-tokens-per-s", type=float, default=200.0)
+    ap.add_argument("--mem-interval", type=float, default=1.0, help="seconds between RSS samples")
+    ap.add_argument("--url", default=None, help="target a running server instead of starting gunicorn")
+    ap.add_argument("--server-pid", type=int, default=None, help="gunicorn master pid for RSS sampling with --url")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default=None, help="results JSON (default bench/results/loadtest-<timestamp>.json)")
+    ap.add_argument("--record-mix", default=None, help="write a mix from a records table to this path and exit")
+    ap.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///app.db"))
+    args = ap.parse_args(argv)
+
+    if args.record_mix:
+        n = record_mix(args.database_url, args.record_mix)
+        print(f"💾 Wrote {n} request shapes to {args.record_mix}")
+        return 0
+
+    mix = load_mix(args.mix)
+    ramp = [int(c) for c in args.ramp.split(",") if c.strip()]
+    media = MediaLibrary(args.media_dir)
+    stub = server = None
+    try:
+        if args.url:
+            base_url, server_pid = args.url.rstrip("/"), args.server_pid
+        else:
+            stub = StubLLM(args.stub_latency_ms, args.stub_tokens_per_s).start()
+            server = Server(stub, args.workers, args.threads)
+            print(f"🚀 gunicorn on {server.url} ({args.workers} workers x {args.threads} threads)...", flush=True)
+            print(f"✅ Ready in {server.wait_ready():.1f}s")
+            base_url, server_pid = server.url, server.pid
+        if psutil is None:
+            print("⚠️  psutil not installed; worker memory will not be sampled")
+
+        sampler = MemorySampler(server_pid, args.mem_interval)
+        sampler.sample()
+        sampler.start()
+        steps = []
+        for i, c in enumerate(ramp):
+            sampler.step = c
+            print(f"⏱️  {c} users for {args.step_seconds:.0f}s...", flush=True)
+            step = run_step(base_url, mix, media, c, args.step_seconds, args.seed + i)
+            last = sampler.sample()
+            step["rss_total_mb"] = last["total_mb"] if last else None
+            steps.append(step)
+        sampler.stop()
+
+        sat = saturation(steps)
+        print()
+        print(format_steps(steps))
+        print(f"\n📈 Peak {sat['peak_rps']:.2f} req/s at {sat['peak_concurrency']} users", end="")
+        print(f"; throughput flattens after {sat['knee_concurrency']} users" if sat["knee_concurrency"] else
+              "; not saturated yet, extend --ramp")
+        growth = sampler.growth()
+        for pid, g in growth.items():
+            print(f"🧠 worker {pid}: {g['first_mb']:.0f} -> {g['last_mb']:.0f} MB (peak {g['peak_mb']:.0f}, "
+                  f"{g['growth_mb']:+.0f})")
+
+        out = args.out or os.path.join(RESULTS_DIR, time.strftime("loadtest-%Y%m%d-%H%M%S.json"))
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "record_mix"}, "steps": steps,
+                       "saturation": sat, "memory": {"workers": growth, "timeline": sampler.samples}},
+                      f, indent=2)
+        print(f"\n💾 Results written to {out}")
+        return 0
+    finally:
+        if server is not None:
+            server.stop()
+        if stub is not None:
+            stub.stop()
+        media.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
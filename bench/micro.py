@@ -0,0 +1,166 @@
+# bench/micro.py — microbenchmarks + regression gate for the text post-processing transforms
+"""
+pytest-benchmark-style timing of the per-script/per-variation text transforms
+in generate.py, on a short (one Reel line) and a long (a 10-variation block)
+input each. Rounds are calibrated so each lasts at least 2 ms, and stats
+(min/max/mean/stddev/median/iqr/ops, in microseconds per call) follow
+pytest-benchmark's naming.
+
+    python -m bench.micro                       # run and print
+    python -m bench.micro --save                # (re)write the stored baseline
+    python -m bench.micro --compare             # exit 1 if any transform regressed > --fail-over %
+    python -m bench.micro --only fix_grammar --compare --fail-over 25
+
+The gate compares min_us by default (the least noisy statistic on a shared
+box; --metric median_us is stricter). The baseline lives in
+bench/baseline_micro.json and is machine-specific: re-save it on the machine
+that runs the gate after an intentional change.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from bench import corpus
+from bench.report import compare, format_compare, load_results, write_json
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_micro.json")
+
+_SHORT = ("POV: not me bringing my Mini Jadugar wand on the trip, fr fr no cap it is bestie approved and "
+          "you are gonna love it , trust")
+
+
+def _long_text() -> str:
+    # Shaped like a real variations block: step headings, slang, placeholders, formal words, long lines
+    base = [t for ts in corpus.TRANSCRIPTS.values() for t in ts]
+    lines = []
+    for i in range(10):
+        lines.append(f"Step {i + 1} — " + base[i % len(base)])
+        lines.append(f"Real talk: the Mini Jadugar wand is bussin, we are going to utilize it, it is literally obsessed "
+                     f"level, do not sleep on it bestie, periodt. Take {i}.")
+    return "\n".join(lines)
+
+
+_LONG = _long_text()
+_TRANSCRIPT = "I took my Mini Jadugar on the trip, the 'travel gadget' everyone asks about, and this toy slaps."
+
+
+def _cases() -> Dict[str, Callable[[str], object]]:
+    import generate as gen
+    return {
+        "swap_non_mymuse_mentions": lambda s: gen._swap_non_mymuse_mentions(s, _TRANSCRIPT, "dive+"),
+        "apply_shape_corrections": lambda s: gen._apply_shape_corrections(s, "dive+"),
+        "apply_ugc_rules": gen._apply_ugc_rules,
+        "fix_grammar": gen._fix_grammar,
+        "limit_genz_slang": gen._limit_genz_slang,
+        "degenzify_text": gen._degenzify_text,
+        "enforce_monologue_flow": gen._enforce_monologue_flow,
+    }
+
+
+def bench(fn: Callable[[], object], min_time: float = 0.002, max_time: float = 0.5,
+          min_rounds: int = 5) -> Dict[str, float]:
+    """Time fn() pytest-benchmark style: calibrate iterations so one round takes
+    >= min_time, then run rounds until max_time (at least min_rounds). GC is
+    paused while timing so collection pauses don't land on one transform.
+    """
+    fn()  # warm-up: lru caches, regex cache
+    iterations = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - t0 >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    per_call: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        while len(per_call) < min_rounds or time.perf_counter() - start < max_time:
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            per_call.append((time.perf_counter() - t0) / iterations)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    us = lambda v: round(v * 1e6, 3)
+    q = statistics.quantiles(per_call, n=4) if len(per_call) > 1 else [per_call[0]] * 3
+    median = statistics.median(per_call)
+    return {
+        "min_us": us(min(per_call)),
+        "max_us": us(max(per_call)),
+        "mean_us": us(statistics.fmean(per_call)),
+        "stddev_us": us(statistics.stdev(per_call)) if len(per_call) > 1 else 0.0,
+        "median_us": us(median),
+        "iqr_us": us(q[2] - q[0]),
+        "ops": round(1.0 / median, 1) if median else 0.0,
+        "rounds": len(per_call),
+        "iterations": iterations,
+    }
+
+
+def run(only: List[str] = (), max_time: float = 0.5) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    inputs: List[Tuple[str, str]] = [("short", _SHORT), ("long", _LONG)]
+    for name, fn in _cases().items():
+        if only and not any(o in name for o in only):
+            continue
+        for size, text in inputs:
+            results[f"{name}[{size}]"] = bench(lambda: fn(text), max_time=max_time)
+    return results
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    lines = [f"{'transform':<36}{'min us':>11}{'median us':>12}{'mean us':>11}{'stddev':>10}{'ops':>12}{'rounds':>8}"]
+    for name, r in results.items():
+        lines.append(f"{name:<36}{r['min_us']:>11.2f}{r['median_us']:>12.2f}{r['mean_us']:>11.2f}"
+                     f"{r['stddev_us']:>10.2f}{r['ops']:>12.1f}{r['rounds']:>8}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="Text post-processing microbenchmarks")
+    ap.add_argument("--only", action="append", default=[], help="run transforms whose name contains this (repeatable)")
+    ap.add_argument("--max-time", type=float, default=0.5, help="seconds of rounds per benchmark")
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON path")
+    ap.add_argument("--save", action="store_true", help="write these results as the baseline")
+    ap.add_argument("--compare", action="store_true", help="compare against the baseline")
+    ap.add_argument("--metric", default="min_us", choices=["min_us", "median_us", "mean_us"],
+                    help="statistic --compare gates on")
+    ap.add_argument("--fail-over", type=float, default=20.0, help="regression %% that fails --compare")
+    args = ap.parse_args(argv)
+
+    results = run(args.only, args.max_time)
+    print(format_results(results))
+
+    if args.save:
+        if args.only and os.path.exists(args.baseline):
+            # Partial run: refresh just these entries
+            results = {**load_results(args.baseline), **results}
+        write_json(args.baseline, results, {"max_time": args.max_time})
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; run with --save first")
+            return 2
+        rows = compare(results, load_results(args.baseline), args.fail_over, metric=args.metric)
+        print(f"\n📊 {args.metric} vs baseline (fail over {args.fail_over:.0f}%)")
+        print(format_compare(rows, metric=args.metric))
+        if any(r["regressed"] for r in rows):
+            print("❌ Regression detected")
+            return 1
+        print("✅ No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
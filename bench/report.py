@@ -0,0 +1,100 @@
+# bench/report.py — percentile summaries, JSON results and baseline comparison
+from __future__ import annotations
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (no interpolation, so p99 of 10 samples is the max)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples_s: Sequence[float], wall_s: Optional[float] = None) -> Dict[str, float]:
+    """Latency samples (seconds) -> {n, p50_ms, p95_ms, p99_ms, mean_ms, max_ms, rps}.
+
+    rps uses the wall clock of the run when given (concurrent runs), otherwise
+    the summed sample time (sequential runs).
+    """
+    n = len(samples_s)
+    total = wall_s if wall_s is not None else sum(samples_s)
+    ms = lambda v: round(v * 1000.0, 3)
+    return {
+        "n": n,
+        "p50_ms": ms(percentile(samples_s, 50)),
+        "p95_ms": ms(percentile(samples_s, 95)),
+        "p99_ms": ms(percentile(samples_s, 99)),
+        "mean_ms": ms(sum(samples_s) / n) if n else 0.0,
+        "max_ms": ms(max(samples_s)) if n else 0.0,
+        "rps": round(n / total, 3) if total > 0 else 0.0,
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": str(os.cpu_count() or 0),
+        "git": _git_rev(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_json(path: str, results: Dict[str, Dict], config: Dict) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"env": environment(), "config": config, "results": results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold_pct: float = 10.0,
+            metric: str = "p95_ms") -> List[Dict]:
+    """Rows for benchmarks present in both runs; `regressed` when `metric` grew
+    by more than threshold_pct. Benchmarks missing from either side are skipped.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        old, new = baseline[name].get(metric, 0.0), current[name].get(metric, 0.0)
+        delta = ((new - old) / old * 100.0) if old else 0.0
+        rows.append({"name": name, "baseline": old, "current": new, "delta_pct": round(delta, 1),
+                     "regressed": delta > threshold_pct})
+    return rows
+
+
+def format_table(results: Dict[str, Dict]) -> str:
+    lines = [f"{'benchmark':<44}{'n':>5}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'req/s':>9}"]
+    for name, r in results.items():
+        lines.append(f"{name:<44}{r['n']:>5}{r['p50_ms']:>11.2f}{r['p95_ms']:>11.2f}{r['p99_ms']:>11.2f}{r['rps']:>9.2f}")
+    return "\n".join(lines)
+
+
+def format_compare(rows: List[Dict], metric: str = "p95_ms") -> str:
+    lines = [f"{'benchmark':<44}{'base ' + metric:>14}{'now':>11}{'delta':>9}"]
+    for r in rows:
+        flag = "  ❌" if r["regressed"] else ""
+        lines.append(f"{r['name']:<44}{r['baseline']:>14.2f}{r['current']:>11.2f}{r['delta_pct']:>8.1f}%{flag}")
+    return "\n".join(lines)
+
+
+__all__ = ["percentile", "summarize", "write_json", "load_results", "compare", "format_table", "format_compare"]
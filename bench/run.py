@@ -0,0 +1,226 @@
+# bench/run.py — end-to-end latency/throughput benchmarks against a stub LLM
+"""
+Times the generation pipeline on the bench corpus with the LLM replaced by a
+local OpenAI-compatible stub, so results track this codebase rather than
+provider weather.
+
+    python -m bench.run                                  # everything, 3 iterations
+    python -m bench.run --only fn.generate --iterations 20
+    python -m bench.run --stub-latency-ms 800 --stub-tokens-per-s 60
+    python -m bench.run --local                          # no stub, GENERATOR=local
+    python -m bench.run --compare bench/results/baseline.json --fail-over 15
+
+Each benchmark runs every corpus transcript once per iteration (after one
+untimed warm-up pass) and reports p50/p95/p99 and requests/s. Results are
+written as JSON; --compare diffs p95 against an earlier file and exits 1 when
+any benchmark regressed by more than --fail-over percent.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import csv
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from bench import corpus
+from bench.llm_stub import StubLLM
+from bench.report import compare, format_compare, format_table, load_results, summarize, write_json
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _prepare_env(stub: StubLLM = None) -> str:
+    """Point generate.py at the stub (or local mode) before anything imports it."""
+    if stub is not None:
+        os.environ["GENERATOR"] = "openai"
+        os.environ["OPENAI_API_KEY"] = "bench-stub"
+        os.environ["OPENAI_ENDPOINT"] = stub.endpoint
+    else:
+        os.environ["GENERATOR"] = "local"
+        os.environ.pop("OPENAI_API_KEY", None)
+    os.environ.pop("GROQ_API_KEY", None)
+    os.environ["SKIP_STARTUP"] = "1"
+    os.environ["WARMUP"] = "sync"  # warm before timing; the bench builds its own review index after
+    os.environ.setdefault("PROFILE_TOKEN", "")
+    db_dir = tempfile.mkdtemp(prefix="mm-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    return db_dir
+
+
+def _build_reviews() -> None:
+    from review_store import ReviewIndex
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["product_name", "text"])
+    w.writerows(corpus.reviews())
+    ReviewIndex.import_csv(buf.getvalue().encode())
+    ReviewIndex.build()
+
+
+def _benchmarks() -> Dict[str, Callable[[str, str, str], object]]:
+    """name -> fn(category, product, transcript). Imports happen here, after _prepare_env."""
+    import app as app_module
+    import evaluator
+    import generate as gen
+    from analysis import analyze_agent
+    from review_store import ReviewIndex
+    from transcript_context import TranscriptContext
+
+    flask_app = app_module.app
+    flask_app.config["WTF_CSRF_ENABLED"] = False
+    flask_app.config["TESTING"] = True
+    if hasattr(app_module.limiter, "enabled"):
+        app_module.limiter.enabled = False
+    client = flask_app.test_client()
+    ugc = evaluator.UGCScriptEvaluator()
+    scripts: Dict[str, str] = {}
+
+    def _script(product: str, transcript: str) -> str:
+        # One generated script per transcript to feed the evaluators
+        key = product + transcript
+        if key not in scripts:
+            scripts[key] = gen._local_script(product, transcript, [])
+        return scripts[key]
+
+    def fn_generate(cat, product, transcript):
+        ctx = TranscriptContext(transcript)
+        a = ctx.analysis
+        reviews = ReviewIndex.search(product, transcript, k=6)
+        return gen.generate(product, transcript, a.get("sentiment", {}), a.get("keywords", []),
+                            {"tags": a.get("themes", [])}, rel_reviews=reviews, ctx=ctx)
+
+    def fn_generate_variations(cat, product, transcript):
+        ctx = TranscriptContext(transcript)
+        reviews = ReviewIndex.search(product, transcript, k=8)
+        return gen.generate_variations(product, transcript, ctx.analysis, rel_reviews=reviews, ctx=ctx)
+
+    def fn_text_only(cat, product, transcript):
+        return gen.generate_variations_text_only(transcript, analyze_agent(transcript), count=10)
+
+    def fn_review_search(cat, product, transcript):
+        return ReviewIndex.search(product, transcript, k=8)
+
+    def fn_eval_ugc(cat, product, transcript):
+        return ugc.evaluate_script(transcript, product, _script(product, transcript), case_type=cat)
+
+    def fn_eval_variation(cat, product, transcript):
+        return evaluator.evaluate_variation(transcript, _script(product, transcript))
+
+    def fn_eval_new(cat, product, transcript):
+        return gen.evaluate_script_new(_script(product, transcript), transcript, product)
+
+    def _post(path, data):
+        def run(cat, product, transcript):
+            # CSRF is disabled for the bench; the field just keeps before_request quiet
+            resp = client.post(path, data={"csrf_token": "bench", **data(product, transcript)})
+            if resp.status_code >= 400:
+                raise RuntimeError(f"{path} -> HTTP {resp.status_code}")
+            return resp
+        return run
+
+    def route_history(cat, product, transcript):
+        resp = client.get("/api/history", query_string={"product": product, "limit": 20})
+        if resp.status_code >= 400:
+            raise RuntimeError(f"/api/history -> HTTP {resp.status_code}")
+        return resp
+
+    return {
+        "fn.generate": fn_generate,
+        "fn.generate_variations": fn_generate_variations,
+        "fn.generate_variations_text_only": fn_text_only,
+        "fn.review_index.search": fn_review_search,
+        "fn.evaluator.evaluate_script": fn_eval_ugc,
+        "fn.evaluator.evaluate_variation": fn_eval_variation,
+        "fn.evaluate_script_new": fn_eval_new,
+        "route.generate": _post("/generate", lambda p, t: {"product_name": p, "transcript_text": t}),
+        "route.generate_variations": _post("/generate_variations",
+                                           lambda p, t: {"product_name": p, "transcript_text": t}),
+        "route.generate_variations_text_only": _post("/generate_variations_text_only",
+                                                     lambda p, t: {"transcript_text_textonly": t}),
+        "route.api_history": route_history,
+    }
+
+
+def run_benchmark(fn: Callable, cases: List[Tuple[str, str, str]], iterations: int) -> Dict[str, float]:
+    sink = open(os.devnull, "w")
+    try:
+        with contextlib.redirect_stdout(sink):
+            for case in cases:  # warm-up: caches, lazy imports, first-request setup
+                fn(*case)
+            samples: List[float] = []
+            wall0 = time.perf_counter()
+            for _ in range(iterations):
+                for case in cases:
+                    t0 = time.perf_counter()
+                    fn(*case)
+                    samples.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - wall0
+    finally:
+        sink.close()
+    return summarize(samples, wall)
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description="End-to-end latency/throughput benchmarks")
+    ap.add_argument("--iterations", type=int, default=3, help="timed passes over the corpus per benchmark")
+    ap.add_argument("--only", action="append", default=[], help="run benchmarks whose name contains this (repeatable)")
+    ap.add_argument("--category", action="append", default=[], choices=sorted(corpus.TRANSCRIPTS),
+                    help="restrict the corpus to these categories (repeatable)")
+    ap.add_argument("--stub-latency-ms", type=float, default=150.0, help="stub time-to-first-token")
+    ap.add_argument("--stub-tokens-per-s", type=float, default=400.0, help="stub completion token rate")
+    ap.add_argument("--local", action="store_true", help="skip the stub and use GENERATOR=local")
+    ap.add_argument("--out", default=None, help="results JSON (default bench/results/bench-<timestamp>.json)")
+    ap.add_argument("--compare", default=None, help="baseline results JSON to compare p95 against")
+    ap.add_argument("--fail-over", type=float, default=10.0, help="p95 regression %% that fails --compare")
+    args = ap.parse_args(argv)
+
+    stub = None if args.local else StubLLM(args.stub_latency_ms, args.stub_tokens_per_s).start()
+    _prepare_env(stub)
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            benches = _benchmarks()
+            _build_reviews()
+        logging.getLogger("mymuse").setLevel(logging.WARNING)
+
+        cases = [c for c in corpus.cases() if not args.category or c[0] in args.category]
+        selected = {n: f for n, f in benches.items() if not args.only or any(o in n for o in args.only)}
+        if not selected:
+            print(f"❌ No benchmark matches {args.only}; have: {', '.join(benches)}")
+            return 2
+
+        results: Dict[str, Dict] = {}
+        for name, fn in selected.items():
+            print(f"⏱️  {name} ({len(cases)} transcripts x {args.iterations})...", flush=True)
+            results[name] = run_benchmark(fn, cases, args.iterations)
+
+        print()
+        print(format_table(results))
+        config = {"iterations": args.iterations, "cases": len(cases), "categories": args.category or "all",
+                  "generator": "local" if stub is None else "stub",
+                  "stub_latency_ms": None if stub is None else args.stub_latency_ms,
+                  "stub_tokens_per_s": None if stub is None else args.stub_tokens_per_s,
+                  "stub_requests": None if stub is None else stub.requests}
+        out = args.out or os.path.join(RESULTS_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+        print(f"\n💾 Results written to {write_json(out, results, config)}")
+
+        if args.compare:
+            rows = compare(results, load_results(args.compare), args.fail_over)
+            print(f"\n📊 p95 vs {args.compare} (fail over {args.fail_over:.0f}%)")
+            print(format_compare(rows))
+            if any(r["regressed"] for r in rows):
+                print("❌ Regression detected")
+                return 1
+            print("✅ No regression")
+        return 0
+    finally:
+        if stub is not None:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
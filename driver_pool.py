@@ -0,0 +1,249 @@
+# driver_pool.py — bounded pool of warm headless Chrome drivers shared by the scrapers
+from __future__ import annotations
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import page_waits
+
+logger = logging.getLogger("mymuse")
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))              # browsers per pool
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "25"))             # recycle after N leases (Chrome leaks)
+DRIVER_IDLE_TTL = int(os.getenv("DRIVER_IDLE_TTL", "900"))              # quit browsers idle this long
+DRIVER_ACQUIRE_TIMEOUT = int(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "120"))
+
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+
+class _Slot:
+    __slots__ = ("driver", "base_handle", "pages", "last_used")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.base_handle = driver.current_window_handle
+        self.pages = 0
+        self.last_used = time.monotonic()
+
+
+class DriverPool:
+    """
+    At most `max_size` browsers, started lazily and reused across scrapes.
+      with get_pool().lease() as driver:
+          driver.get(url)
+    Each lease runs in a fresh tab that is closed (with cookies cleared) on
+    return, so pages don't see each other's state; in fast mode the tab also
+    blocks images, fonts, media and trackers (see page_waits). A driver that
+    fails its health check or raises a WebDriver error is discarded; one that
+    has served `max_pages` leases is quit and replaced on the next lease.
+    Browsers idle longer than `idle_ttl` are quit by a timer (armed only
+    while something is idle), so they don't stay resident between scrapes.
+    """
+
+    def __init__(self, factory: Callable[[], object], max_size: int = DRIVER_POOL_SIZE,
+                 max_pages: int = DRIVER_MAX_PAGES, idle_ttl: float = DRIVER_IDLE_TTL,
+                 name: str = "chrome"):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.max_pages = max(1, max_pages)
+        self.idle_ttl = idle_ttl
+        self.name = name
+        self._idle: List[_Slot] = []
+        self._sem = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Timer] = None
+        self.created = 0
+        self.recycled = 0
+
+    # --------------- Leasing ---------------
+    @contextmanager
+    def lease(self, timeout: float = DRIVER_ACQUIRE_TIMEOUT) -> Iterator[object]:
+        if not self._sem.acquire(timeout=timeout):
+            raise TimeoutError(f"No {self.name} driver free after {timeout}s")
+        slot: Optional[_Slot] = None
+        try:
+            slot = self._checkout()
+            driver = slot.driver
+            driver.switch_to.new_window("tab")
+            page_waits.prepare_tab(driver)  # fast mode: block heavy resources in this tab
+            slot.pages += 1
+            yield driver
+        except BaseException as e:
+            if slot is not None and _is_driver_error(e):
+                self._discard(slot, f"error: {type(e).__name__}")
+                slot = None
+            raise
+        finally:
+            if slot is not None:
+                self._checkin(slot)
+            self._sem.release()
+
+    def _checkout(self) -> _Slot:
+        while True:
+            with self._lock:
+                slot = self._idle.pop() if self._idle else None
+            if slot is None:
+                break
+            if slot.pages >= self.max_pages:
+                self._discard(slot, f"served {slot.pages} pages")
+            elif time.monotonic() - slot.last_used > self.idle_ttl:
+                self._discard(slot, "idle")
+            elif not self._healthy(slot):
+                self._discard(slot, "failed health check")
+            else:
+                return slot
+        slot = _Slot(self.factory())
+        self.created += 1
+        logger.info("DriverPool[%s] started browser #%d", self.name, self.created)
+        return slot
+
+    def _checkin(self, slot: _Slot) -> None:
+        try:
+            driver = slot.driver
+            driver.delete_all_cookies()
+            for handle in list(driver.window_handles):
+                if handle != slot.base_handle:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(slot.base_handle)
+        except Exception as e:
+            self._discard(slot, f"cleanup failed: {e}")
+            return
+        slot.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(slot)
+        self.reap_idle()
+        self._schedule_reap()
+
+    @staticmethod
+    def _healthy(slot: _Slot) -> bool:
+        try:
+            return slot.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, slot: _Slot, reason: str) -> None:
+        self.recycled += 1
+        logger.info("DriverPool[%s] recycling browser (%s)", self.name, reason)
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+
+    # --------------- Housekeeping ---------------
+    def reap_idle(self) -> int:
+        """Quit browsers idle longer than idle_ttl; returns how many."""
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            stale = [s for s in self._idle if s.last_used < cutoff]
+            self._idle = [s for s in self._idle if s.last_used >= cutoff]
+        for s in stale:
+            self._discard(s, "idle")
+        return len(stale)
+
+    def _schedule_reap(self) -> None:
+        """Arm the reaper for the next idle expiry (one timer per pool)."""
+        with self._lock:
+            if self._reaper is not None or not self._idle:
+                return
+            due = min(s.last_used for s in self._idle) + self.idle_ttl
+            self._reaper = threading.Timer(max(0.0, due - time.monotonic()) + 0.01, self._reap_tick)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def _reap_tick(self) -> None:
+        with self._lock:
+            self._reaper = None
+        self.reap_idle()
+        self._schedule_reap()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+            reaper, self._reaper = self._reaper, None
+        if reaper is not None:
+            reaper.cancel()
+        for s in idle:
+            try:
+                s.driver.quit()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        return {"name": self.name, "idle": len(self._idle), "max_size": self.max_size,
+                "created": self.created, "recycled": self.recycled}
+
+
+def _is_driver_error(e: BaseException) -> bool:
+    try:
+        from selenium.common.exceptions import WebDriverException, TimeoutException
+    except ImportError:
+        return False
+    # A page timeout leaves the browser usable; anything else WebDriver-level may not
+    return isinstance(e, WebDriverException) and not isinstance(e, TimeoutException)
+
+
+# --------------- Factories ---------------
+def chrome_options(options=None):
+    """Headless Chrome flags shared by every pooled browser."""
+    if options is None:
+        from selenium.webdriver.chrome.options import Options
+        options = Options()
+    for arg in ("--headless=new", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu",
+                "--window-size=1920,1080", "--disable-blink-features=AutomationControlled",
+                f"--user-agent={UA}"):
+        options.add_argument(arg)
+    prefs = page_waits.chrome_prefs()
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    return options
+
+
+def _chrome_factory():
+    from selenium import webdriver
+    driver = webdriver.Chrome(options=chrome_options())
+    driver.set_page_load_timeout(30)
+    return driver
+
+
+def _uc_factory():
+    import undetected_chromedriver as uc
+    v_env = os.environ.get("UC_VERSION_MAIN")
+    v_main = int(v_env) if v_env and v_env.isdigit() else None
+    opts = chrome_options(uc.ChromeOptions())
+    driver = uc.Chrome(options=opts, version_main=v_main) if v_main else uc.Chrome(options=opts)
+    driver.set_page_load_timeout(45)
+    return driver
+
+
+_FACTORIES: Dict[str, Callable[[], object]] = {"chrome": _chrome_factory, "uc": _uc_factory}
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(kind: str = "chrome") -> DriverPool:
+    """Process-wide pool per driver kind: "chrome" (selenium) or "uc" (undetected-chromedriver)."""
+    pool = _pools.get(kind)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(kind)
+            if pool is None:
+                pool = _pools[kind] = DriverPool(_FACTORIES[kind], name=kind)
+    return pool
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+    for p in pools:
+        p.close()
+
+
+__all__ = ["DriverPool", "get_pool", "shutdown_pools", "chrome_options",
+           "DRIVER_POOL_SIZE", "DRIVER_MAX_PAGES"]
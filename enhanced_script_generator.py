@@ -95,11 +95,11 @@ class EnhancedScriptGenerator:
             "Ready to experience the difference?"
         ]
     
-    def generate_human_script(self, product_name: str, transcript: str, gen_z: bool = False) -> str:
+    def generate_human_script(self, product_name: str, transcript: str, gen_z: bool = False, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate a human-like script using TRULY DYNAMIC transcript analysis"""
         
-        # Analyze transcript for context using the new dynamic system
-        context = self._analyze_transcript(transcript)
+        # Analyze transcript for context using the new dynamic system (reuse the caller's if given)
+        context = context or self._analyze_transcript(transcript)
         
         # Use the new dynamic script generation system
         script = self._generate_dynamic_script(product_name, transcript, gen_z, context)
@@ -1298,11 +1298,11 @@ Your adventure awaits."""
         
         return "\n".join(lines)
     
-    def generate_variations(self, product_name: str, transcript: str, count: int = 10, gen_z: bool = False) -> List[Dict[str, Any]]:
+    def generate_variations(self, product_name: str, transcript: str, count: int = 10, gen_z: bool = False, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Generate multiple unique variations using training data"""
         
-        # Analyze transcript ONCE at the beginning
-        context = self._analyze_transcript(transcript)
+        # Analyze transcript ONCE at the beginning (or reuse the caller's analysis)
+        context = context or self._analyze_transcript(transcript)
         variations = []
         
         # Reset used themes for fresh variations
@@ -5,13 +5,27 @@ Implements the scoring rubric and human-like evaluation system
 """
 
 import json
+import math
 import re
+from collections import Counter
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+import metrics
+
+try:
+    from originality_memory import OriginalityMemory
+except Exception:  # memory is optional; scores stay None without it
+    OriginalityMemory = None
+
+# Caps against previously shipped scripts (originality memory)
+MEMORY_MAX_COSINE = 0.80
+MEMORY_MAX_FOURGRAM = 0.50
+
 @dataclass
 class EvaluationResult:
     """Structured result from script evaluation"""
@@ -31,11 +45,18 @@ class UGCScriptEvaluator:
     """
     
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            ngram_range=(1, 4),
-            max_features=1000,
-            stop_words='english'
-        )
+        # Only the vectorizer settings live on the instance; every similarity
+        # pass fits its own TfidfVectorizer so concurrent requests sharing one
+        # evaluator never see each other's vocabulary.
+        self.vectorizer_params = {
+            "ngram_range": (1, 4),
+            "max_features": 1000,
+            "stop_words": 'english'
+        }
+
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        """Build a fresh, request-local TF-IDF vectorizer"""
+        return TfidfVectorizer(**self.vectorizer_params)
         
     def evaluate_script(self, 
                        transcript: str,
@@ -126,6 +147,33 @@ class UGCScriptEvaluator:
             suggested_rewrite=suggested_rewrite
         )
     
+    def evaluate_many(self,
+                      transcript: str,
+                      product_name: str,
+                      generated_scripts: List[str],
+                      channel: str = "Reels/TikTok",
+                      case_type: str = "casual",
+                      true_features: List[str] = None,
+                      brand_rules: List[str] = None) -> List[EvaluationResult]:
+        """
+        Evaluate several candidate scripts against the same transcript.
+        Similarity is computed for the whole batch in one vectorizer pass.
+        """
+        similarity_batch = self._calculate_similarity_scores_many(transcript, generated_scripts)
+        return [
+            self.evaluate_script(
+                transcript=transcript,
+                product_name=product_name,
+                generated_script=script,
+                channel=channel,
+                case_type=case_type,
+                true_features=true_features,
+                brand_rules=brand_rules,
+                similarity_scores=similarity_scores
+            )
+            for script, similarity_scores in zip(generated_scripts, similarity_batch)
+        ]
+    
     def _score_human_talk(self, script: str) -> int:
         """Score human-like speech patterns (35 pts)"""
         score = 0
@@ -313,34 +361,67 @@ class UGCScriptEvaluator:
     
     def _calculate_similarity_scores(self, transcript: str, script: str) -> Dict[str, Any]:
         """Calculate similarity scores for originality check"""
+        return self._calculate_similarity_scores_many(transcript, [script])[0]
+    
+    def _calculate_similarity_scores_many(self, transcript: str, scripts: List[str]) -> List[Dict[str, Any]]:
+        """Calculate similarity scores for a batch of scripts against one transcript.
+        
+        Each script is scored against a vocabulary fitted on the
+        (transcript, script) pair, exactly as a single evaluation does, so
+        script-only terms count in its norm and batch-mates never move its
+        score. Texts are analyzed (stop words, 1-4 grams) once per batch and
+        each pair only refits on the ready-made term lists.
+        """
+        if not scripts:
+            return []
         try:
-            # Prepare texts for vectorization
-            texts = [transcript, script]
-            tfidf_matrix = self.vectorizer.fit_transform(texts)
+            analyzer = self._new_vectorizer().build_analyzer()
+            transcript_terms = analyzer(transcript)
             
-            # Calculate cosine similarity
-            cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+            # Calculate cosine similarity per (transcript, script) pair
+            cosine_sims = []
+            for script in scripts:
+                pair = TfidfVectorizer(analyzer=_identity,
+                                       max_features=self.vectorizer_params.get("max_features"))
+                try:
+                    tfidf_matrix = pair.fit_transform([transcript_terms, analyzer(script)])
+                except ValueError:
+                    # Both texts are stop words only: no score, as before
+                    cosine_sims.append(None)
+                    continue
+                cosine_sims.append(cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0])
             
             # Calculate n-gram overlap (simplified)
             transcript_ngrams = set(self._get_ngrams(transcript, 4))
-            script_ngrams = set(self._get_ngrams(script, 4))
             
-            if transcript_ngrams:
-                fourgram_overlap = len(transcript_ngrams.intersection(script_ngrams)) / len(transcript_ngrams)
-            else:
-                fourgram_overlap = 0.0
+            # Compare against previously shipped scripts
+            memory_scores = self._memory_similarity_many(scripts)
             
-            # Check caps
-            caps_ok = cosine_sim <= 0.65 and fourgram_overlap <= 0.18
-
-            return {
-                "cosine_vs_transcript": round(cosine_sim, 3),
-                "cosine_vs_memory_max": None,  # Not implemented yet
-                "fourgram_vs_transcript": round(fourgram_overlap, 3),
-                "fourgram_vs_memory_max": None,  # Not implemented yet
-                "caps_ok": caps_ok
-            }
+            results = []
+            for script, cosine_sim, memory in zip(scripts, cosine_sims, memory_scores):
+                if cosine_sim is None:
+                    results.append(self._similarity_record(None, None))
+                    continue
+                if transcript_ngrams:
+                    script_ngrams = set(self._get_ngrams(script, 4))
+                    fourgram_overlap = len(transcript_ngrams.intersection(script_ngrams)) / len(transcript_ngrams)
+                else:
+                    fourgram_overlap = 0.0
+                results.append(self._similarity_record(float(cosine_sim), fourgram_overlap, memory))
+            return results
         except Exception:
+            return [self._similarity_record(None, None) for _ in scripts]
+    
+    def _memory_similarity_many(self, scripts: List[str]) -> List[Optional[Dict[str, float]]]:
+        """Max cosine / 4-gram overlap of each script against the originality memory"""
+        return _memory_similarity_many(scripts)
+    
+    def _similarity_record(self,
+                           cosine_sim: Optional[float],
+                           fourgram_overlap: Optional[float],
+                           memory: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Shape raw similarity numbers into the rubric's originality block"""
+        if cosine_sim is None or fourgram_overlap is None:
             return {
                 "cosine_vs_transcript": None,
                 "cosine_vs_memory_max": None,
@@ -348,6 +429,24 @@ class UGCScriptEvaluator:
                 "fourgram_vs_memory_max": None,
                 "caps_ok": True  # Default to safe
             }
+        
+        # Check caps
+        caps_ok = cosine_sim <= 0.65 and fourgram_overlap <= 0.18
+        
+        # Memory caps only apply once there is something to compare against
+        cosine_memory = fourgram_memory = None
+        if memory:
+            cosine_memory = round(memory["cosine"], 3)
+            fourgram_memory = round(memory["fourgram"], 3)
+            caps_ok = caps_ok and _memory_caps_ok(memory)
+        
+        return {
+            "cosine_vs_transcript": round(cosine_sim, 3),
+            "cosine_vs_memory_max": cosine_memory,
+            "fourgram_vs_transcript": round(fourgram_overlap, 3),
+            "fourgram_vs_memory_max": fourgram_memory,
+            "caps_ok": caps_ok
+        }
     
     def _get_ngrams(self, text: str, n: int) -> List[str]:
         """Generate n-grams from text"""
@@ -480,6 +579,162 @@ class UGCScriptEvaluator:
         
         return json.dumps(output, indent=2)
 
+
+# ---------------------------------------------------------------------------
+# Fast originality gate for text-only variations
+# ---------------------------------------------------------------------------
+# Default caps used when a caller passes no policy
+DEFAULT_VARIATION_POLICY = {
+    "pg13": True,
+    "max_cosine": 0.78,
+    "max_4gram_overlap": 0.30,
+    "max_bleu": 0.35,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_PG13_RE = re.compile(
+    r"\b(porn|xxx|nsfw|blowjob|handjob|fuck(?:ing)?|cock|dick|pussy)\b",
+    re.IGNORECASE
+)
+_BLEU_MAX_N = 4
+
+
+@dataclass(frozen=True)
+class _TextProfile:
+    """Pre-tokenized view of a text reused across many comparisons"""
+    length: int
+    terms: Dict[str, int]
+    norm: float
+    shingles: frozenset
+    ngram_counts: Tuple[Dict[tuple, int], ...]
+
+
+def _identity(terms: List[str]) -> List[str]:
+    """Analyzer for term lists that are already analyzed"""
+    return terms
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _build_profile(text: str) -> _TextProfile:
+    tokens = _tokenize(text)
+    terms = Counter(t for t in tokens if t not in ENGLISH_STOP_WORDS)
+    norm = math.sqrt(sum(c * c for c in terms.values()))
+    # Hashed 4-gram shingles: one int per window instead of a joined string
+    shingles = frozenset(hash(tuple(tokens[i:i + 4])) for i in range(len(tokens) - 3))
+    ngram_counts = tuple(
+        Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        for n in range(1, _BLEU_MAX_N + 1)
+    )
+    return _TextProfile(len(tokens), dict(terms), norm, shingles, ngram_counts)
+
+
+@lru_cache(maxsize=64)
+def _reference_profile(text: str) -> _TextProfile:
+    """Transcript profiles are cached: every variation of a request reuses one."""
+    return _build_profile(text)
+
+
+metrics.watch_lru("reference_profile", _reference_profile)
+
+
+def _sparse_cosine(a: _TextProfile, b: _TextProfile) -> float:
+    if not a.norm or not b.norm:
+        return 0.0
+    small, large = (a.terms, b.terms) if len(a.terms) <= len(b.terms) else (b.terms, a.terms)
+    dot = sum(count * large.get(term, 0) for term, count in small.items())
+    return dot / (a.norm * b.norm)
+
+
+def _shingle_overlap(candidate: _TextProfile, reference: _TextProfile) -> float:
+    """Share of the candidate's 4-grams lifted verbatim from the reference"""
+    if not candidate.shingles:
+        return 0.0
+    return len(candidate.shingles & reference.shingles) / len(candidate.shingles)
+
+
+def _sentence_bleu(candidate: _TextProfile, reference: _TextProfile) -> float:
+    """Smoothed sentence BLEU-4 from pre-counted n-grams (add-one for n > 1)."""
+    if candidate.length == 0 or reference.length == 0:
+        return 0.0
+    log_precision = 0.0
+    for n in range(_BLEU_MAX_N):
+        cand_counts = candidate.ngram_counts[n]
+        ref_counts = reference.ngram_counts[n]
+        total = sum(cand_counts.values())
+        clipped = sum(min(count, ref_counts.get(gram, 0)) for gram, count in cand_counts.items())
+        if n > 0:
+            clipped, total = clipped + 1, total + 1
+        if clipped == 0 or total == 0:
+            return 0.0
+        log_precision += math.log(clipped / total) / _BLEU_MAX_N
+    brevity = 1.0 if candidate.length > reference.length else math.exp(1 - reference.length / candidate.length)
+    return brevity * math.exp(log_precision)
+
+
+def _memory_similarity_many(scripts: List[str]) -> List[Optional[Dict[str, float]]]:
+    if OriginalityMemory is None:
+        return [None for _ in scripts]
+    try:
+        return OriginalityMemory.max_similarity_many(scripts)
+    except Exception:
+        return [None for _ in scripts]
+
+def _memory_caps_ok(memory: Optional[Dict[str, float]]) -> bool:
+    return not memory or (memory["cosine"] <= MEMORY_MAX_COSINE and memory["fourgram"] <= MEMORY_MAX_FOURGRAM)
+
+def memory_originality(scripts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Check candidate scripts against everything shipped before (the originality memory).
+    Returns {"cosine", "fourgram", "caps_ok"} per script; scores are None while
+    the memory is empty or unavailable, and those scripts pass.
+    """
+    out = []
+    for memory in _memory_similarity_many(scripts):
+        out.append({
+            "cosine": round(memory["cosine"], 3) if memory else None,
+            "fourgram": round(memory["fourgram"], 3) if memory else None,
+            "caps_ok": _memory_caps_ok(memory),
+        })
+    return out
+
+def evaluate_variation(transcript: str, variation: str, policy: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Score one variation against its source transcript and enforce the policy caps.
+    Returns {"pass": bool, "scores": {"cosine", "bleu", "overlap4"}, "reasons": [...]}.
+    """
+    caps = dict(DEFAULT_VARIATION_POLICY)
+    caps.update(policy or {})
+    
+    reference = _reference_profile(transcript or "")
+    candidate = _build_profile(variation or "")
+    
+    cosine = _sparse_cosine(candidate, reference)
+    overlap4 = _shingle_overlap(candidate, reference)
+    bleu = _sentence_bleu(candidate, reference)
+    
+    reasons = []
+    if cosine > caps["max_cosine"]:
+        reasons.append(f"Cosine {cosine:.2f} exceeds cap {caps['max_cosine']:.2f}")
+    if overlap4 > caps["max_4gram_overlap"]:
+        reasons.append(f"4-gram overlap {overlap4:.0%} exceeds cap {caps['max_4gram_overlap']:.0%}")
+    if bleu > caps["max_bleu"]:
+        reasons.append(f"BLEU {bleu:.2f} exceeds cap {caps['max_bleu']:.2f}")
+    if caps.get("pg13") and _PG13_RE.search(variation or ""):
+        reasons.append("Explicit language not allowed under PG-13 policy")
+    
+    return {
+        "pass": not reasons,
+        "scores": {
+            "cosine": round(cosine, 3),
+            "bleu": round(bleu, 3),
+            "overlap4": round(overlap4, 3),
+        },
+        "reasons": reasons,
+    }
+
 # Example usage
 if __name__ == "__main__":
     evaluator = UGCScriptEvaluator()
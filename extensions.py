@@ -24,4 +24,24 @@ limiter = Limiter(
     storage_uri=None,     # in-memory for dev; set Redis URI for prod
 )
 
-__all__ = ["db", "login_manager", "csrf", "limiter"]
+
+def configure_sqlite(engine) -> None:
+    """On SQLite, use WAL so readers don't block on the writer and request
+    threads stop serializing on fsyncs. No-op for other databases.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA busy_timeout=5000")
+        finally:
+            cur.close()
+
+
+__all__ = ["db", "login_manager", "csrf", "limiter", "configure_sqlite"]
@@ -5,8 +5,14 @@ import os
 import re
 import textwrap
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
+import metrics
+import tracing
+from phrase_rules import PhraseRules, phrase_pattern
+from transcript_context import TranscriptContext
+
 logger = logging.getLogger("mymuse")
 
 # ----------------------------
@@ -23,6 +29,9 @@ OUTPUT_STYLE = "dialog"    # fixed single-speaker dialogue output
 STRICT_PRODUCT_ONLY = _env("STRICT_PRODUCT_ONLY", "true").lower() in ("1", "true", "yes", "on")
 ALLOW_ADULT = _env("ALLOW_ADULT", "true").lower() in ("1", "true", "yes", "on")
 INTIMACY_MODE = _env("INTIMACY_MODE", "safe").lower()  # "safe" or "open"
+# Upper bound on candidates generated per requested variation when near-duplicate
+# pruning leaves too few (extra candidates are only generated to top up)
+VARIATION_POOL_FACTOR = max(1, int(_env("VARIATION_POOL_FACTOR", "2")))
 
 # API endpoints/models
 GROQ_ENDPOINT = _env("GROQ_ENDPOINT", "https://api.groq.com/openai/v1/chat/completions")
@@ -47,6 +56,38 @@ BANNED_PATTERNS = [
     r"\b(clinically|medically)\s+proven\b",
     r"\b(handjob|blowjob|bj)\b",
 ]
+# Generic taglines that make every script sound the same
+BANNED_TAGLINES = [
+    "trust your desires",
+    "go with what feels right",
+    "pleasure that meets you where you are",
+    "your adventure awaits",
+    "ready for something amazing",
+    "feel good. no apologies",
+    "focus on what drives you wild",
+]
+# Medical/clinical claims → neutral wording when a script is rewritten
+MEDICAL_CLAIMS = {
+    "clinically proven": "comfortable",
+    "medically proven": "comfortable",
+    "guaranteed": "comfortable",
+    "cure": "comfortable",
+    "treatment": "self-care",
+    "therapy": "self-care",
+}
+
+# Each rule set is compiled once here: one case-insensitive, word-boundary-aware
+# scan per text, with per-rule hit counters (see phrase_rule_hits()).
+BANNED_CONTENT_RULES = PhraseRules("banned_content", patterns=BANNED_PATTERNS)
+BANNED_TAGLINE_RULES = PhraseRules("banned_taglines", phrases=BANNED_TAGLINES)
+MEDICAL_CLAIM_RULES = PhraseRules(
+    "medical_claims",
+    rules=[(term, phrase_pattern(term), repl) for term, repl in MEDICAL_CLAIMS.items()],
+)
+
+def phrase_rule_hits() -> Dict[str, Dict[str, int]]:
+    """Hit counts per rule for every brand-safety rule set."""
+    return {r.name: r.hits() for r in (BANNED_CONTENT_RULES, BANNED_TAGLINE_RULES, MEDICAL_CLAIM_RULES)}
 
 PRODUCT_ALIASES = {
     "dive+": {"dive+", "dive plus", "dive", "the dive"},
@@ -143,8 +184,7 @@ def _clean_quote(q: str) -> str:
     q = re.sub(r"[^\w\s.,!?'\-+&/()]", "", q)
     # banned patterns (only when adult content is not allowed)
     if not ALLOW_ADULT and INTIMACY_MODE != "open":
-        for pat in BANNED_PATTERNS:
-            q = re.sub(pat, "", q, flags=re.IGNORECASE)
+        q = BANNED_CONTENT_RULES.sub(q)
     # length clamp
     if len(q) > 280:
         q = q[:277].rstrip() + "…"
@@ -338,58 +378,33 @@ def _auto_detect_product(transcript_text: str) -> str:
     # Default fallback
     return "dive+"
 
-def _detect_transcript_type(transcript_text: str) -> str:
-    """Detect transcript type for appropriate script generation rules."""
-    if not transcript_text:
-        return "casual"
-    
-    import re
-    text = transcript_text.lower()
-
-    def has_word(word: str) -> bool:
-        try:
-            return re.search(rf"\b{re.escape(word.lower())}\b", text) is not None
-        except re.error:
-            return word.lower() in text
-    
-    def any_word(words: List[str]) -> bool:
-        return any(has_word(w) for w in words)
-    
+# Transcript classifier keywords, in priority order: the first category with a
+# hit decides the transcript type ("casual" when nothing matches).
+TRANSCRIPT_KEYWORDS: Dict[str, List[str]] = {
     # Case 4: Anal play content (highest priority - very specific context)
-    anal_keywords = [
+    "anal_play": [
         "back door", "defecate", "poop", "shit", "anal", "anus", "rectum",
         "bowel", "digestive", "stool", "fecal", "toilet", "bathroom",
         "kings and philosophers", "mantein", "encounter the thing that lives there"
-    ]
-    if any_word(anal_keywords):
-        print(f"DEBUG: Anal play keyword detected: {[k for k in anal_keywords if k in text]}")
-        return "anal_play"
-    
+    ],
     # Case 3: Sexual/Intimate content (check before features to avoid misclassifying 'size')
-    sexual_keywords = [
+    "sexual": [
         "pp", "penis", "dick", "cock", "size", "sex", "fuck", "fucking",
         "orgasm", "pleasure", "intimate", "intimacy", "sexual", "foreplay",
         "clitoris", "vagina", "pussy", "ass", "oral", "blowjob",
-        "handjob", "masturbation", "vibrator", "toy", "toy", "massager",
+        "handjob", "masturbation", "vibrator", "toy", "massager",
         "stimulation", "arousal", "erection", "hard", "soft", "wet", "lubricant"
-    ]
-    if any_word(sexual_keywords):
-        return "sexual"
-    
+    ],
     # Case 5: Diverse sexual content (size discussions, relationship advice, intimacy tips)
-    diverse_sexual_keywords = [
+    "sexual_diverse": [
         "boyfriend", "girlfriend", "partner", "relationship", "dating", "advice",
         "girl to girl", "guy to guy", "friends", "experience", "first time",
         "average", "small", "big", "matter", "important", "attention", "needs",
         "good at it", "nice", "connection", "deeper level", "enhance", "elevate",
         "inches"
-    ]
-    if any_word(diverse_sexual_keywords):
-        print(f"DEBUG: Diverse sexual content keyword detected: {[k for k in diverse_sexual_keywords if k in text]}")
-        return "sexual_diverse"
-
+    ],
     # Case 2: Feature-heavy content (now after sexual checks)
-    feature_keywords = [
+    "feature_heavy": [
         "motor", "vibration", "speed", "mode", "setting", "battery", "charge",
         "waterproof", "silicone", "material", "texture",
         "app", "control", "remote", "bluetooth", "wireless", "noise", "quiet",
@@ -397,21 +412,68 @@ def _detect_transcript_type(transcript_text: str) -> str:
         "color", "colour", "black", "red", "blue", "white", "pink",
         "modes", "speeds", "vibrations", "features", "specs", "specifications",
         "dijayatra", "digi-astra", "jadugar"
-    ]
-    if any_word(feature_keywords):
-        print(f"DEBUG: Feature keyword detected: {[k for k in feature_keywords if k in text]}")
-        return "feature_heavy"
-    
-    # Case 1: Casual/Travel content (default)
-    return "casual"
+    ],
+}
+_KEYWORD_CATEGORIES: Dict[str, List[str]] = {}
+for _category, _words in TRANSCRIPT_KEYWORDS.items():
+    for _w in _words:
+        _KEYWORD_CATEGORIES.setdefault(_w, []).append(_category)
+# One alternation over every keyword (longest first), matched on lowercased text
+_TRANSCRIPT_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)) + r")\b"
+)
+
+
+class TranscriptClassification:
+    """Transcript type plus the keyword hits of every category."""
+    __slots__ = ("label", "hits")
+
+    def __init__(self, label: str, hits: Dict[str, frozenset]):
+        self.label = label
+        self.hits = hits
+
+    def __repr__(self) -> str:
+        return f"TranscriptClassification({self.label!r}, hits={ {k: sorted(v) for k, v in self.hits.items() if v} })"
+
+
+@lru_cache(maxsize=256)
+def classify_transcript(transcript_text: str) -> TranscriptClassification:
+    """Scan the transcript once for all keyword categories. Memoized on the
+    transcript text, so every stage of a request reuses the same result.
+    """
+    found: Dict[str, set] = {c: set() for c in TRANSCRIPT_KEYWORDS}
+    for m in _TRANSCRIPT_KEYWORD_RE.finditer((transcript_text or "").lower()):
+        for category in _KEYWORD_CATEGORIES[m.group(0)]:
+            found[category].add(m.group(0))
+    hits = {c: frozenset(v) for c, v in found.items()}
+
+    label = "casual"
+    if transcript_text:
+        for category in TRANSCRIPT_KEYWORDS:
+            if hits[category]:
+                label = category
+                break
+    if label in ("anal_play", "sexual_diverse", "feature_heavy"):
+        print(f"DEBUG: {label} keyword detected: {sorted(hits[label])}")
+    return TranscriptClassification(label, hits)
+
+
+metrics.watch_lru("classify_transcript", classify_transcript)
+
+
+def _detect_transcript_type(transcript_text: str) -> str:
+    """Detect transcript type for appropriate script generation rules."""
+    if not transcript_text:
+        return "casual"
+    return classify_transcript(transcript_text).label
 
-def _transcript_flow(transcript_text: str) -> List[str]:
+def _transcript_flow(transcript_text: str, ctx: Optional[TranscriptContext] = None) -> List[str]:
     """Extract short flow cue line(s) from the transcript to shape the ad body.
     Ignore known dev-fallback placeholder transcripts.
     """
     if not transcript_text or _is_dev_fallback_transcript(transcript_text):
         return []
-    words = re.findall(r"[A-Za-z][A-Za-z+'-]{2,}", transcript_text)
+    words = ctx.tokens if ctx is not None else re.findall(r"[A-Za-z][A-Za-z+'-]{2,}", transcript_text)
     seen = set()
     unique = []
     for w in words:
@@ -485,7 +547,9 @@ def _build_prompt(product_name: str,
                   phrases_list: List[str],
                   theme_map: Dict[str, Any],
                   rel_reviews: List[str],
-                  output_style: Optional[str] = None) -> List[Dict[str, str]]:
+                  output_style: Optional[str] = None,
+                  ctx: Optional[TranscriptContext] = None) -> List[Dict[str, str]]:
+    ctx = TranscriptContext.of(transcript_text, ctx)
 
     # simple signals from analysis
     try:
@@ -494,11 +558,11 @@ def _build_prompt(product_name: str,
         comp = 0.0
     mood = "uplifting" if comp >= 0.2 else ("balanced" if comp > -0.2 else "reassuring")
     phrases = ", ".join(phrases_list[:8]) if phrases_list else ""
-    flow_lines = _transcript_flow(transcript_text)
+    flow_lines = ctx.flow_cues
     quotes = _select_relevant_quotes(product_name, rel_reviews, max_quotes=3)
 
     # Detect transcript type for case-specific rules
-    transcript_type = _detect_transcript_type(transcript_text)
+    transcript_type = ctx.transcript_type
 
     # Adult/open vs. safe brand rules
     if ALLOW_ADULT or INTIMACY_MODE == "open":
@@ -700,6 +764,7 @@ def _build_prompt(product_name: str,
 # -------------------
 # Model callers
 # -------------------
+@metrics.llm_call("groq")
 def _call_groq(messages: List[Dict[str, str]]) -> Optional[str]:
     if not GROQ_API_KEY:
         return None
@@ -735,6 +800,7 @@ def _call_groq(messages: List[Dict[str, str]]) -> Optional[str]:
         logger.warning("Groq call failed: %s", e)
         return None
 
+@metrics.llm_call("openai")
 def _call_openai(messages: List[Dict[str, str]]) -> Optional[str]:
     if not OPENAI_API_KEY:
         return None
@@ -770,6 +836,7 @@ def _call_openai(messages: List[Dict[str, str]]) -> Optional[str]:
         logger.warning("OpenAI call failed: %s", e)
         return None
 
+@metrics.llm_call("openai")
 def _call_openai_large(messages: List[Dict[str, str]], max_tokens: int = 2000) -> Optional[str]:
     if not OPENAI_API_KEY:
         return None
@@ -1745,7 +1812,12 @@ Keep it at your pace.
 # ENHANCED SCRIPT GENERATION SYSTEM (AI-TRAINED)
 # ============================================================================
 
-def _enhanced_local_variations(product_name: str, transcript_text: str, count: int = 10, gen_z: bool = False) -> List[str]:
+def _enhanced_analysis(generator, transcript_text: str, ctx: Optional[TranscriptContext]) -> Dict[str, Any]:
+    """EnhancedScriptGenerator._analyze_transcript, run once per request transcript."""
+    ctx = TranscriptContext.of(transcript_text, ctx)
+    return ctx.memo("enhanced_analysis", lambda: generator._analyze_transcript(transcript_text))
+
+def _enhanced_local_variations(product_name: str, transcript_text: str, count: int = 10, gen_z: bool = False, ctx: Optional[TranscriptContext] = None) -> List[str]:
     """
     Enhanced variation generation using AI training data
     """
@@ -1765,7 +1837,8 @@ def _enhanced_local_variations(product_name: str, transcript_text: str, count: i
         
         # Generate variations using AI training
         print("🎯 DEBUG: Calling generator.generate_variations...")
-        variations = generator.generate_variations(product_name, transcript_text, count, gen_z)
+        context = _enhanced_analysis(generator, transcript_text, ctx)
+        variations = generator.generate_variations(product_name, transcript_text, count, gen_z, context=context)
         print(f"✅ DEBUG: generate_variations returned {len(variations)} variations")
         
         # Extract text from variations
@@ -1821,7 +1894,7 @@ def _enhanced_local_variations(product_name: str, transcript_text: str, count: i
 
         return [build_block(i) for i in range(count)]
 
-def _enhanced_local_script(product_name: str, transcript_text: str, gen_z: bool = False) -> str:
+def _enhanced_local_script(product_name: str, transcript_text: str, gen_z: bool = False, ctx: Optional[TranscriptContext] = None) -> str:
     """
     Enhanced script generation using AI training data
     """
@@ -1841,7 +1914,8 @@ def _enhanced_local_script(product_name: str, transcript_text: str, gen_z: bool
         
         # Generate script using AI training
         print("🎯 DEBUG: Calling generator.generate_human_script...")
-        script = generator.generate_human_script(product_name, transcript_text, gen_z)
+        context = _enhanced_analysis(generator, transcript_text, ctx)
+        script = generator.generate_human_script(product_name, transcript_text, gen_z, context=context)
         print(f"✅ DEBUG: generate_human_script returned script of length: {len(script)}")
         
         print("🎯 Enhanced AI system generated script")
@@ -1887,6 +1961,25 @@ def _enhanced_local_script(product_name: str, transcript_text: str, gen_z: bool
         return "\n".join(lines_out)
 
 
+def _memory_originality(texts: List[str]) -> List[Dict[str, Any]]:
+    """Similarity of each text to previously shipped scripts; passes everything when the memory is unavailable."""
+    try:
+        from evaluator import memory_originality
+        return memory_originality(texts)
+    except Exception as e:
+        logger.warning("Originality memory check skipped: %s", e)
+        return [{"cosine": None, "fourgram": None, "caps_ok": True} for _ in texts]
+
+
+def _least_shipped(capped: Dict[str, Dict[str, Any]], n: int) -> List[str]:
+    """The `n` memory-capped texts least similar to previously shipped scripts."""
+    def _similarity(t: str):
+        check = capped[t]
+        return (check.get("cosine") or 0.0, check.get("fourgram") or 0.0)
+    return sorted(capped, key=_similarity)[:max(0, n)]
+
+
+@metrics.stage("generation")
 def generate_variations(product_name: str,
                         transcript_text: str,
                         analysis: Dict[str, Any],
@@ -1897,14 +1990,17 @@ def generate_variations(product_name: str,
                         instagram_mode: bool = False,
                         pg13_mode: bool = True,
                         integrate_product: bool = True,
-                        genz_mode: bool = False) -> Dict[str, Any]:
+                        genz_mode: bool = False,
+                        ctx: Optional[TranscriptContext] = None) -> Dict[str, Any]:
     rel_reviews = rel_reviews or []
+    ctx = TranscriptContext.of(transcript_text, ctx)
     # genz_mode is optional; default False for Leeza-style unless UI enables
     genz_mode = analysis.get("genz_mode", False)
     
     print(f"🔍 DEBUG: generate_variations called with GENERATOR={GENERATOR}, product={product_name}, integrate_product={integrate_product}")
     
-    messages = _build_variations_prompt(product_name, transcript_text, analysis, rel_reviews, platform, locale, instagram_mode, pg13_mode, integrate_product, genz_mode)
+    with tracing.span("build_prompt"):
+        messages = _build_variations_prompt(product_name, transcript_text, analysis, rel_reviews, platform, locale, instagram_mode, pg13_mode, integrate_product, genz_mode)
 
     text: Optional[str] = None
     if GENERATOR in ("openai", "auto", "groq"):
@@ -1915,31 +2011,22 @@ def generate_variations(product_name: str,
             text = _call_groq(messages)
     if not text:
         print(f"🎯 DEBUG: Using enhanced local generation path")
-        variations = _enhanced_local_variations(product_name if integrate_product else "", transcript_text, count=count, gen_z=genz_mode)
+        with tracing.span("local_variations", count=count):
+            variations = _enhanced_local_variations(product_name if integrate_product else "", transcript_text, count=count, gen_z=genz_mode, ctx=ctx)
     else:
         print(f"🎯 DEBUG: Using API-generated text, supplementing with local if needed")
         variations = _parse_variations_block(text)
         if len(variations) < count:
-            variations += _enhanced_local_variations(product_name if integrate_product else "", transcript_text, count=count - len(variations), gen_z=genz_mode)
+            with tracing.span("local_variations", count=count - len(variations)):
+                variations += _enhanced_local_variations(product_name if integrate_product else "", transcript_text, count=count - len(variations), gen_z=genz_mode, ctx=ctx)
 
     # Post-process each variation with brand/product swaps & shape corrections
-    processed: List[str] = []
-    for v in variations[:count]:
+    def _postprocess(v: str) -> str:
         vv = _strip_md(v)
         if not genz_mode:
             vv = _degenzify_text(vv)
         # Remove banned generic taglines in variations
-        banned_phrases = [
-            "trust your desires",
-            "go with what feels right",
-            "pleasure that meets you where you are",
-            "your adventure awaits",
-            "ready for something amazing",
-            "feel good. no apologies",
-            "focus on what drives you wild"
-        ]
-        for bp in banned_phrases:
-            vv = vv.replace(bp, "").replace(bp.capitalize(), "").strip()
+        vv = BANNED_TAGLINE_RULES.sub(vv).strip()
         
         # CRITICAL: Replace fake product names with real ones
         if integrate_product:
@@ -1951,20 +2038,77 @@ def generate_variations(product_name: str,
         if integrate_product and product_name:
             vv = _swap_non_mymuse_mentions(vv, transcript_text, product_name)
             vv = _apply_shape_corrections(vv, product_name)
-        processed.append(vv)
+        return vv
+
+    # Set aside near-copies of scripts shipped by earlier requests (originality
+    # memory); they only come back to fill slots nothing original is left for
+    memory_scores: Dict[str, Dict[str, Any]] = {}
+    capped: Dict[str, Dict[str, Any]] = {}
+    def _not_shipped(texts: List[str]) -> List[str]:
+        with tracing.span("originality_memory", count=len(texts)):
+            checks = _memory_originality(texts)
+        kept = []
+        for t, check in zip(texts, checks):
+            memory_scores[t] = check
+            if check["caps_ok"]:
+                kept.append(t)
+            else:
+                capped[t] = check
+        if len(kept) < len(texts):
+            print(f"DEBUG: {len(texts) - len(kept)} candidates set aside as near-copies of past scripts")
+        return kept
+
+    # Collapse near-duplicates (MinHash/LSH) before the evaluate/rewrite pass so
+    # copies never cost an evaluation; earlier candidates win ties.
+    from minhash import dedupe_near_duplicates
+    generated = min(len(variations), count)
+    with tracing.span("dedupe"):
+        processed = dedupe_near_duplicates([_postprocess(v) for v in variations[:count]], text_of=lambda t: t)
+    processed = _not_shipped(processed)
+
+    # Top up only when pruning left fewer than requested, within the pool budget
+    pool_size = count * VARIATION_POOL_FACTOR
+    while len(processed) < count and generated < pool_size:
+        need = min(count - len(processed), pool_size - generated)
+        # Spare API variations first, then fresh local ones
+        extra = variations[generated:generated + need]
+        if len(extra) < need:
+            with tracing.span("local_variations", count=need - len(extra)):
+                extra += _enhanced_local_variations(product_name if integrate_product else "", transcript_text, count=need - len(extra), gen_z=genz_mode, ctx=ctx)
+        generated += need
+        before = len(processed)
+        with tracing.span("dedupe"):
+            processed = dedupe_near_duplicates(processed + _not_shipped([_postprocess(v) for v in extra[:need]]), text_of=lambda t: t)
+        if len(processed) == before:
+            break  # the generator is only repeating itself; the quality fallback below takes over
+    if len(processed) < count and capped:
+        # Pool exhausted: fill the remaining slots with the least-shipped-looking candidates
+        with tracing.span("dedupe"):
+            processed = dedupe_near_duplicates(processed + _least_shipped(capped, len(capped)), text_of=lambda t: t)[:count]
+    print(f"DEBUG: {generated} candidates -> {len(processed)} after near-duplicate pruning")
+
+    # Similarity to the transcript for the reported scores
+    try:
+        from evaluator import evaluate_variation
+    except Exception:
+        evaluate_variation = None  # type: ignore
 
     # NEW: Evaluate each variation using the new rubric
     results: List[Dict[str, Any]] = []
-    for vv in processed:
+    for vv in processed[:count]:
+        memory = memory_scores.get(vv, {})
         # Evaluate with new system
-        evaluation = evaluate_script_new(vv, transcript_text, product_name, genz_mode)
+        evaluation = evaluate_script_new(vv, transcript_text, product_name, genz_mode, ctx=ctx)
         
         # If score < 85, rewrite with fixes
         if evaluation["score"] < 85:
             print(f"DEBUG: Variation score {evaluation['score']} < 85, rewriting with fixes")
-            vv = rewrite_script_with_fixes(vv, evaluation["fixes"], product_name, genz_mode)
+            with tracing.span("rewrite_with_fixes"):
+                vv = rewrite_script_with_fixes(vv, evaluation["fixes"], product_name, genz_mode)
             # Re-evaluate after fixes
-            evaluation = evaluate_script_new(vv, transcript_text, product_name, genz_mode)
+            evaluation = evaluate_script_new(vv, transcript_text, product_name, genz_mode, ctx=ctx)
+        
+        scores = evaluate_variation(transcript_text, vv)["scores"] if evaluate_variation else {}
         
         # Format exactly as requested
         result = {
@@ -1972,18 +2116,29 @@ def generate_variations(product_name: str,
             "evaluation": {
                 "pass": evaluation["pass"],
                 "score": evaluation["score"],
-                "cosine": 0.00,  # Placeholder - can be enhanced later
-                "bleu": 0.00,    # Placeholder - can be enhanced later
-                "overlap4": 0.00 # Placeholder - can be enhanced later
+                "cosine": scores.get("cosine", 0.00),
+                "bleu": scores.get("bleu", 0.00),
+                "overlap4": scores.get("overlap4", 0.00),
+                # Against previously shipped scripts (None while the memory is empty)
+                "memory_cosine": memory.get("cosine"),
+                "memory_overlap4": memory.get("fourgram"),
+                "memory_capped": not memory.get("caps_ok", True),
             }
         }
         results.append(result)
 
+    # Rewrites can converge two candidates; the cheap re-check keeps the best-scoring one
+    with tracing.span("dedupe"):
+        distinct = dedupe_near_duplicates(
+            results,
+            text_of=lambda r: r.get("text", ""),
+            score_of=lambda r: float(r["evaluation"].get("score", 0)),
+        )
+
     # Select best + quality fallback
-    sorted_results = sorted(results, key=lambda r: float(r["evaluation"].get("score", 0)), reverse=True)
+    sorted_results = sorted(distinct, key=lambda r: float(r["evaluation"].get("score", 0)), reverse=True)
     chosen = sorted_results[:count]
-    unique_texts = [c.get("text", "").strip() for c in chosen]
-    unique_count = len(set(unique_texts))
+    unique_count = len(chosen)
     avg_score = sum(c["evaluation"].get("score", 0) for c in chosen) / max(1, len(chosen))
 
     if unique_count < max(7, count - 3) or avg_score < 70:
@@ -2048,8 +2203,16 @@ def generate_variations(product_name: str,
                 out.append("\n".join(seq))
             return out
 
-        synthesized = _synthesize_variations_from_transcript(transcript_text, product_name or "", count)
-        chosen = [{"text": t, "evaluation": {"pass": True, "score": 90, "cosine": 0.0, "bleu": 0.0, "overlap4": 0.0}} for t in synthesized]
+        # The templates are deterministic, so skip the ones an earlier request already shipped
+        synthesized = _synthesize_variations_from_transcript(transcript_text, product_name or "", 2 * count)
+        checks = dict(zip(synthesized, _memory_originality(synthesized)))
+        picked = [t for t in checks if checks[t]["caps_ok"]][:count]
+        # Every template already shipped: still return `count`, least similar first, marked
+        picked += _least_shipped({t: c for t, c in checks.items() if not c["caps_ok"]}, count - len(picked))
+        chosen = [{"text": t, "evaluation": {"pass": True, "score": 90, "cosine": 0.0, "bleu": 0.0, "overlap4": 0.0,
+                                             "memory_cosine": checks[t]["cosine"], "memory_overlap4": checks[t]["fourgram"],
+                                             "memory_capped": not checks[t]["caps_ok"]}}
+                  for t in picked]
 
     return {"variations": chosen, "summary": ""}
 
@@ -2219,6 +2382,23 @@ def _fix_grammar(text: str) -> str:
     
     return text.strip()
 
+def _enforce_monologue_flow(body: str) -> str:
+    """Strip 'Step N —' headings and banned taglines, and join lines with soft connectors"""
+    if not body:
+        return body
+    lines_loc = [l.strip() for l in body.split('\n') if l.strip()]
+    out: List[str] = []
+    for idx, ln in enumerate(lines_loc):
+        # Remove any 'Step X —' prefix
+        ln = re.sub(r"^\s*Step\s*\d+\s*[—-]\s*", "", ln, flags=re.IGNORECASE)
+        # Remove banned boilerplate
+        ln = BANNED_TAGLINE_RULES.truncate(ln)
+        # Add soft connector for lines after the first
+        if idx > 0 and not re.match(r"^(and|then|so|because|also)\b", ln, flags=re.IGNORECASE):
+            ln = ("And " + ln[0].lower() + ln[1:]) if ln else ln
+        out.append(ln)
+    return "\n".join(out)
+
 def _limit_genz_slang(text: str, max_slangs: int = 1) -> str:
     """Allow at most `max_slangs` Gen Z slang phrases per script.
     Keeps the first few occurrences across all slang; removes the rest for a more natural tone.
@@ -2417,6 +2597,7 @@ def _enforce_case2_structure(generated_text: str, original_transcript: str, prod
 # -------------------
 # Public entry point
 # -------------------
+@metrics.stage("generation")
 def generate(product_name: str,
              transcript_text: str,
              sentiment: Dict[str, Any],
@@ -2424,7 +2605,8 @@ def generate(product_name: str,
              theme_map: Dict[str, Any],
              rel_reviews: Optional[List[str]] = None,
              output_style: Optional[str] = None,
-             gen_z: bool = False) -> Dict[str, Any]:
+             gen_z: bool = False,
+             ctx: Optional[TranscriptContext] = None) -> Dict[str, Any]:
     """
     Returns the new format: Generated Script + Variations (10) with evaluation
     - Script-only output in MyMuse voice with proper evaluation
@@ -2435,6 +2617,7 @@ def generate(product_name: str,
     # Keep product_name as provided by user
     
     rel_reviews = rel_reviews or []
+    ctx = TranscriptContext.of(transcript_text, ctx)
 
     # Sanitize rel_reviews
     cleaned_quotes: List[str] = []
@@ -2443,15 +2626,17 @@ def generate(product_name: str,
         if cq:
             cleaned_quotes.append(cq)
 
-    messages = _build_prompt(
-        product_name=product_name,
-        transcript_text=transcript_text or "",
-        sentiment=sentiment or {},
-        phrases_list=phrases_list or [],
-        theme_map=theme_map or {},
-        rel_reviews=cleaned_quotes,
-        output_style=(output_style or OUTPUT_STYLE),
-    )
+    with tracing.span("build_prompt"):
+        messages = _build_prompt(
+            product_name=product_name,
+            transcript_text=transcript_text or "",
+            sentiment=sentiment or {},
+            phrases_list=phrases_list or [],
+            theme_map=theme_map or {},
+            rel_reviews=cleaned_quotes,
+            output_style=(output_style or OUTPUT_STYLE),
+            ctx=ctx,
+        )
 
     text: Optional[str] = None
     # 1) Groq
@@ -2462,36 +2647,10 @@ def generate(product_name: str,
         text = _call_openai(messages)
     # 3) Local fallback
     if not text:
-        text = _enhanced_local_script(product_name, transcript_text, gen_z)
+        with tracing.span("local_script"):
+            text = _enhanced_local_script(product_name, transcript_text, gen_z, ctx=ctx)
 
     text = _strip_md(text)
-    # Enforce monologue flow: strip any 'Step N —' style headings and banned phrases
-    def _enforce_monologue_flow(body: str) -> str:
-        import re
-        if not body:
-            return body
-        lines_loc = [l.strip() for l in body.split('\n') if l.strip()]
-        out: List[str] = []
-        for idx, ln in enumerate(lines_loc):
-            # Remove any 'Step X —' prefix
-            ln = re.sub(r"^\s*Step\s*\d+\s*[—-]\s*", "", ln, flags=re.IGNORECASE)
-            # Remove banned boilerplate
-            banned_local = [
-                "trust your desires", "go with what feels right",
-                "pleasure that meets you where you are", "your adventure awaits",
-                "ready for something amazing", "feel good. no apologies",
-                "focus on what drives you wild"
-            ]
-            low = ln.lower()
-            for bp in banned_local:
-                if bp in low:
-                    ln = ln[:max(0, low.find(bp))].rstrip('. ').strip()
-            # Add soft connector for lines after the first
-            if idx > 0 and not re.match(r"^(and|then|so|because|also)\b", ln, flags=re.IGNORECASE):
-                ln = ("And " + ln[0].lower() + ln[1:]) if ln else ln
-            out.append(ln)
-        return "\n".join(out)
-
     text = _enforce_monologue_flow(text)
     # If output is too short/one-liner OR contains banned generic phrases, synthesize structured script
     def _synthesize_script_from_transcript(transcript: str, product: str) -> str:
@@ -2555,16 +2714,7 @@ def generate(product_name: str,
 
     words = len((text or '').split())
     line_count = len([l for l in (text or '').split('\n') if l.strip()])
-    banned = [
-        "ready for something amazing",
-        "your adventure awaits",
-        "trust your desires",
-        "go with what feels right",
-        "pleasure that meets you where you are",
-        "focus on what drives you wild",
-        "feel good. no apologies"
-    ]
-    has_banned = any(b in (text or '').lower() for b in banned)
+    has_banned = BANNED_TAGLINE_RULES.search(text) is not None
     if words < 40 or line_count < 3 or has_banned:
         text = _synthesize_script_from_transcript(transcript_text, product_name)
 
@@ -2574,11 +2724,11 @@ def generate(product_name: str,
     text = _enforce_monologue_flow(text)
     
     # Post-process Case 2 to enforce strict structure preservation
-    transcript_type = _detect_transcript_type(transcript_text)
+    transcript_type = ctx.transcript_type
     print(f"DEBUG: Transcript type detected: {transcript_type}")
     
     # FORCE travel transcripts to use Case 1 (casual travel) regardless of feature detection
-    if "airport" in transcript_text.lower() or "travel" in transcript_text.lower():
+    if ctx.has_any(["airport", "travel"]):
         print(f"DEBUG: Forcing Case 1 (casual travel) treatment for {product_name}")
         # Don't apply Case 2 enforcement for travel content - keep it natural
         text = _apply_ugc_rules(text)
@@ -2592,25 +2742,37 @@ def generate(product_name: str,
         text = _apply_ugc_rules(text)
     
     # NEW: Evaluate the generated script using new rubric
-    evaluation_result = evaluate_script_new(text, transcript_text, product_name, gen_z)
+    evaluation_result = evaluate_script_new(text, transcript_text, product_name, gen_z, ctx=ctx)
     
     # If score < 85, rewrite with fixes
     if evaluation_result["score"] < 85:
         print(f"DEBUG: Script score {evaluation_result['score']} < 85, rewriting with fixes")
         text = rewrite_script_with_fixes(text, evaluation_result["fixes"], product_name, gen_z)
         # Re-evaluate after fixes
-        evaluation_result = evaluate_script_new(text, transcript_text, product_name, gen_z)
+        evaluation_result = evaluate_script_new(text, transcript_text, product_name, gen_z, ctx=ctx)
     
-    # Generate 10 variations
+    # Generate 10 variations (same transcript context: nothing is re-analysed)
     variations_result = generate_variations(
         product_name=product_name,
         transcript_text=transcript_text,
         analysis={"genz_mode": gen_z},  # Pass gen_z mode
         rel_reviews=cleaned_quotes,
         count=10,
-        genz_mode=gen_z
+        genz_mode=gen_z,
+        ctx=ctx,
     )
     
+    # The primary script is what gets saved; never ship a near-copy of an earlier one.
+    # The best variation that is itself original takes its place.
+    variations = variations_result["variations"]
+    checks = _memory_originality([text] + [v["text"] for v in variations])
+    if not checks[0]["caps_ok"]:
+        fresh = next((i for i, check in enumerate(checks[1:]) if check["caps_ok"]), None)
+        if fresh is not None:
+            print("DEBUG: Primary script is a near-copy of a past script, promoting the best original variation")
+            text = variations.pop(fresh)["text"]
+            evaluation_result = evaluate_script_new(text, transcript_text, product_name, gen_z, ctx=ctx)
+    
     # Format output exactly as requested
     output = {
         "generated_script": text,
@@ -2628,11 +2790,14 @@ def generate(product_name: str,
 # -------------------
 # New Evaluation System (0-100 scoring)
 # -------------------
-def evaluate_script_new(script: str, transcript: str, product_name: str, gen_z: bool = False) -> Dict[str, Any]:
+@metrics.stage("evaluation")
+def evaluate_script_new(script: str, transcript: str, product_name: str, gen_z: bool = False,
+                        ctx: Optional[TranscriptContext] = None) -> Dict[str, Any]:
     """
     New evaluation system scoring 0-100 with detailed feedback.
     Returns score, pass/fail, and specific fixes needed.
     """
+    ctx = TranscriptContext.of(transcript, ctx)
     score = 0
     feedback = []
     fixes = []
@@ -2695,11 +2860,11 @@ def evaluate_script_new(script: str, transcript: str, product_name: str, gen_z:
     
     # 3. Transcript fidelity: scene + intent + SENTIMENT preserved (+15) / (–30)
     # Check if script matches transcript's emotional energy and context
-    transcript_lower = transcript.lower()
+    transcript_lower = ctx.lower
     script_lower = script.lower()
     
     # LENGTH MATCHING - CRITICAL for proper script generation
-    transcript_words = len(transcript.split())
+    transcript_words = len(ctx.words)
     script_words = len(script.split())
     length_tolerance = 0.2  # 20% tolerance
     
@@ -2755,8 +2920,7 @@ def evaluate_script_new(script: str, transcript: str, product_name: str, gen_z:
             fixes.append("Match transcript's emotional energy")
     
     # 4. Brand lock: inclusive, body-positive, no medical claims (+15) / (–20)
-    medical_terms = ["clinically proven", "medically proven", "guaranteed", "cure", "treatment", "therapy"]
-    has_medical = any(term in script.lower() for term in medical_terms)
+    has_medical = MEDICAL_CLAIM_RULES.search(script) is not None
     
     inclusive_terms = ["everyone", "all", "inclusive", "universal", "anyone", "wherever", "travels", "journey", "comfort"]
     has_inclusive = any(term in script.lower() for term in inclusive_terms)
@@ -2774,8 +2938,6 @@ def evaluate_script_new(script: str, transcript: str, product_name: str, gen_z:
     
     # 5. Specificity: product features mentioned in transcript get perfect representation (+10) / (–10)
     # If transcript mentions features, script should include them accurately
-    transcript_lower = transcript.lower()
-    script_lower = script.lower()
     
     # Check for feature mentions in transcript
     feature_indicators = ["speed", "modes", "modes of", "features", "modes of speed", "speed modes"]
@@ -2900,10 +3062,7 @@ def rewrite_script_with_fixes(script: str, fixes: List[str], product_name: str,
         
         if "Remove medical/clinical claims" in fix:
             # Remove any medical language
-            medical_terms = ["clinically proven", "medically proven", "guaranteed", "cure"]
-            for i, line in enumerate(lines):
-                for term in medical_terms:
-                    lines[i] = line.replace(term, "comfortable")
+            lines = [MEDICAL_CLAIM_RULES.sub(line) for line in lines]
         
         if "Make last line more confident and emotional" in fix:
             # Replace last line with a banger ending
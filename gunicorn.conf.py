@@ -0,0 +1,109 @@
+# gunicorn.conf.py — production server profile
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# - preload_app: app.py is imported once in the master (light: sklearn, whisper
+#   and the generators load lazily) and shared copy-on-write by every worker
+# - gthread workers: requests spend most of their time waiting on LLM / scrape I/O
+# - post_worker_init: reset inherited DB connections and start the worker's
+#   warm-up (heavy imports, attach or build the review index; /readyz is 503
+#   until it finishes, /healthz answers at once)
+# - when_ready / pre_fork / on_exit: background work (startup scrape + index
+#   rebuild, the scrape scheduler) runs in one dedicated process next to the
+#   workers (app.run_background_owner), so max_requests recycling never
+#   restarts it; the master restarts it if it dies
+# - worker_exit: drain the write-behind record queue before the worker exits
+#   and fold the worker's metrics into the shared totals
+# - METRICS_DIR / TRACE_DIR: per-worker metric and slow-trace files that
+#   /metrics and /admin/traces aggregate (metrics.py, tracing.py)
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from background_owner import MANAGED_ENV
+
+os.environ.setdefault(MANAGED_ENV, "gunicorn")
+_instance = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance")
+os.environ.setdefault("METRICS_DIR", os.path.join(_instance, "metrics"))
+os.environ.setdefault("TRACE_DIR", os.path.join(_instance, "traces"))
+
+
+def _cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return multiprocessing.cpu_count()
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes", "on")
+worker_class = "gthread"
+# Each worker holds its own sklearn/numpy state, so cap by memory as well as cores
+workers = int(os.getenv("WEB_CONCURRENCY") or min(2 * _cores() + 1, int(os.getenv("GUNICORN_MAX_WORKERS", "4"))))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))          # LLM calls can take a while
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    # Counters restart from zero with the server; Prometheus handles the reset
+    import metrics
+    import tracing
+    metrics.reset_dir()
+    tracing.clear_dir()
+
+
+# Background-owner process (scrape scheduler + index rebuilds), one per server
+BACKGROUND_CMD = [sys.executable, "-c", "import sys, app; sys.exit(app.run_background_owner())"]
+_background = None
+
+
+def _ensure_background(server):
+    """Start the background-owner process, or restart it if it has exited."""
+    global _background
+    if os.getenv("SKIP_STARTUP", "").lower() in ("1", "true", "yes", "on"):
+        return
+    if _background is not None and _background.poll() is None:
+        return
+    if _background is not None:
+        # The arbiter reaps every child, so the exit status is usually lost here
+        server.log.warning("Background owner (pid %d) is gone; restarting", _background.pid)
+    _background = subprocess.Popen(BACKGROUND_CMD, cwd=os.path.dirname(os.path.abspath(__file__)))
+    server.log.info("Background owner started (pid %d)", _background.pid)
+
+
+def when_ready(server):
+    _ensure_background(server)
+
+
+def pre_fork(server, worker):
+    # Master side, on every worker (re)spawn: a cheap liveness check
+    if _background is not None:
+        _ensure_background(server)
+
+
+def on_exit(server):
+    if _background is not None and _background.poll() is None:
+        _background.terminate()
+        try:
+            _background.wait(timeout=graceful_timeout)
+        except subprocess.TimeoutExpired:
+            _background.kill()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the (preloaded) app is available
+    from app import on_worker_start
+    on_worker_start()
+
+
+def worker_exit(server, worker):
+    # Commit any write-behind records before the worker process goes away
+    from app import on_worker_exit
+    on_worker_exit()
@@ -0,0 +1,167 @@
+# history.py — generation history: keyset pagination + SQLite FTS5 search over records
+from __future__ import annotations
+import base64
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger("mymuse")
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE = 100
+PREVIEW_CHARS = 240
+
+# Composite indexes for the two listing orders; created here as well as in
+# models.Record so databases created before they existed pick them up.
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_records_user_created ON records (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_records_product_created ON records (product_name, created_at)",
+]
+
+# External-content FTS5 table over a view that decodes the content-addressed
+# texts (mm_text is registered per connection by text_store). Triggers keep
+# the index in step with every insert/update/delete on records.
+_FTS = [
+    """CREATE VIEW IF NOT EXISTS records_fts_src AS
+        SELECT r.id AS id, r.product_name AS product_name,
+               mm_text(t.codec, t.body) AS transcript, mm_text(g.codec, g.body) AS generated_text
+        FROM records r
+        JOIN texts t ON t.hash = r.transcript_hash
+        JOIN texts g ON g.hash = r.generated_hash""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+        product_name, transcript, generated_text,
+        content='records_fts_src', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS records_fts_ai AFTER INSERT ON records BEGIN
+        INSERT INTO records_fts(rowid, product_name, transcript, generated_text)
+        SELECT id, product_name, transcript, generated_text FROM records_fts_src WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS records_fts_ad AFTER DELETE ON records BEGIN
+        INSERT INTO records_fts(records_fts, rowid, product_name, transcript, generated_text)
+        VALUES ('delete', old.id, old.product_name,
+                (SELECT mm_text(codec, body) FROM texts WHERE hash = old.transcript_hash),
+                (SELECT mm_text(codec, body) FROM texts WHERE hash = old.generated_hash));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS records_fts_au AFTER UPDATE ON records BEGIN
+        INSERT INTO records_fts(records_fts, rowid, product_name, transcript, generated_text)
+        VALUES ('delete', old.id, old.product_name,
+                (SELECT mm_text(codec, body) FROM texts WHERE hash = old.transcript_hash),
+                (SELECT mm_text(codec, body) FROM texts WHERE hash = old.generated_hash));
+        INSERT INTO records_fts(rowid, product_name, transcript, generated_text)
+        SELECT id, product_name, transcript, generated_text FROM records_fts_src WHERE id = new.id;
+    END""",
+]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def has_fts(engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_history_schema(engine) -> None:
+    """Idempotent: indexes everywhere, FTS5 table + triggers on SQLite (backfilled once)."""
+    with engine.begin() as conn:
+        for stmt in _INDEXES:
+            conn.execute(text(stmt))
+        if not has_fts(engine):
+            return
+        existed = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='records_fts'")).first()
+        try:
+            for stmt in _FTS:
+                conn.execute(text(stmt))
+        except Exception as e:
+            logger.warning("History search unavailable (FTS5 not compiled in?): %s", e)
+            return
+        if not existed:
+            conn.execute(text("INSERT INTO records_fts(records_fts) VALUES ('rebuild')"))
+            logger.info("Built records_fts search index")
+
+
+def fts_query(q: str) -> Optional[str]:
+    """User text -> safe FTS5 query: every word must match, last one as a prefix
+    ("airport Dive+" -> '"airport" "dive"*').
+    """
+    tokens = _TOKEN.findall((q or "").lower())
+    if not tokens:
+        return None
+    parts = [f'"{t}"' for t in tokens]
+    parts[-1] += "*"
+    return " ".join(parts)
+
+
+# --------------- Keyset cursors ---------------
+def encode_cursor(created_at: Any, rec_id: int) -> str:
+    ts = created_at.isoformat() if isinstance(created_at, datetime) else str(created_at)
+    return base64.urlsafe_b64encode(f"{ts}|{rec_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, rec_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(rec_id)
+    except Exception:
+        return None
+
+
+def query_history(session, Record, *, user_id: Optional[int] = None, product: Optional[str] = None,
+                  q: Optional[str] = None, cursor: Optional[str] = None,
+                  limit: int = HISTORY_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    One page of history, newest first. Ordering is (created_at, id) DESC and
+    the cursor is the last row's pair, so every page is an index range scan
+    no matter how deep. Rows carry previews only; fetch full text by id.
+    """
+    from sqlalchemy import and_, or_
+    import text_store
+
+    limit = max(1, min(int(limit or HISTORY_PAGE_SIZE), HISTORY_MAX_PAGE))
+    # Only the narrow record columns; texts are fetched for this page alone
+    query = session.query(Record.id, Record.user_id, Record.product_name, Record.created_at,
+                          Record.transcript_hash, Record.generated_hash)
+    if user_id is not None:
+        query = query.filter(Record.user_id == user_id)
+    if product:
+        query = query.filter(Record.product_name == product)
+    if q:
+        bind = session.get_bind()
+        match = fts_query(q)
+        if match is None:
+            return {"items": [], "next_cursor": None}
+        if has_fts(bind):
+            query = query.filter(Record.id.in_(
+                text("SELECT rowid FROM records_fts WHERE records_fts MATCH :match").bindparams(match=match)
+            ))
+        else:
+            # Texts may be compressed, so without FTS only product names are searchable
+            for tok in _TOKEN.findall(q.lower()):
+                query = query.filter(Record.product_name.ilike(f"%{tok}%"))
+    after = decode_cursor(cursor)
+    if after:
+        ts, rec_id = after
+        query = query.filter(or_(Record.created_at < ts, and_(Record.created_at == ts, Record.id < rec_id)))
+
+    rows = query.order_by(Record.created_at.desc(), Record.id.desc()).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    texts = text_store.load_many(session, [h for r in rows for h in (r.transcript_hash, r.generated_hash)])
+    items: List[Dict[str, Any]] = [{
+        "id": r.id,
+        "user_id": r.user_id,
+        "product_name": r.product_name,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+        "transcript_preview": texts.get(r.transcript_hash, "")[:PREVIEW_CHARS],
+        "generated_preview": texts.get(r.generated_hash, "")[:PREVIEW_CHARS],
+    } for r in rows]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if more and rows else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+__all__ = ["ensure_history_schema", "query_history", "fts_query", "encode_cursor",
+           "decode_cursor", "HISTORY_PAGE_SIZE"]
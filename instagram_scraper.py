@@ -1,6 +1,6 @@
 # instagram_scraper.py — Instagram content extraction for MyMuse training data
 from __future__ import annotations
-import os, csv, tempfile, logging
+import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -13,12 +13,9 @@ def scrape_instagram_posts(username: str, product_name: str, max_posts: int = 50
     """
     try:
         # Import selenium components
-        from selenium import webdriver
         from selenium.webdriver.common.by import By
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
         from selenium.common.exceptions import TimeoutException, WebDriverException
     except ImportError:
         logger.warning("Selenium not available for Instagram scraping")
@@ -30,20 +27,10 @@ def scrape_instagram_posts(username: str, product_name: str, max_posts: int = 50
         }
     
     try:
-        # Set up Chrome options for headless scraping
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        # Initialize driver
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(30)
-        
-        try:
+        from driver_pool import get_pool
+
+        # Warm browser from the shared pool; the lease is a fresh tab
+        with get_pool("chrome").lease() as driver:
             # Navigate to Instagram profile
             profile_url = f"https://www.instagram.com/{username}/"
             logger.info(f"Scraping Instagram profile: {profile_url}")
@@ -112,27 +99,20 @@ def scrape_instagram_posts(username: str, product_name: str, max_posts: int = 50
             
             logger.info(f"Successfully extracted {posts_found} posts from Instagram")
             
-            # Save to CSV
+            # Append only posts not seen before to the shared training store
             if posts_data:
-                timestamp = int(datetime.now().timestamp())
-                csv_filename = f"mymuse_instagram_{username}_{timestamp}.csv"
-                csv_path = os.path.join("data", csv_filename)
-                
-                # Ensure data directory exists
-                os.makedirs("data", exist_ok=True)
+                from scrape_store import ScrapeStore
+                store = ScrapeStore()
+                new_rows = store.add_rows(posts_data, source_url=profile_url)
                 
-                with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = ["product_name", "text", "source", "username", "scraped_at"]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(posts_data)
-                
-                logger.info(f"Saved {len(posts_data)} Instagram posts to {csv_path}")
+                logger.info(f"Saved {len(new_rows)} new of {len(posts_data)} Instagram posts to {store.path}")
                 
                 return {
                     "success": True,
-                    "csv_path": csv_path,
+                    "csv_path": store.path,
                     "training_examples": len(posts_data),
+                    "new_examples": len(new_rows),
+                    "new_rows": new_rows,
                     "username": username,
                     "message": f"Successfully scraped {len(posts_data)} posts from @{username}"
                 }
@@ -143,9 +123,6 @@ def scrape_instagram_posts(username: str, product_name: str, max_posts: int = 50
                     "csv_path": None,
                     "training_examples": 0
                 }
-                
-        finally:
-            driver.quit()
             
     except TimeoutException:
         logger.error("Timeout while scraping Instagram")
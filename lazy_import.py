@@ -0,0 +1,68 @@
+# lazy_import.py — stand-ins for `from module import name` that import on first use
+from __future__ import annotations
+import importlib
+import logging
+import threading
+from typing import Any
+
+logger = logging.getLogger("mymuse")
+
+_RAISE = object()
+
+
+class LazyAttr:
+    """Resolves `module.name` the first time it is called or an attribute is
+    read, so importing app.py doesn't pay for sklearn / faster-whisper /
+    selenium up front. Import failures fall back to `fallback` (logged once);
+    without a fallback the ImportError propagates to the caller.
+
+        generate = LazyAttr("generate", "generate")
+        generate(...)            # imports generate.py here
+        ReviewIndex.loaded       # True once resolved (never triggers the import)
+    """
+
+    __slots__ = ("_module", "_name", "_fallback", "_target", "_lock")
+    _UNSET = object()
+
+    def __init__(self, module: str, name: str, fallback: Any = _RAISE):
+        self._module = module
+        self._name = name
+        self._fallback = fallback
+        self._target = LazyAttr._UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not LazyAttr._UNSET
+
+    def resolve(self) -> Any:
+        target = self._target
+        if target is not LazyAttr._UNSET:
+            return target
+        with self._lock:
+            if self._target is LazyAttr._UNSET:
+                try:
+                    self._target = getattr(importlib.import_module(self._module), self._name)
+                except Exception as e:
+                    if self._fallback is _RAISE:
+                        raise
+                    logger.warning("%s.%s not available: %s", self._module, self._name, e)
+                    self._target = self._fallback
+            return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr: str):
+        return getattr(self.resolve(), attr)
+
+    def __bool__(self) -> bool:
+        # `if scrape_and_train:` keeps working for optional modules
+        return self.resolve() is not None
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyAttr {self._module}.{self._name} ({state})>"
+
+
+__all__ = ["LazyAttr"]
@@ -0,0 +1,436 @@
+# metrics.py — counters, gauges and fixed-bucket histograms in Prometheus text format
+from __future__ import annotations
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import tracing
+
+logger = logging.getLogger("mymuse")
+
+# Multiprocess mode: every process dumps its values to <dir>/<pid>.json and
+# /metrics sums the files, so any gunicorn worker can answer a scrape.
+# Unset (dev server / tests): a single process renders straight from memory.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_S = float(os.getenv("METRICS_FLUSH_S", "1.0"))
+_ARCHIVE = "archive.json"  # totals of workers that have exited
+
+# Seconds. Stage timings span ~1ms (cache hits) to minutes (long Reels through whisper)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+
+_lock = threading.Lock()
+_metrics: Dict[str, "_Metric"] = {}
+_collectors: List[Callable[[], None]] = []
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, object] = {}
+        with _lock:
+            if name in _metrics:
+                raise ValueError(f"metric {name} already registered")
+            _metrics[name] = self
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def labels(self, **labels) -> "_Child":
+        return _Child(self, self._key(labels))
+
+    def _reset(self) -> None:
+        self._values = {}
+
+
+class _Child:
+    """A metric bound to one label set (what .labels(...) returns)."""
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: _Metric, key: LabelKey):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, amount)
+
+    def set(self, value: float) -> None:
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float) -> None:
+        self._metric._observe(self._key, value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._inc((), amount)
+
+    def _inc(self, key: LabelKey, amount: float) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        _touch()
+
+
+class Gauge(_Metric):
+    """Point-in-time value. Across processes the live workers' values are summed."""
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+    def _set(self, key: LabelKey, value: float) -> None:
+        with _lock:
+            self._values[key] = float(value)
+        _touch()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        self._observe((), value)
+
+    def _observe(self, key: LabelKey, value: float) -> None:
+        # Per-bucket (non-cumulative) counts, then sum and count
+        i = next((n for n, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with _lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            v[i] += 1
+            v[-2] += value
+            v[-1] += 1
+        _touch()
+
+
+# --------------- Collectors ---------------
+def register_collector(fn: Callable[[], None]) -> Callable[[], None]:
+    """fn() runs before every dump/render, for values that are cheaper to read
+    than to track (queue depths, lru_cache stats).
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def watch_lru(cache: str, fn) -> None:
+    """Feed a functools.lru_cache's hits/misses into mymuse_cache_requests_total."""
+    last = {"hits": 0, "misses": 0}
+
+    def collect():
+        info = fn.cache_info()
+        for result, now in (("hit", info.hits), ("miss", info.misses)):
+            field = "hits" if result == "hit" else "misses"
+            delta = now - last[field] if now >= last[field] else now  # cache_clear() resets
+            last[field] = now
+            if delta:
+                CACHE_REQUESTS.labels(cache=cache, result=result).inc(delta)
+
+    register_collector(collect)
+
+
+def _collect() -> None:
+    for fn in list(_collectors):
+        try:
+            fn()
+        except Exception as e:
+            logger.debug("metrics collector failed: %s", e)
+
+
+# --------------- Exposition ---------------
+def _snapshot() -> Dict[str, Dict[str, object]]:
+    with _lock:
+        return {m.name: {json.dumps(k): (list(v) if isinstance(v, list) else v) for k, v in m._values.items()}
+                for m in _metrics.values()}
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(x: float) -> str:
+    x = float(x)
+    if math.isinf(x):
+        return "+Inf" if x > 0 else "-Inf"
+    return str(int(x)) if x.is_integer() and abs(x) < 1e15 else repr(x)
+
+
+def _labelstr(names: Tuple[str, ...], values: List[str], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _render(values: Dict[str, Dict[str, object]]) -> str:
+    out: List[str] = []
+    for name in sorted(_metrics):
+        m = _metrics[name]
+        out.append(f"# HELP {name} {m.doc}")
+        out.append(f"# TYPE {name} {m.kind}")
+        for key in sorted(values.get(name, {})):
+            labels = json.loads(key)
+            v = values[name][key]
+            if m.kind == "histogram":
+                cum = 0
+                for b, n in zip(list(m.buckets) + [math.inf], v[:-2]):
+                    cum += n
+                    le = 'le="%s"' % _fmt(b)
+                    out.append(f"{name}_bucket{_labelstr(m.labelnames, labels, le)} {cum}")
+                out.append(f"{name}_sum{_labelstr(m.labelnames, labels)} {_fmt(v[-2])}")
+                out.append(f"{name}_count{_labelstr(m.labelnames, labels)} {int(v[-1])}")
+            else:
+                out.append(f"{name}{_labelstr(m.labelnames, labels)} {_fmt(v)}")
+    return "\n".join(out) + "\n"
+
+
+def _merge(into: Dict[str, Dict[str, object]], values: Dict[str, Dict[str, object]], gauges: bool) -> None:
+    for name, series in values.items():
+        m = _metrics.get(name)
+        if m is None or (m.kind == "gauge" and not gauges):
+            continue
+        dst = into.setdefault(name, {})
+        for key, v in series.items():
+            if isinstance(v, list):
+                cur = dst.get(key)
+                if cur is None or len(cur) != len(v):
+                    dst[key] = list(v)
+                else:
+                    dst[key] = [a + b for a, b in zip(cur, v)]
+            else:
+                dst[key] = dst.get(key, 0.0) + v
+
+
+def render() -> str:
+    """Everything in Prometheus text exposition format (0.0.4)."""
+    _collect()
+    if not METRICS_DIR:
+        return _render(_snapshot())
+    _dump()
+    total: Dict[str, Dict[str, object]] = {}
+    for path, data in _read_dir():
+        pid = data.get("pid")
+        _merge(total, data.get("values", {}), gauges=pid is not None and _alive(pid))
+    return _render(total)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# --------------- Multiprocess files ---------------
+_state = {"pid": None, "dirty": False, "thread": None, "closed": False}
+
+
+def _path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"{pid}.json")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _read_dir():
+    try:
+        names = os.listdir(METRICS_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(METRICS_DIR, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                yield path, json.load(f)
+        except (OSError, ValueError):
+            continue  # mid-rename or already folded away
+
+
+def _write_json(path: str, data: Dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _dump() -> None:
+    if not METRICS_DIR or _state["closed"]:
+        return
+    _collect()
+    _state["dirty"] = False
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_json(_path(os.getpid()), {"pid": os.getpid(), "values": _snapshot()})
+    except OSError as e:
+        logger.warning("metrics dump failed: %s", e)
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(METRICS_FLUSH_S)
+        if _state["dirty"]:
+            _dump()
+
+
+def _touch() -> None:
+    _state["dirty"] = True
+    if METRICS_DIR and _state["pid"] != os.getpid():
+        with _lock:
+            if _state["pid"] != os.getpid():
+                # A previous process with this pid left its totals behind: keep them
+                _fold(_path(os.getpid()))
+                t = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+                t.start()
+                _state.update(pid=os.getpid(), thread=t)
+
+
+def _fold(path: str) -> None:
+    """Move a dead process's counters/histograms into the archive file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    archive_path = os.path.join(METRICS_DIR, _ARCHIVE)
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    with open(os.path.join(METRICS_DIR, ".archive.lock"), "a") as lk:
+        if fcntl:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+        try:
+            with open(archive_path, "r", encoding="utf-8") as f:
+                archive = json.load(f)
+        except (OSError, ValueError):
+            archive = {"pid": None, "values": {}}
+        _merge(archive["values"], data.get("values", {}), gauges=False)
+        _write_json(archive_path, archive)
+        os.remove(path)
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Final dump for `pid` (default: this process) folded into the archive.
+    gunicorn's worker_exit hook calls this so restarts keep the totals.
+    """
+    if not METRICS_DIR:
+        return
+    pid = pid or os.getpid()
+    if pid == os.getpid():
+        _dump()
+        _state["closed"] = True  # nothing after this may re-create the file
+    _fold(_path(pid))
+
+
+def reset_dir() -> None:
+    """Start from zero (gunicorn master, before forking workers)."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith((".json", ".tmp")):
+            try:
+                os.remove(os.path.join(METRICS_DIR, name))
+            except OSError:
+                pass
+
+
+def _after_fork() -> None:
+    # Values inherited from the preloaded master were never this worker's
+    for m in list(_metrics.values()):
+        m._reset()
+    _state.update(pid=None, dirty=False, thread=None, closed=False)
+
+
+def _dump_at_exit() -> None:
+    if _state["pid"] == os.getpid():
+        _dump()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+atexit.register(_dump_at_exit)
+
+
+# --------------- The app's metrics ---------------
+HTTP_REQUESTS = Counter("mymuse_http_requests_total", "HTTP requests by endpoint and status.",
+                        ("endpoint", "method", "status"))
+HTTP_LATENCY = Histogram("mymuse_http_request_seconds", "HTTP request latency.", ("endpoint",))
+STAGE_SECONDS = Histogram("mymuse_stage_seconds", "Pipeline stage latency.", ("stage",))
+STAGE_ERRORS = Counter("mymuse_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+LLM_REQUESTS = Counter("mymuse_llm_requests_total", "LLM calls by provider and outcome.", ("provider", "outcome"))
+LLM_SECONDS = Histogram("mymuse_llm_request_seconds", "LLM call latency.", ("provider",))
+CACHE_REQUESTS = Counter("mymuse_cache_requests_total", "Cache lookups by cache and hit/miss.", ("cache", "result"))
+QUEUE_DEPTH = Gauge("mymuse_queue_depth", "Items waiting in in-process queues.", ("queue",))
+ERRORS = Counter("mymuse_errors_total", "Handled errors by kind.", ("kind",))
+
+
+@contextmanager
+def stage(name: str):
+    """Time one pipeline stage: with stage("whisper"): ... (also a trace span).
+    Works as a decorator too.
+    """
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(name):
+            yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage=name).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=name).observe(time.perf_counter() - t0)
+
+
+def llm_call(provider: str):
+    """Decorator for provider callers that return text or None on failure."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            outcome = "error"
+            try:
+                with tracing.span(f"llm.{provider}", call=fn.__name__):
+                    result = fn(*args, **kwargs)
+                outcome = "ok" if result else "empty"
+                return result
+            finally:
+                LLM_SECONDS.labels(provider=provider).observe(time.perf_counter() - t0)
+                LLM_REQUESTS.labels(provider=provider, outcome=outcome).inc()
+        return wrapper
+    return deco
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+__all__ = ["Counter", "Gauge", "Histogram", "render", "register_collector", "watch_lru", "stage",
+           "llm_call", "cache_result", "mark_process_dead", "reset_dir", "CONTENT_TYPE",
+           "HTTP_REQUESTS", "HTTP_LATENCY", "STAGE_SECONDS", "STAGE_ERRORS", "LLM_REQUESTS",
+           "LLM_SECONDS", "CACHE_REQUESTS", "QUEUE_DEPTH", "ERRORS", "METRICS_DIR"]
@@ -0,0 +1,143 @@
+# minhash.py — MinHash signatures + LSH banding for near-duplicate text
+from __future__ import annotations
+import re
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+NUM_PERM = 64            # signature length
+LSH_BANDS = 16           # 16 bands x 4 rows → candidate threshold ≈ 0.5 Jaccard
+SHINGLE_SIZE = 3         # word 3-grams
+NEAR_DUP_THRESHOLD = 0.7 # estimated Jaccard at which two texts are "the same script"
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.uint64((1 << 31) - 1)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Fixed seed: signatures must be comparable across processes and restarts
+_rng = np.random.RandomState(20250819)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> np.ndarray:
+    """Stable 32-bit hashes of the word k-grams in `text` (deduplicated)."""
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    if len(tokens) < k:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    hashes = {zlib.crc32(g.encode("utf-8")) for g in grams}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def signature(text: str, k: int = SHINGLE_SIZE) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint64 values) of the text's word k-shingles.
+    Empty texts get an all-max signature so they only collide with each other.
+    """
+    return signature_from_shingles(shingles(text, k))
+
+
+def signature_from_shingles(x: np.ndarray) -> np.ndarray:
+    if x.size == 0:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    # (a*x + b) mod p for every permutation/shingle pair; a < 2^31 and x < 2^32 keep this inside uint64
+    hashed = (np.outer(_PERM_A, x) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return hashed.min(axis=1)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.count_nonzero(sig_a == sig_b)) / float(len(sig_a))
+
+
+class MinHashLSH:
+    """
+    Banded LSH over MinHash signatures.
+    Use:
+      lsh = MinHashLSH()
+      lsh.insert(key, signature(text))
+      lsh.query(signature(other))   # → keys sharing at least one band bucket
+    """
+
+    def __init__(self, bands: int = LSH_BANDS):
+        if NUM_PERM % bands:
+            raise ValueError(f"bands must divide NUM_PERM ({NUM_PERM})")
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets: List[Dict[bytes, List]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, sig: np.ndarray) -> Iterable[bytes]:
+        for b in range(self.bands):
+            yield sig[b * self.rows:(b + 1) * self.rows].tobytes()
+
+    def insert(self, key, sig: np.ndarray) -> None:
+        for bucket, band_key in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(band_key, []).append(key)
+
+    def query(self, sig: np.ndarray) -> Set:
+        found: Set = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(sig)):
+            found.update(bucket.get(band_key, ()))
+        return found
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._buckets[0].values()) if self._buckets else 0
+
+
+def cluster_near_duplicates(texts: Sequence[str], threshold: float = NEAR_DUP_THRESHOLD) -> List[List[int]]:
+    """Group indices of near-duplicate texts. Linear in len(texts): each text is
+    bucketed once and only bucket-mates are verified against the threshold.
+    """
+    sigs = [signature(t) for t in texts]
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    lsh = MinHashLSH()
+    for i, sig in enumerate(sigs):
+        for j in lsh.query(sig):
+            if estimate_jaccard(sig, sigs[j]) >= threshold:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+        lsh.insert(i, sig)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def dedupe_near_duplicates(items: Sequence[T],
+                           text_of: Callable[[T], str],
+                           score_of: Optional[Callable[[T], float]] = None,
+                           threshold: float = NEAR_DUP_THRESHOLD) -> List[T]:
+    """Keep the best-scoring member of every near-duplicate cluster.
+    Ties (or no scorer) keep the earliest item; output follows input order.
+    """
+    if not items:
+        return []
+    clusters = cluster_near_duplicates([text_of(it) or "" for it in items], threshold)
+    keep: List[int] = []
+    for members in clusters:
+        if score_of is None:
+            keep.append(members[0])
+        else:
+            keep.append(max(members, key=lambda i: (float(score_of(items[i])), -i)))
+    return [items[i] for i in sorted(keep)]
+
+
+__all__ = [
+    "NUM_PERM", "LSH_BANDS", "NEAR_DUP_THRESHOLD",
+    "shingles", "signature", "signature_from_shingles", "estimate_jaccard",
+    "MinHashLSH", "cluster_near_duplicates", "dedupe_near_duplicates",
+]
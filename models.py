@@ -3,6 +3,7 @@ from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from extensions import db
+import text_store
 
 # --------------------
 # User Model (aligned with app.py expectations)
@@ -22,6 +23,22 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+# --------------------
+# Text Model: content-addressed bodies for large record texts (see text_store.py)
+# --------------------
+class Text(db.Model):
+    __tablename__ = "texts"
+    hash = db.Column(db.String(64), primary_key=True)           # sha256 of the utf-8 text
+    codec = db.Column(db.String(8), nullable=False, default="raw")
+    size = db.Column(db.Integer, nullable=False)                # uncompressed bytes
+    body = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def value(self) -> str:
+        return text_store.decode(self.codec, self.body)
+
+
 # --------------------
 # Record Model (aligned with how app.py saves records)
 # --------------------
@@ -30,8 +47,26 @@ class Record(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     product_name = db.Column(db.String(255), nullable=False)
-    transcript = db.Column(db.Text, nullable=False)
-    generated_text = db.Column(db.Text, nullable=False)
+    # Texts live once in `texts`; regenerating the same Reel only adds a small row here
+    transcript_hash = db.Column(db.String(64), db.ForeignKey("texts.hash"), nullable=False)
+    generated_hash = db.Column(db.String(64), db.ForeignKey("texts.hash"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship("User", backref=db.backref("records", lazy=True))
+    # Loaded only when the text is actually read
+    transcript_row = db.relationship(Text, foreign_keys=[transcript_hash], lazy="select")
+    generated_row = db.relationship(Text, foreign_keys=[generated_hash], lazy="select")
+
+    # History listings: per user and per product, newest first (see history.py)
+    __table_args__ = (
+        db.Index("ix_records_user_created", "user_id", "created_at"),
+        db.Index("ix_records_product_created", "product_name", "created_at"),
+    )
+
+    @property
+    def transcript(self) -> str:
+        return self.transcript_row.value if self.transcript_row else ""
+
+    @property
+    def generated_text(self) -> str:
+        return self.generated_row.value if self.generated_row else ""
@@ -1,10 +1,13 @@
 from __future__ import annotations
+import os
 import re
 import time
 import logging
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
+from page_waits import settle
+
 # Import Selenium components at the top level
 try:
     from selenium import webdriver
@@ -20,6 +23,9 @@ except ImportError:
 
 logger = logging.getLogger("mymuse")
 
+# Product pages crawled for reviews per scrape (static pass first, Selenium only for empty pages); 0 disables
+PRODUCT_CRAWL_LIMIT = int(os.getenv("PRODUCT_CRAWL_LIMIT", "200"))
+
 @dataclass
 class MyMuseProduct:
     name: str
@@ -71,7 +77,7 @@ def _handle_age_verification(driver):
                     if any(age_text in button_text for age_text in ['yes', '21+', '21', 'older']):
                         logger.info("Found age verification button, clicking...")
                         button.click()
-                        time.sleep(2)
+                        settle(driver, 2)
                         return True
             except Exception:
                 continue
@@ -86,7 +92,7 @@ def _handle_age_verification(driver):
                     if len(text) < 20 and any(word in text.lower() for word in ['yes', '21', 'older', 'continue']):
                         logger.info(f"Trying age verification button: {text}")
                         button.click()
-                        time.sleep(2)
+                        settle(driver, 2)
                         return True
                 except Exception:
                     continue
@@ -109,68 +115,62 @@ def scrape_mymuse_website(url: str = "https://mymuse.in/collections/deal-of-the-
     if not SELENIUM_AVAILABLE:
         return None
 
-    driver = None
     try:
-        # Setup Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        logger.info(f"Starting scrape of {url}")
-        driver.get(url)
-        
-        # Wait for page to load
-        time.sleep(5)
-        
-        # Handle age verification
-        _handle_age_verification(driver)
-        
-        # Wait a bit more for page to fully load
-        time.sleep(3)
-        
-        # Log page title for debugging
-        page_title = driver.title
-        logger.info(f"Page title: {page_title}")
-        
-        # Extract products
-        products = _extract_products(driver)
-        logger.info(f"Found {len(products)} products")
-        
-        # Extract reviews
-        reviews = _extract_reviews(driver)
-        logger.info(f"Found {len(reviews)} reviews")
-        
-        # Extract categories
-        categories = _extract_categories(driver)
-        logger.info(f"Found {len(categories)} categories")
-        
-        # Extract testimonials
-        testimonials = _extract_testimonials(driver)
-        logger.info(f"Found {len(testimonials)} testimonials")
-        
-        # Create website data object
-        website_data = MyMuseWebsiteData(
-            products=products,
-            reviews=reviews,
-            categories=categories,
-            testimonials=testimonials,
-            total_items=len(products) + len(reviews) + len(testimonials)
-        )
-        
-        logger.info(f"Successfully scraped MyMuse website: {website_data.total_items} total items")
-        return website_data
-        
+        from driver_pool import get_pool
+
+        # Warm browser from the shared pool; the lease is a fresh tab
+        with get_pool("chrome").lease() as driver:
+            return _scrape_page(driver, url)
+
     except Exception as e:
         logger.error(f"Failed to scrape MyMuse website: {e}")
         return None
-    finally:
-        if driver:
-            driver.quit()
+
+
+def _scrape_page(driver, url: str) -> MyMuseWebsiteData:
+    logger.info(f"Starting scrape of {url}")
+    driver.get(url)
+
+    # Wait for page to load (fast mode: until DOM and network go quiet)
+    settle(driver, 5)
+
+    # Handle age verification
+    _handle_age_verification(driver)
+
+    # Wait a bit more for page to fully load
+    settle(driver, 3)
+
+    # Log page title for debugging
+    page_title = driver.title
+    logger.info(f"Page title: {page_title}")
+
+    # Extract products
+    products = _extract_products(driver)
+    logger.info(f"Found {len(products)} products")
+
+    # Extract reviews
+    reviews = _extract_reviews(driver)
+    logger.info(f"Found {len(reviews)} reviews")
+
+    # Extract categories
+    categories = _extract_categories(driver)
+    logger.info(f"Found {len(categories)} categories")
+
+    # Extract testimonials
+    testimonials = _extract_testimonials(driver)
+    logger.info(f"Found {len(testimonials)} testimonials")
+
+    # Create website data object
+    website_data = MyMuseWebsiteData(
+        products=products,
+        reviews=reviews,
+        categories=categories,
+        testimonials=testimonials,
+        total_items=len(products) + len(reviews) + len(testimonials)
+    )
+
+    logger.info(f"Successfully scraped MyMuse website: {website_data.total_items} total items")
+    return website_data
 
 
 def _extract_products(driver) -> List[MyMuseProduct]:
@@ -618,7 +618,7 @@ def convert_to_training_data(website_data: MyMuseWebsiteData, product_name: str
             training_data.append({
                 "product_name": product_name,
                 "text": f"Review: {review.text}",
-                "source": f"website_review_{review.author.lower().replace(' ', '_')}",
+                "source": f"website_review_{(review.author or review.product).lower().replace(' ', '_')}",
                 "engagement": 0,
                 "hashtags": []
             })
@@ -660,6 +660,31 @@ def save_training_data(training_data: List[Dict[str, str]], filename: str = "mym
     return filepath
 
 
+def crawl_product_reviews(url: str, products: List[MyMuseProduct],
+                          limit: int = PRODUCT_CRAWL_LIMIT) -> List[MyMuseReview]:
+    """Reviews from every product page in the shop's sitemap (falling back
+    to the product links on the scraped page), fetched concurrently."""
+    if limit <= 0:
+        return []
+    from urllib.parse import urlsplit
+    from static_fetcher import product_urls_from_sitemap, scrape_reviews_many
+
+    parts = urlsplit(url)
+    urls = product_urls_from_sitemap(f"{parts.scheme}://{parts.netloc}")
+    if not urls:
+        urls = list(dict.fromkeys(p.url for p in products if "/products/" in (p.url or "")))
+    urls = urls[:limit]
+    if not urls:
+        return []
+
+    reviews = []
+    for page, texts in scrape_reviews_many(urls).items():
+        handle = urlsplit(page).path.rstrip("/").rsplit("/", 1)[-1]
+        reviews += [MyMuseReview(author="", rating="", text=t, product=handle) for t in texts]
+    logger.info(f"Crawled {len(urls)} product pages: {len(reviews)} reviews")
+    return reviews
+
+
 def scrape_and_train(url: str = "https://mymuse.in/collections/deal-of-the-day", product_name: str = "mymuse") -> Dict[str, Any]:
     """
     Main function: scrape MyMuse website and convert to training data.
@@ -672,13 +697,23 @@ def scrape_and_train(url: str = "https://mymuse.in/collections/deal-of-the-day",
     if not website_data:
         return {"success": False, "error": "Failed to scrape website"}
     
+    # Product-page reviews the collection page doesn't show
+    try:
+        seen = {r.text for r in website_data.reviews}
+        crawled = [r for r in crawl_product_reviews(url, website_data.products) if r.text not in seen]
+        website_data.reviews.extend(crawled)
+    except Exception as e:
+        logger.warning(f"Product review crawl failed: {e}")
+    
     # Convert to training data
     training_data = convert_to_training_data(website_data, product_name)
     if not training_data:
         return {"success": False, "error": "No valid training data extracted"}
     
-    # Save to CSV
-    csv_path = save_training_data(training_data, f"mymuse_website_{int(time.time())}.csv")
+    # Append only rows not seen before to the shared training store
+    from scrape_store import ScrapeStore
+    store = ScrapeStore()
+    new_rows = store.add_rows(training_data, source_url=url)
     
     return {
         "success": True,
@@ -687,6 +722,8 @@ def scrape_and_train(url: str = "https://mymuse.in/collections/deal-of-the-day",
         "reviews_scraped": len(website_data.reviews),
         "testimonials_scraped": len(website_data.testimonials),
         "training_examples": len(training_data),
-        "csv_path": csv_path,
+        "new_examples": len(new_rows),
+        "new_rows": new_rows,
+        "csv_path": store.path,
         "categories": website_data.categories
     }
@@ -0,0 +1,218 @@
+# originality_memory.py — cross-request memory of shipped scripts for originality caps
+from __future__ import annotations
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from minhash import MinHashLSH, shingles, signature_from_shingles
+
+logger = logging.getLogger("mymuse")
+
+N_FEATURES = 2 ** 18
+FOURGRAM = 4
+
+
+class OriginalityMemory:
+    """
+    Incrementally updated index over every generated script we have saved
+    (Record.generated_text). Two structures back it:
+      - a sparse hashed TF-IDF matrix → cosine against all past scripts in one mat-vec
+      - a MinHash LSH index over word 4-grams → exact 4-gram overlap, but only for
+        LSH candidates (pairs below ~0.5 Jaccard are reported as no overlap)
+    Every worker keeps its own copy, so the records table is the shared history:
+    sync() loads whatever any worker saved since the last sync, and texts are
+    remembered once (a local add() and its later sync don't double count).
+    Use:
+      OriginalityMemory.sync(db.session)             # at boot, then maybe_sync() per generation request
+      OriginalityMemory.add(text)                    # after every saved record (cheap)
+      OriginalityMemory.max_similarity(script)       # → {"cosine": .., "fourgram": ..} or None
+    """
+    _lock = threading.RLock()
+    _hasher = HashingVectorizer(
+        n_features=N_FEATURES,
+        ngram_range=(1, 2),
+        alternate_sign=False,
+        norm=None,
+        stop_words="english",
+    )
+    _row_indices: List[np.ndarray] = []
+    _row_counts: List[np.ndarray] = []
+    _df = np.zeros(N_FEATURES, dtype=np.int64)
+    _fourgrams: List[np.ndarray] = []
+    _lsh = MinHashLSH()
+    # Weighted (l2-normalised TF-IDF) matrices. The base covers the first
+    # _base_rows docs with the idf frozen at its last rebuild; rows added since
+    # go into a small tail weighted with the same idf, so a save never forces a
+    # full rebuild. The base is rebuilt once the tail grows past REBUILD_FRACTION.
+    _base = None
+    _base_rows = 0
+    _tail = None
+    _idf: Optional[np.ndarray] = None
+    # Content digests already remembered, and the records-table position of the last sync
+    _seen: Set[bytes] = set()
+    _synced_id = 0
+    _synced_at = 0.0
+    _sync_lock = threading.Lock()
+
+    REBUILD_FRACTION = 0.10
+    REBUILD_MIN_ROWS = 256
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._row_indices, cls._row_counts, cls._fourgrams = [], [], []
+            cls._df = np.zeros(N_FEATURES, dtype=np.int64)
+            cls._lsh = MinHashLSH()
+            cls._base, cls._base_rows, cls._tail, cls._idf = None, 0, None, None
+            cls._seen, cls._synced_id, cls._synced_at = set(), 0, 0.0
+
+    @classmethod
+    def add(cls, text: str) -> None:
+        """Remember one shipped script."""
+        cls.add_many([text])
+
+    @classmethod
+    def add_many(cls, texts: Iterable[str]) -> int:
+        """Remember several scripts; hashing is done in one vectorizer call.
+        Texts already remembered are skipped."""
+        fresh: List[str] = []
+        with cls._lock:
+            for t in texts:
+                t = (t or "").strip()
+                key = hashlib.sha1(t.encode("utf-8")).digest()
+                if t and key not in cls._seen:
+                    cls._seen.add(key)
+                    fresh.append(t)
+        texts = fresh
+        if not texts:
+            return 0
+        counts = cls._hasher.transform(texts).tocsr()
+        grams = [np.sort(shingles(t, FOURGRAM)) for t in texts]
+        sigs = [signature_from_shingles(g) for g in grams]
+        with cls._lock:
+            for row, (g, sig) in enumerate(zip(grams, sigs)):
+                lo, hi = counts.indptr[row], counts.indptr[row + 1]
+                indices = counts.indices[lo:hi].astype(np.int32)
+                cls._row_indices.append(indices)
+                cls._row_counts.append(counts.data[lo:hi].astype(np.float32))
+                cls._df[indices] += 1
+                cls._lsh.insert(len(cls._fourgrams), sig)
+                cls._fourgrams.append(g)
+            cls._tail = None
+        return len(texts)
+
+    @classmethod
+    def load_texts(cls, texts: Iterable[str], chunk_size: int = 1000) -> Dict:
+        added = 0
+        chunk: List[str] = []
+        for t in texts:
+            chunk.append(t)
+            if len(chunk) >= chunk_size:
+                added += cls.add_many(chunk)
+                chunk = []
+        added += cls.add_many(chunk)
+        if added:
+            logger.info("OriginalityMemory loaded %d scripts", added)
+        return {"added": added, "total": cls.size()}
+
+    @classmethod
+    def sync(cls, session, chunk_size: int = 1000) -> int:
+        """Load the generated scripts of records saved (by any worker) since the last sync."""
+        from models import Record, Text
+        from text_store import decode
+
+        with cls._sync_lock:
+            cls._synced_at = time.monotonic()
+            rows = (session.query(Record.id, Text.codec, Text.body)
+                    .join(Text, Record.generated_hash == Text.hash)
+                    .filter(Record.id > cls._synced_id)
+                    .order_by(Record.id)
+                    .yield_per(chunk_size))
+
+            def texts():
+                for record_id, codec, body in rows:
+                    cls._synced_id = record_id
+                    yield decode(codec, body)
+
+            return cls.load_texts(texts(), chunk_size)["added"]
+
+    @classmethod
+    def maybe_sync(cls, session, check_every: float = 10.0) -> int:
+        """sync() at most every `check_every` seconds (cheap enough per request)."""
+        if time.monotonic() - cls._synced_at < check_every:
+            return 0
+        return cls.sync(session)
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._fourgrams)
+
+    @classmethod
+    def _weigh(cls, start: int, end: int, idf: np.ndarray):
+        """l2-normalised TF-IDF rows [start, end) with sublinear tf."""
+        rows_ix = cls._row_indices[start:end]
+        indptr = np.zeros(len(rows_ix) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(ix) for ix in rows_ix])
+        X = sparse.csr_matrix(
+            (np.concatenate(cls._row_counts[start:end]), np.concatenate(rows_ix), indptr),
+            shape=(len(rows_ix), N_FEATURES),
+        )
+        X.data = 1.0 + np.log(X.data)
+        return normalize(X @ sparse.diags(idf), norm="l2", copy=False).tocsr()
+
+    @classmethod
+    def _matrices(cls):
+        """Return (matrices to search, idf), rebuilding whatever is stale."""
+        with cls._lock:
+            n_docs = len(cls._row_indices)
+            pending = n_docs - cls._base_rows
+            if cls._base is None or pending > max(cls.REBUILD_MIN_ROWS, cls._base_rows * cls.REBUILD_FRACTION):
+                # Smoothed idf, same weighting as TfidfVectorizer(sublinear_tf=True)
+                cls._idf = (np.log((1.0 + n_docs) / (1.0 + cls._df)) + 1.0).astype(np.float32)
+                cls._base, cls._base_rows, cls._tail = cls._weigh(0, n_docs, cls._idf), n_docs, None
+            elif pending and cls._tail is None:
+                cls._tail = cls._weigh(cls._base_rows, n_docs, cls._idf)
+            mats = [m for m in (cls._base, cls._tail) if m is not None and m.shape[0]]
+            return mats, cls._idf
+
+    @classmethod
+    def max_similarity_many(cls, scripts: List[str]) -> List[Optional[Dict[str, float]]]:
+        """Highest cosine and 4-gram overlap of each script against everything
+        remembered so far. Returns None per script while the memory is empty.
+        """
+        if not scripts:
+            return []
+        if cls.size() == 0:
+            return [None for _ in scripts]
+        mats, idf = cls._matrices()
+
+        Q = cls._hasher.transform([s or "" for s in scripts]).tocsr().astype(np.float32)
+        Q.data = 1.0 + np.log(Q.data)
+        Q = normalize(Q @ sparse.diags(idf), norm="l2", copy=False).T.tocsc()
+        cosine_max = np.zeros(len(scripts), dtype=np.float32)
+        for m in mats:
+            cosine_max = np.maximum(cosine_max, np.asarray((m @ Q).max(axis=0).todense()).ravel())
+
+        out: List[Optional[Dict[str, float]]] = []
+        for script, cos in zip(scripts, cosine_max):
+            grams = shingles(script, FOURGRAM)
+            best = 0.0
+            if grams.size:
+                with cls._lock:
+                    candidates = [cls._fourgrams[i] for i in cls._lsh.query(signature_from_shingles(grams))]
+                for past in candidates:
+                    shared = np.intersect1d(grams, past, assume_unique=True).size
+                    best = max(best, shared / grams.size)
+            out.append({"cosine": float(cos), "fourgram": float(best)})
+        return out
+
+    @classmethod
+    def max_similarity(cls, script: str) -> Optional[Dict[str, float]]:
+        return cls.max_similarity_many([script])[0]
@@ -0,0 +1,145 @@
+# page_waits.py — fast scraping mode: block heavy resources and wait on page readiness, not fixed sleeps
+from __future__ import annotations
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("mymuse")
+
+# SCRAPE_FAST_MODE=0 restores the old fixed sleeps and full page loads
+SCRAPE_FAST_MODE = os.getenv("SCRAPE_FAST_MODE", "true").lower() in ("1", "true", "yes", "on")
+QUIET_MS = int(os.getenv("SCRAPE_QUIET_MS", "600"))          # no DOM mutations / requests for this long = ready
+WAIT_TIMEOUT = float(os.getenv("SCRAPE_WAIT_TIMEOUT", "12"))  # upper bound for waits with no legacy sleep
+POLL_SECONDS = 0.1
+
+# Nothing the text extractors read: images, fonts, media and third-party trackers
+BLOCKED_URL_PATTERNS: List[str] = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*clarity.ms*",
+    "*analytics.tiktok.com*", "*snap.licdn.com*", "*bat.bing.com*", "*cdn.mxpnl.com*",
+]
+
+# Installed on every new document (and lazily by the waits): tracks the last
+# DOM mutation, in-flight fetch/XHR and the last finished resource.
+WATCH_JS = r"""
+(function () {
+  if (window.__mmWatch) return;
+  const w = {lastMut: performance.now(), lastNet: performance.now(), inflight: 0, res: 0};
+  const observe = () => {
+    try {
+      new MutationObserver(() => { w.lastMut = performance.now(); })
+        .observe(document, {subtree: true, childList: true, characterData: true, attributes: true});
+    } catch (e) {}
+  };
+  observe();
+  const done = () => { w.inflight = Math.max(0, w.inflight - 1); w.lastNet = performance.now(); };
+  if (window.fetch) {
+    const f = window.fetch;
+    window.fetch = function () {
+      w.inflight++; w.lastNet = performance.now();
+      return f.apply(this, arguments).finally(done);
+    };
+  }
+  if (window.XMLHttpRequest) {
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+      w.inflight++; w.lastNet = performance.now();
+      this.addEventListener("loadend", done);
+      return send.apply(this, arguments);
+    };
+  }
+  w.state = function () {
+    const now = performance.now();
+    const res = performance.getEntriesByType("resource").length;
+    if (res !== w.res) { w.res = res; w.lastNet = now; }
+    return {ready: document.readyState, mutation_idle_ms: now - w.lastMut,
+            network_idle_ms: now - w.lastNet, inflight: w.inflight};
+  };
+  window.__mmWatch = w;
+})();
+"""
+_STATE_JS = WATCH_JS + "\nreturn window.__mmWatch.state();"
+
+
+def chrome_prefs() -> Dict:
+    """Chrome profile prefs for fast mode (images off at the renderer)."""
+    if not SCRAPE_FAST_MODE:
+        return {}
+    return {"profile.managed_default_content_settings.images": 2}
+
+
+def prepare_tab(driver) -> bool:
+    """Block heavy/third-party requests and install the readiness watcher for
+    every document this tab loads. CDP commands apply to the current tab, so
+    call it right after switching to a new one. No-op outside fast mode.
+    """
+    if not SCRAPE_FAST_MODE or not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": WATCH_JS})
+        return True
+    except Exception as e:
+        logger.debug(f"Fast-mode tab setup failed: {e}")
+        return False
+
+
+def page_state(driver) -> Optional[Dict]:
+    try:
+        return driver.execute_script(_STATE_JS)
+    except Exception:
+        return None
+
+
+def wait_quiet(driver, quiet_ms: int = QUIET_MS, timeout: float = WAIT_TIMEOUT,
+               network: bool = True) -> bool:
+    """Wait until the document is loaded, the DOM has stopped changing for
+    `quiet_ms` and (with `network`) no fetch/XHR is in flight and nothing has
+    finished loading for `quiet_ms`. Returns False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        st = page_state(driver)
+        if st and st.get("ready") == "complete" and st.get("mutation_idle_ms", 0) >= quiet_ms:
+            if not network or (st.get("inflight", 1) == 0 and st.get("network_idle_ms", 0) >= quiet_ms):
+                return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_SECONDS)
+
+
+def wait_for_growth(count: Callable[[], int], previous: int, timeout: float = WAIT_TIMEOUT) -> int:
+    """Poll `count()` until it exceeds `previous` (e.g. reviews after a
+    "load more" click). Returns the latest count; unchanged on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    current = previous
+    while True:
+        try:
+            current = count()
+        except Exception:
+            pass
+        if current > previous or time.monotonic() >= deadline:
+            return current
+        time.sleep(POLL_SECONDS)
+
+
+def settle(driver, fallback_seconds: float, quiet_ms: int = QUIET_MS,
+           timeout: Optional[float] = None) -> None:
+    """Fast mode: wait_quiet(), never longer than the legacy sleep it
+    replaces; otherwise the legacy fixed sleep."""
+    if SCRAPE_FAST_MODE:
+        cap = fallback_seconds if timeout is None else min(timeout, fallback_seconds)
+        if cap > 0:
+            wait_quiet(driver, quiet_ms=quiet_ms, timeout=cap)
+    else:
+        time.sleep(fallback_seconds)
+
+
+__all__ = ["SCRAPE_FAST_MODE", "BLOCKED_URL_PATTERNS", "chrome_prefs", "prepare_tab",
+           "page_state", "wait_quiet", "wait_for_growth", "settle"]
@@ -0,0 +1,114 @@
+# phrase_rules.py — precompiled phrase automata for brand-safety / banned-phrase passes
+from __future__ import annotations
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def phrase_pattern(phrase: str) -> str:
+    """Regex for a literal phrase: any run of whitespace between words, and no
+    word character directly before or after (so "cure" never hits "secure").
+    """
+    words = [re.escape(w) for w in phrase.split()]
+    return r"(?<!\w)" + r"\s+".join(words) + r"(?!\w)"
+
+
+class PhraseRules:
+    """
+    A named set of rules compiled into ONE case-insensitive alternation, so each
+    text is scanned once no matter how many rules there are. Every match is
+    attributed to its rule and counted.
+    Use:
+      RULES = PhraseRules("taglines", phrases=["trust your desires", ...])
+      RULES.sub(text)        # replace every hit with its rule's replacement
+      RULES.truncate(text)   # keep only what precedes the first hit
+      RULES.search(text)     # → rule name of the first hit, or None
+      RULES.hits()           # → {rule: count} since start/reset
+    Rules are (name, regex, replacement); literal phrases are turned into
+    word-boundary-aware regexes via phrase_pattern().
+    """
+
+    def __init__(self,
+                 name: str,
+                 phrases: Iterable[str] = (),
+                 patterns: Iterable[str] = (),
+                 replacement: str = "",
+                 rules: Iterable[Tuple[str, str, str]] = ()):
+        self.name = name
+        all_rules: List[Tuple[str, str, str]] = []
+        all_rules += [(p, phrase_pattern(p), replacement) for p in phrases]
+        all_rules += [(p, p, replacement) for p in patterns]
+        all_rules += list(rules)
+        if not all_rules:
+            raise ValueError(f"PhraseRules '{name}' needs at least one rule")
+        self.rules = [r[0] for r in all_rules]
+        self._replacements: Dict[str, str] = {}
+        groups = []
+        for i, (rule, regex, repl) in enumerate(all_rules):
+            group = f"r{i}"
+            self._replacements[group] = repl
+            groups.append(f"(?P<{group}>{regex})")
+        # Longest phrases first so overlapping rules prefer the more specific one
+        order = sorted(range(len(groups)), key=lambda i: -len(all_rules[i][0]))
+        self._regex = re.compile("|".join(groups[i] for i in order), re.IGNORECASE)
+        self._group_rule = {f"r{i}": r[0] for i, r in enumerate(all_rules)}
+        self._hits: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _rule_of(self, m: re.Match) -> str:
+        return self._group_rule[m.lastgroup]
+
+    def _count(self, rules: List[str]) -> None:
+        if rules:
+            with self._lock:
+                self._hits.update(rules)
+
+    def findall(self, text: str) -> List[Tuple[str, int, int]]:
+        """All hits as (rule, start, end)."""
+        found = [(self._rule_of(m), m.start(), m.end()) for m in self._regex.finditer(text or "")]
+        self._count([f[0] for f in found])
+        return found
+
+    def search(self, text: str) -> Optional[str]:
+        m = self._regex.search(text or "")
+        if not m:
+            return None
+        rule = self._rule_of(m)
+        self._count([rule])
+        return rule
+
+    def sub(self, text: str, replacement: Optional[str] = None) -> str:
+        """Replace every hit (rule replacement, or `replacement` for all) in one pass."""
+        if not text:
+            return text
+        matched: List[str] = []
+
+        def _repl(m: re.Match) -> str:
+            matched.append(self._rule_of(m))
+            return self._replacements[m.lastgroup] if replacement is None else replacement
+
+        out = self._regex.sub(_repl, text)
+        self._count(matched)
+        return out
+
+    def truncate(self, text: str, strip: str = ". ") -> str:
+        """Cut the text at the first hit (and trailing `strip` chars before it)."""
+        if not text:
+            return text
+        m = self._regex.search(text)
+        if not m:
+            return text
+        self._count([self._rule_of(m)])
+        return text[:m.start()].rstrip(strip).strip()
+
+    def hits(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._hits)
+
+    def reset_hits(self) -> None:
+        with self._lock:
+            self._hits.clear()
+
+
+__all__ = ["PhraseRules", "phrase_pattern"]
@@ -0,0 +1,178 @@
+# profiling.py — on-demand / sampled request profiling to logs/profiles (cProfile or stack sampling)
+from __future__ import annotations
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("mymuse")
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "profiles"))
+# On-demand: a request carrying this token (X-Profile header or ?profile=) is profiled.
+# Empty disables on-demand profiling entirely, so nobody can turn it on from outside.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))   # profile 1 in N requests; 0 = off
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile").lower()       # cprofile | sample
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # stack-sampling period
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))                # newest N profiles kept on disk
+PROFILE_EXTS = (".prof", ".txt", ".collapsed")
+
+_counter = itertools.count(1)
+
+
+def enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def wanted(token: Optional[str]) -> Optional[str]:
+    """Why this request should be profiled ("on-demand" / "sampled"), or None."""
+    if PROFILE_TOKEN and token and token == PROFILE_TOKEN:
+        return "on-demand"
+    if PROFILE_SAMPLE_RATE > 0 and next(_counter) % PROFILE_SAMPLE_RATE == 0:
+        return "sampled"
+    return None
+
+
+class _StackSampler:
+    """Samples one thread's stack every `interval` seconds into collapsed-stack
+    counts ("outer;inner;leaf N"), the input format of flamegraph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class Session:
+    """One profiled request: start() in before_request, stop() in after_request
+    (same thread). Writes the profile and returns its file name.
+    """
+
+    def __init__(self, reason: str, mode: str = ""):
+        self.reason = reason
+        self.mode = mode or PROFILE_MODE
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._t0 = 0.0
+
+    def start(self) -> "Session":
+        self._t0 = time.perf_counter()
+        if self.mode == "sample":
+            self._sampler = _StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000.0)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def stop(self, label: str) -> Optional[str]:
+        elapsed_ms = (time.perf_counter() - self._t0) * 1000.0
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            stem = "{}_{}_{}_{:.0f}ms".format(datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+                                              _safe(label), self.reason, elapsed_ms)
+            if self._profile is not None:
+                name = stem + ".prof"
+                self._profile.dump_stats(os.path.join(PROFILE_DIR, name))
+                with open(os.path.join(PROFILE_DIR, stem + ".txt"), "w", encoding="utf-8") as f:
+                    f.write(summary(self._profile))
+            else:
+                name = stem + ".collapsed"
+                with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+                    f.write(self._sampler.collapsed())
+            _prune()
+            logger.info("Profiled %s (%s, %.0f ms) -> %s", label, self.reason, elapsed_ms, name)
+            return name
+        except OSError as e:
+            logger.warning("Profile write failed: %s", e)
+            return None
+
+
+def summary(profile, limit: int = 40) -> str:
+    """Top functions by cumulative time, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _safe(label: str) -> str:
+    return _SAFE.sub("-", label or "request").strip("-")[:60] or "request"
+
+
+def list_profiles() -> List[Dict]:
+    """Profiles on disk, newest first."""
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if n.endswith(PROFILE_EXTS)]
+    except FileNotFoundError:
+        return []
+    out = []
+    for n in names:
+        try:
+            st = os.stat(os.path.join(PROFILE_DIR, n))
+        except OSError:
+            continue
+        out.append({"name": n, "size": st.st_size, "mtime": datetime.utcfromtimestamp(st.st_mtime)})
+    return sorted(out, key=lambda p: p["name"], reverse=True)
+
+
+def resolve(name: str) -> Optional[str]:
+    """Absolute path of a profile by file name; None for anything else."""
+    if not name or name != os.path.basename(name) or not name.endswith(PROFILE_EXTS):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune() -> None:
+    # One request can leave two files (.prof + .txt); keep the newest PROFILE_KEEP requests
+    stems = sorted({os.path.splitext(p["name"])[0] for p in list_profiles()}, reverse=True)
+    for stem in stems[PROFILE_KEEP:]:
+        for ext in PROFILE_EXTS:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stem + ext))
+            except OSError:
+                pass
+
+
+__all__ = ["enabled", "wanted", "Session", "summary", "list_profiles", "resolve",
+           "PROFILE_DIR", "PROFILE_TOKEN", "PROFILE_SAMPLE_RATE", "PROFILE_MODE"]
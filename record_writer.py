@@ -0,0 +1,146 @@
+# record_writer.py — write-behind queue that batches Record inserts off the request path
+from __future__ import annotations
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("mymuse")
+
+RECORD_WRITE_BEHIND = os.getenv("RECORD_WRITE_BEHIND", "true").lower() in ("1", "true", "yes", "on")
+RECORD_BATCH_SIZE = int(os.getenv("RECORD_BATCH_SIZE", "20"))      # commit every N records...
+RECORD_FLUSH_MS = int(os.getenv("RECORD_FLUSH_MS", "250"))         # ...or after M ms, whichever first
+RECORD_QUEUE_MAX = int(os.getenv("RECORD_QUEUE_MAX", "5000"))      # beyond this, callers write inline
+
+
+class RecordWriter:
+    """
+    Request threads submit() row dicts; one background thread commits them in
+    batches of up to `batch_size`, at most `flush_ms` after the first row of a
+    batch arrived. `write_batch(rows)` does the actual insert (one transaction).
+    The thread is started lazily and per process, so a writer created before a
+    fork (gunicorn preload) starts fresh in each worker. close() drains the
+    queue; it runs at interpreter exit and from gunicorn's worker_exit hook.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict]], None], batch_size: int = RECORD_BATCH_SIZE,
+                 flush_ms: int = RECORD_FLUSH_MS, max_queue: int = RECORD_QUEUE_MAX):
+        self.write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_s = max(0, flush_ms) / 1000.0
+        self.max_queue = max_queue
+        self._q: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    def _ensure_thread(self) -> queue.Queue:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Fresh queue + thread in this process (threads don't survive fork)
+                    self._q = queue.Queue(maxsize=self.max_queue)
+                    self._closing = False
+                    self._thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._q
+
+    def submit(self, row: Dict) -> None:
+        q = self._ensure_thread()
+        if self._closing:
+            self._write([row])
+            return
+        try:
+            q.put_nowait(row)
+        except queue.Full:
+            # Back-pressure: the DB can't keep up, so this caller pays for its own write
+            self._write([row])
+
+    def _run(self) -> None:
+        q = self._q
+        while True:
+            row = q.get()
+            if row is None:
+                q.task_done()
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_s
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                q.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Dict]) -> None:
+        try:
+            self.write_batch(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            if len(batch) > 1:
+                # Don't let one bad row take the whole batch down with it
+                logger.warning("RecordWriter: batch of %d failed (%s); retrying row by row", len(batch), e)
+                for row in batch:
+                    self._write([row])
+                return
+            self.failed += 1
+            logger.error("RecordWriter: failed to write record: %s", e)
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is committed."""
+        if self._pid == os.getpid() and self._q is not None:
+            self._q.join()
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            return
+        self._closing = True
+        try:
+            self._q.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("RecordWriter: %d records still queued at shutdown", self._q.qsize())
+
+    def stats(self) -> Dict:
+        return {"queued": self._q.qsize() if self._q is not None else 0, "written": self.written,
+                "batches": self.batches, "failed": self.failed}
+
+
+_writers: List[RecordWriter] = []
+
+
+def register(writer: RecordWriter) -> RecordWriter:
+    _writers.append(writer)
+    return writer
+
+
+@atexit.register
+def close_all() -> None:
+    for w in _writers:
+        w.close()
+
+
+__all__ = ["RecordWriter", "RECORD_WRITE_BEHIND", "register", "close_all"]
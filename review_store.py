@@ -1,12 +1,17 @@
 # review_store.py — simple TF‑IDF index for product reviews
 from __future__ import annotations
-import io, csv, logging, os
+import io, csv, logging, os, pickle, shutil, time
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 
+import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+import metrics
+import tracing
+
 logger = logging.getLogger("mymuse")
 
 CSV_HEADERS = ("product_name", "text")
@@ -23,10 +28,16 @@ class ReviewIndex:
       ReviewIndex.import_csv(file_or_bytes)   # CSV headers: product_name,text
       ReviewIndex.build()
       ReviewIndex.search("Dive+", transcript_text, k=6)
+    Multi-process servers also call configure_snapshots(dir): every build() then
+    publishes the matrix as .npy files, and other processes attach_snapshot()
+    to memory-map the newest one instead of rebuilding.
     """
     _docs: List[_Doc] = []
     _vec: Optional[TfidfVectorizer] = None
     _X = None
+    _snapshot_dir: Optional[str] = None
+    _snapshot_version: Optional[str] = None
+    _snapshot_checked: float = 0.0
 
     @classmethod
     def import_csv(cls, file_obj) -> Dict:
@@ -206,14 +217,116 @@ class ReviewIndex:
         try:
             vec = TfidfVectorizer(max_features=8000, ngram_range=(1,2), min_df=1)
             X = vec.fit_transform(texts)
+            # stop_words_ holds every term cut by max_features; only kept for introspection
+            if hasattr(vec, "stop_words_"):
+                delattr(vec, "stop_words_")
             cls._vec, cls._X = vec, X
             logger.info("ReviewIndex built: %d docs, %d terms", len(texts), X.shape[1])
+            cls.publish_snapshot()
         except Exception as e:
             # Never crash generation because of bad CSV
             logger.exception("ReviewIndex build failed: %s", e)
             cls._vec = None
             cls._X = None
 
+    # --------------- Shared snapshots (multi-process) ---------------
+    @classmethod
+    def configure_snapshots(cls, dir_path: Optional[str]) -> None:
+        cls._snapshot_dir = dir_path or None
+
+    @classmethod
+    def snapshot_version(cls) -> Optional[str]:
+        """Version name of the newest published snapshot, if any."""
+        if not cls._snapshot_dir:
+            return None
+        try:
+            with open(os.path.join(cls._snapshot_dir, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    @classmethod
+    def publish_snapshot(cls) -> Optional[str]:
+        """Write the built index as <dir>/<version>/ and atomically point CURRENT
+        at it. Matrix arrays are plain .npy so readers can mmap them.
+        """
+        if not cls._snapshot_dir or cls._vec is None or cls._X is None:
+            return None
+        try:
+            version = f"{time.time_ns()}-{os.getpid()}"
+            path = os.path.join(cls._snapshot_dir, version)
+            os.makedirs(path, exist_ok=True)
+            X = cls._X.tocsr()
+            for name in ("data", "indices", "indptr"):
+                np.save(os.path.join(path, f"{name}.npy"), getattr(X, name))
+            with open(os.path.join(path, "meta.pkl"), "wb") as f:
+                pickle.dump({
+                    "shape": X.shape,
+                    "vectorizer": cls._vec,
+                    "docs": [(d.product_name, d.text) for d in cls._docs if d.text.strip()],
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp = os.path.join(cls._snapshot_dir, f"CURRENT.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(version)
+            os.replace(tmp, os.path.join(cls._snapshot_dir, "CURRENT"))
+            cls._snapshot_version = version
+            cls._prune_snapshots(keep=version)
+            logger.info("ReviewIndex snapshot published: %s", version)
+            return version
+        except Exception as e:
+            logger.warning("ReviewIndex snapshot publish failed: %s", e)
+            return None
+
+    @classmethod
+    def _prune_snapshots(cls, keep: str, retain: int = 2) -> None:
+        # Readers that still map an older version keep working: unlinked files
+        # stay alive until their last mapping goes away.
+        try:
+            versions = sorted(v for v in os.listdir(cls._snapshot_dir)
+                              if os.path.isdir(os.path.join(cls._snapshot_dir, v)))
+        except OSError:
+            return
+        for v in versions[:-retain]:
+            if v != keep:
+                shutil.rmtree(os.path.join(cls._snapshot_dir, v), ignore_errors=True)
+
+    @classmethod
+    def attach_snapshot(cls, force: bool = False) -> bool:
+        """Swap in the newest published snapshot (memory-mapped, shared through the
+        page cache) when it differs from what this process holds.
+        """
+        version = cls.snapshot_version()
+        if not version or (version == cls._snapshot_version and not force):
+            return False
+        try:
+            path = os.path.join(cls._snapshot_dir, version)
+            with open(os.path.join(path, "meta.pkl"), "rb") as f:
+                meta = pickle.load(f)
+            arrays = [np.load(os.path.join(path, f"{n}.npy"), mmap_mode="r") for n in ("data", "indices", "indptr")]
+            X = sparse.csr_matrix(tuple(arrays), shape=meta["shape"], copy=False)
+            docs = [_Doc(product_name=p, text=t) for p, t in meta["docs"]]
+            # Single assignment per attribute; search() reads them into locals first
+            cls._docs, cls._vec, cls._X = docs, meta["vectorizer"], X
+            cls._snapshot_version = version
+            logger.info("ReviewIndex attached snapshot %s (%d docs)", version, len(docs))
+            return True
+        except Exception as e:
+            logger.warning("ReviewIndex snapshot attach failed (%s): %s", version, e)
+            return False
+
+    @classmethod
+    def maybe_reload(cls, check_every: float = 10.0) -> bool:
+        """Cheap per-request hook: at most every `check_every` seconds, read
+        CURRENT and attach the snapshot if another process published a new one.
+        """
+        if not cls._snapshot_dir:
+            return False
+        now = time.monotonic()
+        if now - cls._snapshot_checked < check_every:
+            return False
+        cls._snapshot_checked = now
+        return cls.attach_snapshot()
+
     @classmethod
     def get(cls):  # convenience for warm-up
         return cls
@@ -235,35 +348,39 @@ class ReviewIndex:
         return out
 
     @classmethod
+    @metrics.stage("review_search")
     def search(cls, product_name: str, query: str, k: int = 6) -> List[str]:
         """
         Return up to k review snippets relevant to (product_name, query).
         If product_name is non-empty, prefer those docs; otherwise search all.
         """
-        if not cls._vec or cls._X is None or not cls._docs:
+        # Read once: a snapshot attach may swap these while we search
+        vec, X, docs = cls._vec, cls._X, cls._docs
+        if not vec or X is None or not docs:
             return []
         # Choose candidate indices by product
-        cand_idx = [i for i, d in enumerate(cls._docs) if (product_name and d.product_name and d.product_name.lower() == product_name.lower())]
+        cand_idx = [i for i, d in enumerate(docs) if (product_name and d.product_name and d.product_name.lower() == product_name.lower())]
         if not cand_idx:
-            cand_idx = list(range(len(cls._docs)))
+            cand_idx = list(range(len(docs)))
         if not cand_idx:
             return []
 
         # Vectorize query
         try:
-            qv = cls._vec.transform([query or ""])
+            with tracing.span("vectorize_query"):
+                qv = vec.transform([query or ""])
         except Exception:
             return []
         # Compute similarities on the candidate subset
-        import numpy as np
-        subX = cls._X[cand_idx, :]
-        sims = cosine_similarity(qv, subX).ravel()  # shape (len(cand_idx),)
-        # Top-k
-        top_local = np.argsort(-sims)[:k]
+        with tracing.span("score_reviews", candidates=len(cand_idx)):
+            subX = X[cand_idx, :]
+            sims = cosine_similarity(qv, subX).ravel()  # shape (len(cand_idx),)
+            # Top-k
+            top_local = np.argsort(-sims)[:k]
         results = []
         for j in top_local:
             i = cand_idx[j]
-            txt = cls._docs[i].text.strip()
+            txt = docs[i].text.strip()
             if txt:
                 results.append(txt)
         return results
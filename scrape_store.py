@@ -0,0 +1,185 @@
+# scrape_store.py — incremental scraping: seen-review fingerprints + one append-only training CSV
+from __future__ import annotations
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("mymuse")
+
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+STORE_FILENAME = "scraped_training.csv"
+SEEN_FILENAME = "scraped_seen.sqlite"
+FIELDNAMES = ["product_name", "text", "source", "source_url", "engagement", "hashtags", "username", "scraped_at"]
+
+# Timestamped CSVs written by earlier scrapers, and the page each one came from
+WEBSITE_URL = os.getenv("MYMUSE_WEBSITE_URL", "https://mymuse.in/collections/deal-of-the-day")
+LEGACY_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"^mymuse_website_\d+\.csv$"), WEBSITE_URL),
+    (re.compile(r"^mymuse_instagram_(?P<user>.+)_\d+\.csv$"), "https://www.instagram.com/{user}/"),
+]
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Case, punctuation and whitespace-insensitive form used for fingerprints."""
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+def fingerprint(text: str, source_url: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(normalize_text(text).encode("utf-8"))
+    h.update(b"\0")
+    h.update((source_url or "").strip().lower().encode("utf-8"))
+    return h.hexdigest()
+
+
+class ScrapeStore:
+    """
+    New scraped rows go through add_rows(): anything whose fingerprint
+    (normalized text + source URL) is already in the seen index is dropped,
+    the rest is appended to data/scraped_training.csv. compact() folds the
+    legacy timestamped CSVs into the store and removes them.
+    """
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or DATA_DIR
+        self.path = os.path.join(self.data_dir, STORE_FILENAME)
+        self.seen_path = os.path.join(self.data_dir, SEEN_FILENAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.data_dir, exist_ok=True)
+        conn = sqlite3.connect(self.seen_path, timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS seen (fp TEXT PRIMARY KEY, first_seen TEXT NOT NULL)")
+        return conn
+
+    def seen_count(self) -> int:
+        if not os.path.exists(self.seen_path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        finally:
+            conn.close()
+
+    def add_rows(self, rows: Iterable[Dict], source_url: str) -> List[Dict]:
+        """Append the unseen rows to the store; returns just those rows."""
+        now = datetime.now().isoformat()
+        fresh: List[Dict] = []
+        with _lock:
+            conn = self._connect()
+            try:
+                for row in rows:
+                    text = (row.get("text") or "").strip()
+                    if not text:
+                        continue
+                    url = row.get("source_url") or source_url
+                    cur = conn.execute("INSERT OR IGNORE INTO seen (fp, first_seen) VALUES (?, ?)",
+                                       (fingerprint(text, url), now))
+                    if cur.rowcount:
+                        fresh.append(self._store_row(row, url, now))
+                if fresh:
+                    self._append(fresh)
+                # Only remember rows once they are safely in the store
+                conn.commit()
+            finally:
+                conn.close()
+        if fresh:
+            logger.info(f"ScrapeStore: {len(fresh)} new rows from {source_url}")
+        return fresh
+
+    @staticmethod
+    def _store_row(row: Dict, url: str, now: str) -> Dict:
+        hashtags = row.get("hashtags") or ""
+        if isinstance(hashtags, (list, tuple)):
+            hashtags = ",".join(hashtags)
+        return {
+            "product_name": row.get("product_name", ""),
+            "text": (row.get("text") or "").strip(),
+            "source": row.get("source", ""),
+            "source_url": url,
+            "engagement": row.get("engagement", 0),
+            "hashtags": hashtags,
+            "username": row.get("username", ""),
+            "scraped_at": row.get("scraped_at") or now,
+        }
+
+    def _migrate(self) -> None:
+        """Rewrite a store written with an older column set under FIELDNAMES."""
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames == FIELDNAMES:
+                return
+            old = reader.fieldnames
+            rows = list(reader)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction="ignore", restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        logger.info(f"ScrapeStore: migrated {len(rows)} rows from columns {old} to {FIELDNAMES}")
+
+    def _append(self, rows: List[Dict]) -> None:
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if not new_file:
+            self._migrate()
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def to_csv_bytes(rows: List[Dict]) -> bytes:
+        """Rows in store format, ready for ReviewIndex.import_csv()."""
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FIELDNAMES, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+        return buf.getvalue().encode("utf-8")
+
+    # --------------- Compaction ---------------
+    def legacy_files(self) -> List[Tuple[str, str]]:
+        """(path, source_url) for every legacy timestamped CSV in the data dir."""
+        out: List[Tuple[str, str]] = []
+        if not os.path.isdir(self.data_dir):
+            return out
+        for name in sorted(os.listdir(self.data_dir)):
+            for pattern, url in LEGACY_PATTERNS:
+                m = pattern.match(name)
+                if m:
+                    out.append((os.path.join(self.data_dir, name), url.format(**m.groupdict())))
+                    break
+        return out
+
+    def compact(self) -> Dict:
+        """Fold legacy CSVs into the store (deduplicated) and delete them."""
+        files, added = 0, 0
+        for path, url in self.legacy_files():
+            try:
+                with open(path, "r", newline="", encoding="utf-8", errors="ignore") as f:
+                    rows = list(csv.DictReader(f))
+                added += len(self.add_rows(rows, source_url=url))
+                os.remove(path)
+                files += 1
+            except Exception as e:
+                logger.warning(f"ScrapeStore: could not compact {path}: {e}")
+        if files:
+            logger.info(f"ScrapeStore: compacted {files} legacy CSVs ({added} unique rows kept)")
+        return {"files": files, "added": added}
+
+
+__all__ = ["ScrapeStore", "fingerprint", "normalize_text", "STORE_FILENAME"]
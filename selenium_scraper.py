@@ -5,6 +5,8 @@ from typing import List
 import requests
 from bs4 import BeautifulSoup
 
+from page_waits import SCRAPE_FAST_MODE, settle, wait_for_growth, wait_quiet
+
 UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
       "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
 HEADERS = {"User-Agent": UA}
@@ -55,9 +57,12 @@ def _extract_from_html(html: str) -> List[str]:
 # -------------------- Fast (no JS) --------------------
 
 def fetch_static_reviews(url: str, timeout: int = 15) -> List[str]:
-    r = requests.get(url, headers=HEADERS, timeout=timeout)
-    r.raise_for_status()
-    return _extract_from_html(r.text)
+    # Shared pooled session + conditional GET against the on-disk cache
+    from static_fetcher import get_fetcher
+    res = get_fetcher().fetch(url, timeout=timeout)
+    if res.error:
+        raise requests.HTTPError(res.error)
+    return _extract_from_html(res.text)
 
 # -------------------- Selenium (JS + shadow DOM) --------------------
 
@@ -122,25 +127,13 @@ return Array.from(all);
         return []
 
 def scrape_js_reviews(url: str, initial_wait: int = 8, clicks: int = 6) -> List[str]:
-    import undetected_chromedriver as uc
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
+    from driver_pool import get_pool
 
-    v_env = os.environ.get("UC_VERSION_MAIN")
-    v_main = int(v_env) if v_env and v_env.isdigit() else None
-
-    opts = uc.ChromeOptions()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--window-size=1366,1100")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_argument(f"user-agent={UA}")
-
-    driver = uc.Chrome(options=opts, version_main=v_main) if v_main else uc.Chrome(options=opts)
-
-    try:
+    # Warm undetected-chromedriver from the shared pool; the lease is a fresh tab
+    with get_pool("uc").lease() as driver:
         driver.get(url)
         # Wait for any Okendo container
         WebDriverWait(driver, 25).until(
@@ -149,7 +142,8 @@ def scrape_js_reviews(url: str, initial_wait: int = 8, clicks: int = 6) -> List[
                 EC.presence_of_element_located((By.CSS_SELECTOR, ".okeReviews, .okeReviewsWidget"))
             )
         )
-        time.sleep(initial_wait)
+        settle(driver, initial_wait)
+        seen = len(_collect_reviews_via_js(driver))
 
         # Try to expand "Load more" several times
         for _ in range(clicks):
@@ -161,19 +155,34 @@ def scrape_js_reviews(url: str, initial_wait: int = 8, clicks: int = 6) -> List[
                 try:
                     if b.is_displayed() and b.is_enabled():
                         driver.execute_script("arguments[0].scrollIntoView({block:'center'});", b)
-                        time.sleep(0.25)
+                        if not SCRAPE_FAST_MODE:
+                            time.sleep(0.25)
                         b.click()
                         clicked = True
-                        time.sleep(1.8)
+                        if not SCRAPE_FAST_MODE:
+                            time.sleep(1.8)
                 except Exception:
                     pass
             if not clicked:
                 break
+            if SCRAPE_FAST_MODE:
+                # Done as soon as the new batch renders; stop if nothing arrives
+                grown = wait_for_growth(lambda: len(_collect_reviews_via_js(driver)), seen, timeout=1.8)
+                if grown <= seen:
+                    break
+                seen = grown
+                wait_quiet(driver, quiet_ms=250, network=False, timeout=0.25)
 
         # Scroll to trigger any lazy chunks
         for _ in range(3):
+            height = driver.execute_script("return document.body.scrollHeight;")
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1.6)
+            if not SCRAPE_FAST_MODE:
+                time.sleep(1.6)
+                continue
+            wait_quiet(driver, timeout=1.6)
+            if driver.execute_script("return document.body.scrollHeight;") <= height:
+                break
 
         # Collect via JS across shadow roots
         texts = _collect_reviews_via_js(driver)
@@ -184,11 +193,6 @@ def scrape_js_reviews(url: str, initial_wait: int = 8, clicks: int = 6) -> List[
             texts += _extract_from_html(driver.page_source)
 
         return _dedup(texts)[:150]
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
 
 # -------------------- Public entry --------------------
 
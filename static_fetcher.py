@@ -0,0 +1,252 @@
+# static_fetcher.py — concurrent static page fetcher with conditional GET and an on-disk HTTP cache
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger("mymuse")
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join("data", "http_cache"))
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))   # be polite to any one shop
+FETCH_TIMEOUT = int(os.getenv("FETCH_TIMEOUT", "15"))
+
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int             # 200, 304 (served from cache), or the error status
+    text: str = ""
+    from_cache: bool = False
+    error: Optional[str] = None
+    validator: Optional[str] = None   # ETag / Last-Modified this text corresponds to
+
+
+class HttpCache:
+    """
+    One JSON meta file (url, ETag, Last-Modified) plus one body file per URL,
+    keyed by sha1(url), and the reviews a browser rendered for that exact
+    version of the page. Writes are atomic so concurrent fetchers and
+    processes never read a half-written entry.
+    """
+
+    def __init__(self, root: str = HTTP_CACHE_DIR):
+        self.root = root
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def _js_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + ".js.json")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, url: str):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            return meta, body
+        except (OSError, ValueError):
+            return None, None
+
+    def put(self, url: str, resp: requests.Response) -> None:
+        etag, last_mod = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if not etag and not last_mod:
+            return  # nothing to revalidate with
+        meta_path, body_path = self._paths(url)
+        try:
+            self._write_atomic(body_path, resp.content)
+            self._write_atomic(meta_path, json.dumps(
+                {"url": url, "etag": etag, "last_modified": last_mod,
+                 "encoding": resp.encoding, "fetched_at": time.time()}).encode("utf-8"))
+        except OSError as e:
+            logger.debug(f"HTTP cache write failed for {url}: {e}")
+
+    def get_js(self, url: str, validator: Optional[str]) -> Optional[List[str]]:
+        """Reviews the browser found for this version of the page, if known."""
+        if not validator:
+            return None
+        try:
+            with open(self._js_path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry.get("reviews") if entry.get("validator") == validator else None
+
+    def put_js(self, url: str, validator: Optional[str], reviews: List[str]) -> None:
+        if not validator:
+            return  # can't tell when the page changes
+        try:
+            self._write_atomic(self._js_path(url), json.dumps(
+                {"url": url, "validator": validator, "reviews": reviews,
+                 "rendered_at": time.time()}).encode("utf-8"))
+        except OSError as e:
+            logger.debug(f"JS result cache write failed for {url}: {e}")
+
+
+class StaticFetcher:
+    """
+    Thread pool over one pooled requests.Session, at most `per_host`
+    requests in flight per host. Every GET revalidates a cached copy with
+    If-None-Match / If-Modified-Since, so an unchanged page costs one 304.
+    """
+
+    def __init__(self, workers: int = FETCH_WORKERS, per_host: int = FETCH_PER_HOST,
+                 timeout: int = FETCH_TIMEOUT, cache: Optional[HttpCache] = None):
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.cache = cache if cache is not None else HttpCache()
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = UA
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._hosts_lock:
+            sem = self._hosts.get(host)
+            if sem is None:
+                sem = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+        return sem
+
+    def fetch(self, url: str, timeout: Optional[int] = None) -> FetchResult:
+        meta, body = self.cache.get(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with self._host_slot(url):
+                resp = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+        except requests.RequestException as e:
+            return FetchResult(url, 0, error=str(e))
+        if resp.status_code == 304 and body is not None:
+            metrics.cache_result("http", True)
+            return FetchResult(url, 304, body.decode(meta.get("encoding") or "utf-8", "replace"), from_cache=True,
+                               validator=meta.get("etag") or meta.get("last_modified"))
+        if resp.status_code != 200:
+            return FetchResult(url, resp.status_code, error=f"HTTP {resp.status_code}")
+        metrics.cache_result("http", False)
+        self.cache.put(url, resp)
+        return FetchResult(url, 200, resp.text,
+                           validator=resp.headers.get("ETag") or resp.headers.get("Last-Modified"))
+
+    def fetch_many(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Fetch concurrently; results come back in input order."""
+        urls = list(dict.fromkeys(urls))
+        if len(urls) <= 1:
+            return [self.fetch(u) for u in urls]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as ex:
+            return list(ex.map(self.fetch, urls))
+
+
+_default: Optional[StaticFetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher() -> StaticFetcher:
+    """Process-wide fetcher so the connection pool and host limits are shared."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = StaticFetcher()
+    return _default
+
+
+def product_urls_from_sitemap(base_url: str = "https://mymuse.in", fetcher: Optional[StaticFetcher] = None) -> List[str]:
+    """Every /products/ URL listed in a Shopify-style sitemap index."""
+    fetcher = fetcher or get_fetcher()
+    root = fetcher.fetch(urljoin(base_url, "/sitemap.xml"))
+    if root.error:
+        return []
+    locs = re.findall(r"<loc>\s*([^<\s]+)\s*</loc>", root.text)
+    product_maps = [u for u in locs if "sitemap_products" in u]
+    urls: List[str] = [u for u in locs if "/products/" in u]
+    for res in fetcher.fetch_many(product_maps):
+        urls += [u for u in re.findall(r"<loc>\s*([^<\s]+)\s*</loc>", res.text) if "/products/" in u]
+    return list(dict.fromkeys(urls))
+
+
+def scrape_reviews_many(urls: Iterable[str], fetcher: Optional[StaticFetcher] = None) -> Dict[str, List[str]]:
+    """
+    Static pass over all URLs concurrently; only pages where it finds no
+    reviews escalate to the Selenium path (unless DISABLE_SELENIUM=1). What
+    the browser found is cached against the page's ETag / Last-Modified, so
+    an unchanged page is not rendered again.
+    """
+    from selenium_scraper import _extract_from_html, scrape_js_reviews
+
+    fetcher = fetcher or get_fetcher()
+    out: Dict[str, List[str]] = {}
+    escalate: List[FetchResult] = []
+    rendered = 0
+    for res in fetcher.fetch_many(urls):
+        revs = _extract_from_html(res.text) if res.text else []
+        if not revs:
+            known = fetcher.cache.get_js(res.url, res.validator)
+            if known is not None:
+                revs = known
+                rendered += 1
+            # A real browser can help with JS-rendered widgets and bot walls, not with 404s
+            elif not res.error or res.status in (0, 403, 429, 503):
+                escalate.append(res)
+        out[res.url] = revs
+
+    logger.info(f"Static pass: {len(out) - len(escalate) - rendered}/{len(out)} pages with reviews, "
+                f"{rendered} unchanged since rendered, {len(escalate)} need JS")
+    if escalate and os.environ.get("DISABLE_SELENIUM") != "1":
+        from driver_pool import DRIVER_POOL_SIZE
+
+        def _js(url: str) -> Optional[List[str]]:
+            try:
+                return scrape_js_reviews(url)
+            except Exception as e:
+                logger.warning(f"JS scrape failed for {url}: {e}")
+                return None
+
+        # The browser pool bounds this anyway; more threads would only queue
+        with ThreadPoolExecutor(max_workers=min(DRIVER_POOL_SIZE, len(escalate))) as ex:
+            for res, revs in zip(escalate, ex.map(_js, [r.url for r in escalate])):
+                if revs is None:
+                    continue  # failed render: retry next run
+                out[res.url] = revs
+                fetcher.cache.put_js(res.url, res.validator, revs)
+    return out
+
+
+__all__ = ["FetchResult", "HttpCache", "StaticFetcher", "get_fetcher",
+           "product_urls_from_sitemap", "scrape_reviews_many"]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test the streaming audio feature extractor behind analyze_media
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+import analysis
+
+
+def _write_clip(path: str, sr: int = 16000) -> np.ndarray:
+    """4 s clip: 1 s tone, 1 s silence, 1 s of clicks, 1 s tone."""
+    t = np.arange(sr) / sr
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+    clicks = np.zeros(sr)
+    clicks[:: sr // 8] = 0.9
+    x = np.concatenate([tone, np.zeros(sr), clicks, tone]).astype("float32")
+    sf.write(path, x, sr, subtype="FLOAT")
+    return x
+
+
+def test_audio_features_streaming():
+    """Block size doesn't change the result; whole-file RMS/ZCR match sf.read"""
+    print("🧪 Testing audio_features...")
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "clip.wav")
+        x = _write_clip(path)
+
+        feats = analysis.audio_features(path)
+        print(f"📊 Features: { {k: v for k, v in feats.items() if k != 'energy_curve'} }")
+        assert feats["duration"] == 4.0 and feats["frames"] == 80
+        assert abs(feats["rms"] - float(np.sqrt(np.mean(x.astype('float64') ** 2)))) < 1e-6
+        assert abs(feats["zcr"] - float(((x[:-1] * x[1:]) < 0).sum() / (len(x) - 1))) < 1e-9
+        assert 0.2 <= feats["silence_ratio"] <= 0.5  # silent second + gaps between clicks
+        assert 300 < feats["centroid_hz"]["p10"] < 600  # tone frames sit near 440 Hz
+        assert len(feats["energy_curve"]) == analysis.ENERGY_CURVE_POINTS
+        assert feats["onset_rate"] > 0
+
+        with mock.patch.object(analysis, "AUDIO_BLOCK_FRAMES", 3):
+            small = analysis.audio_features(path)
+        assert small["frames"] == feats["frames"]
+        assert abs(small["zcr"] - feats["zcr"]) < 1e-12
+        assert np.allclose(small["energy_curve"], feats["energy_curve"])
+
+        media = analysis.analyze_media(path, "Okay so this one is quiet")
+        print(f"📊 analyze_media audio: energy={media['audio']['energy']} pacing={media['audio']['pacing']}")
+        assert media["audio"]["energy"] == "medium"
+
+
+if __name__ == "__main__":
+    test_audio_features_streaming()
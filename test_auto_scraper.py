@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the leader-elected auto-scraper scheduler and index hot reload
+"""
+
+import os
+import tempfile
+import time
+from unittest import mock
+
+import auto_scraper
+import background_owner
+from review_store import ReviewIndex
+
+
+def test_next_delay_backoff_and_jitter():
+    """Healthy runs wait ~interval; failures back off exponentially up to it"""
+    print("🧪 Testing scheduler delays...")
+    s = auto_scraper.AutoScraper()
+    interval, jitter = auto_scraper.AUTO_SCRAPE_INTERVAL, auto_scraper.AUTO_SCRAPE_JITTER
+    for _ in range(50):
+        assert interval * (1 - jitter) <= s._next_delay() <= interval * (1 + jitter)
+    s.failures = 1
+    first = auto_scraper.AUTO_SCRAPE_BACKOFF
+    assert first * (1 - jitter) <= s._next_delay() <= first * (1 + jitter)
+    s.failures = 20
+    assert s._next_delay() <= interval * (1 + jitter)
+    print(f"⏱️ Backoff after 1 failure ≈ {first}s, capped at {interval}s")
+
+
+def test_non_leader_queues_and_reads_leader_status():
+    """A worker without the lock doesn't start; force queues a trigger for the leader"""
+    print("🧪 Testing non-leader behaviour...")
+    with tempfile.TemporaryDirectory() as d:
+        trigger = os.path.join(d, "auto_scraper.trigger")
+        status_file = os.path.join(d, "auto_scraper_status.json")
+        with mock.patch.multiple(auto_scraper, STATE_DIR=d, TRIGGER_FILE=trigger,
+                                 STATUS_FILE=status_file, AUTO_SCRAPE_ENABLED=True), \
+             mock.patch.object(background_owner, "claim", return_value=False):
+            follower = auto_scraper.AutoScraper()
+            follower.start()
+            assert not follower.is_running and follower.scrape_thread is None
+
+            leader = auto_scraper.AutoScraper()
+            leader.is_running, leader.failures = True, 2
+            leader._write_status()
+
+            status = follower.get_status()
+            print(f"📊 Follower sees: leader_pid={status['leader_pid']} failures={status['consecutive_failures']}")
+            assert status["consecutive_failures"] == 2 and not status["is_leader"]
+
+            assert follower.force_scrape()
+            assert os.path.exists(trigger)
+
+
+def test_review_index_hot_reload():
+    """maybe_reload attaches a snapshot another process published, rate-limited"""
+    print("🧪 Testing ReviewIndex.maybe_reload...")
+    saved = (ReviewIndex._docs, ReviewIndex._vec, ReviewIndex._X, ReviewIndex._snapshot_dir,
+             ReviewIndex._snapshot_version, ReviewIndex._snapshot_checked)
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            ReviewIndex._docs = []
+            ReviewIndex.configure_snapshots(d)
+            ReviewIndex.import_csv(b"product_name,text\nDive+,Quiet enough for a shared flat\n")
+            ReviewIndex.build()
+            published = ReviewIndex._snapshot_version
+
+            # This worker still holds an older index
+            ReviewIndex._snapshot_version = "old"
+            ReviewIndex._snapshot_checked = 0.0
+            assert ReviewIndex.maybe_reload(check_every=60)
+            assert ReviewIndex._snapshot_version == published
+            ReviewIndex._snapshot_version = "old"
+            assert not ReviewIndex.maybe_reload(check_every=60)  # checked too recently
+            print("🔄 Reloaded once, then rate-limited")
+    finally:
+        (ReviewIndex._docs, ReviewIndex._vec, ReviewIndex._X, ReviewIndex._snapshot_dir,
+         ReviewIndex._snapshot_version, ReviewIndex._snapshot_checked) = saved
+
+
+def test_restarted_leader_keeps_schedule():
+    """A new leader resumes the previous one's backoff and next run instead of scraping at once"""
+    print("🧪 Testing leader restart...")
+    with tempfile.TemporaryDirectory() as d:
+        status_file = os.path.join(d, "auto_scraper_status.json")
+        with mock.patch.multiple(auto_scraper, STATE_DIR=d, STATUS_FILE=status_file,
+                                 TRIGGER_FILE=os.path.join(d, "auto_scraper.trigger"), AUTO_SCRAPE_ENABLED=True), \
+             mock.patch.object(background_owner, "claim", return_value=True):
+            assert auto_scraper.last_scrape_age() is None
+
+            old = auto_scraper.AutoScraper()
+            old.is_running, old.failures, old.next_run = True, 3, time.time() + 600
+            old.mark_scraped()
+            assert auto_scraper.last_scrape_age() < 5
+
+            new = auto_scraper.AutoScraper()
+            with mock.patch.object(new, "_run_scraping_loop"):
+                new.start(initial_scrape=True)
+            print(f"⏱️ Restored: failures={new.failures}, next run in {new.next_run - time.time():.0f}s")
+            assert new.failures == 3 and abs(new.next_run - old.next_run) < 1
+            assert new.last_scrape_time == old.last_scrape_time
+
+
+if __name__ == "__main__":
+    test_next_delay_backoff_and_jitter()
+    test_non_leader_queues_and_reads_leader_status()
+    test_review_index_hot_reload()
+    test_restarted_leader_keeps_schedule()
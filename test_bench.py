@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark harness: LLM stub, percentile summaries, microbenchmarks, load-test helpers, import-time report and baseline comparison
+"""
+
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import urllib.request
+import wave
+
+import text_store
+from bench import corpus, importtime, loadtest, micro
+from bench.llm_stub import StubLLM
+from bench.report import compare, percentile, summarize
+
+
+def _chat(url, content):
+    req = urllib.request.Request(url, data=json.dumps({"model": "gpt-4o-mini", "messages": [
+        {"role": "user", "content": content}]}).encode(), headers={"Content-Type": "application/json"})
+    return json.loads(urllib.request.urlopen(req, timeout=5).read())
+
+
+def test_stub_speaks_openai():
+    """Chat completions come back OpenAI-shaped, variation prompts get a parseable block"""
+    print("🧪 Testing LLM stub responses...")
+    with StubLLM(latency_ms=0, tokens_per_s=0) as stub:
+        data = _chat(stub.endpoint, "Product: dive+\nWrite one script")
+        text = data["choices"][0]["message"]["content"]
+        assert "dive+" in text and data["usage"]["completion_tokens"] > 0
+        block = _chat(stub.endpoint, "SCRIPT SET (10 Variations)")["choices"][0]["message"]["content"]
+        assert block.count("Variation ") == 10 and block.startswith("Variation 1:")
+        assert stub.requests == 2
+        print(f"✅ Stub served {stub.requests} requests")
+
+
+def test_stub_latency_model():
+    """Latency is time-to-first-token plus tokens / rate"""
+    print("🧪 Testing LLM stub latency...")
+    with StubLLM(latency_ms=80, tokens_per_s=0) as stub:
+        t0 = time.perf_counter()
+        _chat(stub.endpoint, "hello")
+        took = time.perf_counter() - t0
+        print(f"⏱️  80 ms TTFT request took {took * 1000:.0f} ms")
+        assert 0.08 <= took < 1.0
+
+
+def test_summarize_and_compare():
+    """Nearest-rank percentiles and p95 regression flagging"""
+    print("🧪 Testing summaries and comparison...")
+    samples = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(samples, 50) == 0.05 and percentile(samples, 99) == 0.099
+    s = summarize(samples)
+    assert s["n"] == 100 and s["p95_ms"] == 95.0 and s["max_ms"] == 100.0
+    assert summarize(samples, wall_s=2.0)["rps"] == 50.0
+    rows = compare({"a": {"p95_ms": 120.0}, "b": {"p95_ms": 99.0}, "new": {"p95_ms": 1.0}},
+                   {"a": {"p95_ms": 100.0}, "b": {"p95_ms": 100.0}}, threshold_pct=10)
+    assert [(r["name"], r["regressed"]) for r in rows] == [("a", True), ("b", False)]
+
+
+def test_micro_harness():
+    """Microbenchmarks calibrate rounds, report ordered stats and cover every transform"""
+    print("🧪 Testing microbenchmark harness...")
+    r = micro.bench(lambda: sum(range(100)), max_time=0.05)
+    assert r["rounds"] >= 5 and r["iterations"] >= 1
+    assert r["min_us"] <= r["median_us"] <= r["max_us"] and r["ops"] > 0
+    results = micro.run(only=["limit_genz_slang"], max_time=0.02)
+    assert set(results) == {"limit_genz_slang[short]", "limit_genz_slang[long]"}
+    import generate
+    assert callable(generate._enforce_monologue_flow)
+    assert generate._enforce_monologue_flow("Step 1 — Hi there\nthen we go\nit works") == \
+        "Hi there\nthen we go\nAnd it works"
+    rows = compare({"t": {"min_us": 130.0}}, {"t": {"min_us": 100.0}}, 20, metric="min_us")
+    assert rows[0]["regressed"] and rows[0]["delta_pct"] == 30.0
+    print(f"✅ limit_genz_slang[long] min {results['limit_genz_slang[long]']['min_us']:.1f} us")
+
+
+def test_loadtest_mix_and_media():
+    """Mixes load with defaults, generated WAV uploads are valid, recorded mixes weight repeats"""
+    print("🧪 Testing load-test mix and media...")
+    mix = loadtest.load_mix(loadtest.DEFAULT_MIX)
+    assert {"/generate", "/transcribe", "/api/history"} <= {e["route"] for e in mix}
+    assert all(e["weight"] > 0 for e in mix)
+    media = loadtest.MediaLibrary(None)
+    try:
+        with wave.open(media.pick("short", random.Random(1))) as w:
+            assert w.getframerate() == 16000 and 2.9 < w.getnframes() / 16000 < 3.1
+    finally:
+        media.close()
+
+    with tempfile.TemporaryDirectory() as d:
+        db = os.path.join(d, "app.db")
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE texts (hash TEXT PRIMARY KEY, codec TEXT, body BLOB)")
+        conn.execute("CREATE TABLE records (id INTEGER PRIMARY KEY, product_name TEXT, transcript_hash TEXT)")
+        long_text = corpus.TRANSCRIPTS["travel"][1] * 3  # big enough to be stored compressed
+        for t in (long_text, "short one"):
+            conn.execute("INSERT INTO texts VALUES (?, ?, ?)", (text_store.text_hash(t), *text_store.encode(t)))
+        for product, t in [("dive+", long_text), ("dive+", long_text), ("edge", "short one")]:
+            conn.execute("INSERT INTO records (product_name, transcript_hash) VALUES (?, ?)",
+                         (product, text_store.text_hash(t)))
+        conn.commit()
+        conn.close()
+        out = os.path.join(d, "recorded.jsonl")
+        assert loadtest.record_mix(f"sqlite:///{db}", out) == 2
+        recorded = loadtest.load_mix(out)
+        assert recorded[0]["weight"] == 2 and recorded[0]["transcript"] == long_text
+        print(f"✅ Recorded mix: {[(e['product'], e['weight']) for e in recorded]}")
+
+
+def test_loadtest_saturation():
+    """The knee is the last step before added users stop adding throughput"""
+    print("🧪 Testing saturation detection...")
+    step = lambda c, rps, p95: {"concurrency": c, "latency": {"rps": rps, "p95_ms": p95}}
+    sat = loadtest.saturation([step(1, 2.0, 500), step(2, 3.9, 520), step(4, 7.5, 600),
+                               step(8, 7.9, 1100), step(16, 7.7, 2300)])
+    assert sat["peak_rps"] == 7.9 and sat["peak_concurrency"] == 8
+    assert sat["knee_concurrency"] == 4 and sat["knee_rps"] == 7.5
+    assert loadtest.saturation([step(1, 2.0, 500), step(2, 4.0, 500)])["knee_concurrency"] is None
+
+
+def test_importtime_report():
+    """-X importtime output parses into totals, direct imports and eager heavy modules"""
+    print("🧪 Testing import-time report...")
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   _io",
+        "import time:       300 |        300 |     numpy.core",
+        "import time:      2000 |       2300 |   numpy",
+        "import time:       500 |        500 |   flask",
+        "import time:      1000 |       3900 | app",
+    ])
+    rows = importtime.parse(stderr)
+    assert [r["depth"] for r in rows] == [1, 2, 1, 1, 0]
+    rep = importtime.report(rows, "app", top=2)
+    assert rep["total_ms"] == 3.9 and rep["self_ms"] == 1.0
+    assert [h["name"] for h in rep["heaviest"]] == ["numpy", "flask"]
+    assert rep["eager_heavy"] == ["numpy"]
+
+
+def test_corpus_covers_categories():
+    """Every category has transcripts and a product; reviews cover each product"""
+    print("🧪 Testing bench corpus...")
+    assert {"travel", "feature_heavy", "sexual", "anal_play", "casual"} <= set(corpus.TRANSCRIPTS)
+    reviewed = {p for p, _ in corpus.reviews(per_product=2)}
+    assert set(corpus.PRODUCT_FOR.values()) <= reviewed
+    print(f"✅ {len(corpus.cases())} transcripts, {len(corpus.reviews())} reviews")
+
+
+if __name__ == "__main__":
+    test_stub_speaks_openai()
+    test_stub_latency_model()
+    test_summarize_and_compare()
+    test_micro_harness()
+    test_loadtest_mix_and_media()
+    test_loadtest_saturation()
+    test_importtime_report()
+    test_corpus_covers_categories()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the shared WebDriver pool with a fake browser (no Chrome needed)
+"""
+
+import threading
+import time
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    """Just enough of the WebDriver API for the pool."""
+    count = 0
+
+    def __init__(self):
+        FakeDriver.count += 1
+        self.id = FakeDriver.count
+        self.handles = ["base"]
+        self.current_window_handle = "base"
+        self.cookies = {}
+        self.alive = True
+        self.switch_to = self
+
+    # switch_to.*
+    def new_window(self, kind):
+        handle = f"tab{len(self.handles)}"
+        self.handles.append(handle)
+        self.current_window_handle = handle
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def execute_script(self, js):
+        if not self.alive:
+            raise RuntimeError("browser gone")
+        return 1
+
+    def quit(self):
+        self.alive = False
+
+
+def test_pool_reuses_and_isolates():
+    """Sequential leases reuse one browser, each in a fresh tab with no cookies"""
+    print("🧪 Testing DriverPool reuse...")
+    pool = DriverPool(FakeDriver, max_size=2, max_pages=10)
+    with pool.lease() as d1:
+        assert d1.current_window_handle != "base"
+        d1.cookies["age_ok"] = "1"
+    with pool.lease() as d2:
+        assert d2 is d1 and not d2.cookies
+    assert d1.window_handles == ["base"]
+    print(f"♻️ Stats: {pool.stats()}")
+    assert pool.created == 1
+
+
+def test_pool_recycles_and_health_checks():
+    """Drivers are replaced after max_pages and when they stop responding"""
+    print("🧪 Testing DriverPool recycling...")
+    pool = DriverPool(FakeDriver, max_size=1, max_pages=2)
+    seen = []
+    for _ in range(4):
+        with pool.lease() as d:
+            seen.append(d.id)
+    assert seen[0] == seen[1] and seen[2] == seen[3] and seen[1] != seen[2]
+
+    with pool.lease() as d:
+        pass
+    d.alive = False  # crashed while idle
+    with pool.lease() as d2:
+        assert d2 is not d and d2.alive
+    print(f"♻️ Stats: {pool.stats()}")
+
+
+def test_pool_is_bounded():
+    """No more than max_size browsers are leased at once"""
+    print("🧪 Testing DriverPool bound...")
+    pool = DriverPool(FakeDriver, max_size=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with pool.lease():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"📈 Peak concurrent leases: {peak[0]}, browsers started: {pool.created}")
+    assert peak[0] <= 2 and pool.created <= 2
+
+
+def test_pool_quits_idle_browsers():
+    """Idle browsers are quit on a timer, and never handed out past the TTL"""
+    print("🧪 Testing DriverPool idle TTL...")
+    pool = DriverPool(FakeDriver, max_size=1, idle_ttl=0.2)
+    try:
+        with pool.lease() as d:
+            pass
+        assert pool.stats()["idle"] == 1
+        deadline = time.time() + 3
+        while pool.stats()["idle"] and time.time() < deadline:
+            time.sleep(0.05)
+        print(f"⏲️ Stats after TTL with no further leases: {pool.stats()}")
+        assert pool.stats()["idle"] == 0 and not d.alive
+
+        # Checkout re-checks age, even if the timer hasn't fired yet
+        pool.idle_ttl = 60
+        with pool.lease() as d1:
+            pass
+        pool._idle[0].last_used -= 120
+        with pool.lease() as d2:
+            assert d2 is not d1 and not d1.alive
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    test_pool_reuses_and_isolates()
+    test_pool_recycles_and_health_checks()
+    test_pool_is_bounded()
+    test_pool_quits_idle_browsers()
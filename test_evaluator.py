@@ -7,7 +7,10 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from evaluator import UGCScriptEvaluator
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from evaluator import UGCScriptEvaluator, evaluate_variation
 
 def test_evaluator():
     print("=== TESTING UGC EVALUATOR ===")
@@ -70,5 +73,65 @@ ACTOR/MODEL: Tap to shop MyMuse Dive+."""
     print("\n" + "="*50)
     print("Test completed!")
 
+def test_evaluate_many():
+    print("=== TESTING BATCH EVALUATION ===")
+    
+    evaluator = UGCScriptEvaluator()
+    
+    transcript = "I am on my way to the airport, and look who's coming with me on my trip. It's Mini Jadugar, with 18 speed modes and only 11 inches."
+    scripts = [
+        "I'm on my way to the airport, and guess who's coming along on my flight!\nIt's my Dive+ with 10+ vibration modes and compact design.",
+        "Security check coming up... good thing my Dive+ is so discreet.\nHonestly, this thing goes everywhere with me now.",
+        "I am on my way to the airport, and look who's coming with me on my trip. It's Dive+.",
+    ]
+    
+    results = evaluator.evaluate_many(
+        transcript=transcript,
+        product_name="Dive+",
+        generated_scripts=scripts,
+        case_type="feature_heavy",
+        true_features=["10+ vibration modes", "compact design", "discreet", "portable"]
+    )
+    
+    # A padded batch must not move any script's scores either
+    padded = evaluator._calculate_similarity_scores_many(transcript, scripts + [
+        "Movie night in, candles on, phone on silent.",
+        "Long drive to the hills with my favourite playlist and a secret in my bag.",
+    ])
+    
+    for script, result, pad in zip(scripts, results, padded):
+        single = evaluator._calculate_similarity_scores(transcript, script)
+        print(f"{result.originality} (single: {single['cosine_vs_transcript']}, {single['fourgram_vs_transcript']})")
+        for key in ("cosine_vs_transcript", "fourgram_vs_transcript"):
+            assert result.originality[key] == single[key] == pad[key], key
+        
+        # Same cosine as the original pairwise fit on [transcript, script]
+        pair = TfidfVectorizer(ngram_range=(1, 4), max_features=1000, stop_words='english').fit_transform([transcript, script])
+        assert single["cosine_vs_transcript"] == round(cosine_similarity(pair[0:1], pair[1:2])[0][0], 3)
+    
+    assert len(results) == len(scripts)
+    # The near-verbatim copy must be the least original of the batch
+    assert results[2].originality["cosine_vs_transcript"] == max(r.originality["cosine_vs_transcript"] for r in results)
+    assert not results[2].originality["caps_ok"]
+    print("Batch test completed!")
+
+def test_evaluate_variation():
+    print("=== TESTING ORIGINALITY GATE ===")
+    
+    transcript = "I am on my way to the airport, and look who's coming with me on my trip. It's Mini Jadugar, with 18 speed modes and only 11 inches."
+    policy = {"pg13": True, "max_cosine": 0.78, "max_4gram_overlap": 0.30, "max_bleu": 0.35}
+    
+    copied = evaluate_variation(transcript, transcript, policy=policy)
+    fresh = evaluate_variation(transcript, "Security check coming up... good thing it's so discreet. Honestly, this thing goes everywhere with me now.", policy=policy)
+    
+    print(f"Copied: {copied}")
+    print(f"Fresh: {fresh}")
+    
+    assert not copied["pass"] and copied["scores"]["overlap4"] == 1.0
+    assert fresh["pass"] and fresh["reasons"] == []
+    print("Gate test completed!")
+
 if __name__ == "__main__":
     test_evaluator()
+    test_evaluate_many()
+    test_evaluate_variation()
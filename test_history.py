@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test generation history: keyset pagination and FTS5 search over records
+"""
+
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import text
+
+from extensions import db
+from models import Record
+from history import ensure_history_schema, query_history, fts_query
+from text_store import intern_many, register_sqlite_functions
+
+WORDS = ("honestly this changed our nights the app is easy battery lasts long discreet "
+         "travel friendly quiet body safe silicone couples solo morning routine").split()
+
+
+def _app(path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    return app
+
+
+def _seed(n, special_every=1000):
+    rng = random.Random(7)
+    t0 = datetime(2025, 1, 1)
+    db.session.execute(text("INSERT INTO users (id, email, password_hash, is_admin) VALUES (1, 'public@mymuse.local', 'x', 0)"))
+    bodies = []
+    for i in range(n):
+        body = " ".join(rng.choice(WORDS) for _ in range(60))
+        if i % special_every == 0:
+            body += " went through airport security with my Dive+ and nobody noticed"
+        bodies.append(body)
+    hashes = intern_many(db.session, [v for b in bodies for v in (b, "Okay so " + b[:200])])
+    rows = [{"user_id": 1, "product_name": rng.choice(["Dive+", "Groove", "Oh! Please Gel"]),
+             "transcript_hash": hashes[2 * i], "generated_hash": hashes[2 * i + 1],
+             "created_at": t0 + timedelta(seconds=i // 3)} for i in range(n)]
+    db.session.execute(Record.__table__.insert(), rows)
+    db.session.commit()
+
+
+def test_keyset_pagination_and_search():
+    """Pages never overlap or skip (even with timestamp ties); FTS search is fast"""
+    print("🧪 Testing history pagination + search...")
+    with tempfile.TemporaryDirectory() as d:
+        app = _app(os.path.join(d, "app.db"))
+        with app.app_context():
+            register_sqlite_functions(db.engine)
+            db.create_all()
+            ensure_history_schema(db.engine)
+            ensure_history_schema(db.engine)  # idempotent
+            n = 20000
+            _seed(n)
+
+            seen, cursor, pages = [], None, 0
+            while pages < 5:
+                page = query_history(db.session, Record, limit=50, cursor=cursor)
+                seen += [it["id"] for it in page["items"]]
+                cursor, pages = page["next_cursor"], pages + 1
+            assert len(seen) == len(set(seen)) == 250
+            assert seen == sorted(seen, reverse=True)  # ids follow created_at here
+
+            t0 = time.perf_counter()
+            hits = query_history(db.session, Record, q="airport Dive+", limit=50)
+            ms = (time.perf_counter() - t0) * 1000
+            print(f"🔍 'airport Dive+' over {n} records: {len(hits['items'])} hits in {ms:.1f} ms")
+            assert len(hits["items"]) == n // 1000 and hits["next_cursor"] is None
+            assert ms < 200
+            assert all(len(it["transcript_preview"]) <= 240 for it in hits["items"])
+
+            # Triggers keep the index in sync with updates and deletes
+            rid = hits["items"][0]["id"]
+            th, gh = intern_many(db.session, ["nothing here", "x"])
+            db.session.execute(text("UPDATE records SET transcript_hash=:t, generated_hash=:g WHERE id=:i"),
+                               {"i": rid, "t": th, "g": gh})
+            db.session.execute(text("DELETE FROM records WHERE id=:i"), {"i": hits["items"][1]["id"]})
+            db.session.commit()
+            again = query_history(db.session, Record, q="airport dive", limit=50)
+            assert len(again["items"]) == n // 1000 - 2
+
+            by_product = query_history(db.session, Record, product="Groove", limit=10)
+            assert all(it["product_name"] == "Groove" for it in by_product["items"])
+            plan = db.session.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM records WHERE product_name='Groove' ORDER BY created_at DESC LIMIT 10"
+            )).fetchall()
+            assert "ix_records_product_created" in str(plan)
+
+
+def test_fts_query_sanitizing():
+    """User input can't inject FTS syntax"""
+    assert fts_query('airport Dive+') == '"airport" "dive"*'
+    assert fts_query('NEAR( "x" OR') == '"near" "x" "or"*'
+    assert fts_query("+++") is None
+
+
+if __name__ == "__main__":
+    test_keyset_pagination_and_search()
+    test_fts_query_sanitizing()
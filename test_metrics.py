@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the metrics registry: exposition format, stage timers and multiprocess aggregation
+"""
+
+import os
+import tempfile
+import time
+
+import metrics
+
+
+def _series(text, name):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line.startswith(name)}
+
+
+def test_exposition_format():
+    """Counters, cumulative histogram buckets, stage errors and LLM outcomes render as Prometheus text"""
+    print("🧪 Testing metrics exposition...")
+    with metrics.stage("unit_ok"):
+        time.sleep(0.002)
+    try:
+        with metrics.stage("unit_fail"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    @metrics.llm_call("unit_llm")
+    def call(ok):
+        return "text" if ok else None
+
+    call(True), call(False)
+    metrics.cache_result("unit_cache", True)
+    text = metrics.render()
+    assert "# TYPE mymuse_stage_seconds histogram" in text
+    buckets = _series(text, 'mymuse_stage_seconds_bucket{stage="unit_ok"')
+    counts = list(buckets.values())
+    print(f"📊 unit_ok buckets: {counts}")
+    assert counts == sorted(counts) and counts[-1] == 1  # cumulative, +Inf holds everything
+    assert 'mymuse_stage_seconds_bucket{stage="unit_ok",le="+Inf"} 1' in text
+    assert 'mymuse_stage_errors_total{stage="unit_fail"} 1' in text
+    assert 'mymuse_llm_requests_total{provider="unit_llm",outcome="ok"} 1' in text
+    assert 'mymuse_llm_requests_total{provider="unit_llm",outcome="empty"} 1' in text
+    assert 'mymuse_cache_requests_total{cache="unit_cache",result="hit"} 1' in text
+
+
+def test_multiprocess_aggregation():
+    """Forked workers' counters are summed; exited workers keep counting, their gauges don't"""
+    print("🧪 Testing multiprocess aggregation...")
+    with tempfile.TemporaryDirectory() as d:
+        old = metrics.METRICS_DIR
+        metrics.METRICS_DIR = d
+        try:
+            metrics.reset_dir()
+            pids = []
+            for i in range(3):
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        metrics.ERRORS.labels(kind="unit_mp").inc(i + 1)
+                        metrics.STAGE_SECONDS.labels(stage="unit_mp").observe(0.2)
+                        metrics.QUEUE_DEPTH.labels(queue="unit_mp").set(5)
+                        metrics.mark_process_dead()  # what gunicorn's worker_exit does
+                    finally:
+                        os._exit(0)
+                pids.append(pid)
+            for pid in pids:
+                os.waitpid(pid, 0)
+            metrics.QUEUE_DEPTH.labels(queue="unit_mp").set(2)
+            text = metrics.render()
+            print(f"📁 Files: {sorted(os.listdir(d))}")
+            assert 'mymuse_errors_total{kind="unit_mp"} 6' in text
+            assert 'mymuse_stage_seconds_count{stage="unit_mp"} 3' in text
+            assert 'mymuse_queue_depth{queue="unit_mp"} 2' in text  # only the live process
+            assert "archive.json" in os.listdir(d)
+        finally:
+            metrics.METRICS_DIR = old
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_multiprocess_aggregation()
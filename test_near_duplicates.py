@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test MinHash/LSH near-duplicate pruning for variations
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from minhash import cluster_near_duplicates, dedupe_near_duplicates, estimate_jaccard, signature
+
+def test_near_duplicates():
+    print("=== TESTING NEAR-DUPLICATE PRUNING ===")
+    
+    base = ("Airport bound and guess what? Dive+ is my premium travel companion! "
+            "Security check time, got my MyMuse App ready, gotta get through with my Dive+. "
+            "See you on the other side. Dive+ and I love exploring new places together.")
+    one_word = base.replace("premium", "favourite")
+    different = ("People stress so much about size, but honestly connection beats inches every time. "
+                 "Dive+ keeps things comfy and discreet. Find your rhythm.")
+    
+    print(f"Jaccard(base, one-word edit): {estimate_jaccard(signature(base), signature(one_word)):.2f}")
+    print(f"Jaccard(base, different): {estimate_jaccard(signature(base), signature(different)):.2f}")
+    
+    clusters = cluster_near_duplicates([base, different, one_word])
+    print(f"Clusters: {clusters}")
+    assert sorted(map(sorted, clusters)) == [[0, 2], [1]]
+    
+    items = [{"text": base, "score": 70}, {"text": different, "score": 80}, {"text": one_word, "score": 95}]
+    kept = dedupe_near_duplicates(items, text_of=lambda r: r["text"], score_of=lambda r: r["score"])
+    print(f"Kept scores: {[k['score'] for k in kept]}")
+    assert [k["score"] for k in kept] == [80, 95]
+    
+    print("Test completed!")
+
+def test_variations_dedupe_before_evaluation():
+    print("=== TESTING DEDUPE BEFORE EVALUATION ===")
+    import generate
+    
+    words = ["airport", "candles", "playlist", "hills", "sunday", "bubble", "balcony", "rain",
+             "roadtrip", "bookshop", "pottery", "sunset", "yoga", "picnic", "museum", "garden"]
+    fresh = iter(f"Okay so {w} day, just me and my {w} plans, honestly the {w} mood is everything and {w} wins." for w in words)
+    copy = "Airport bound and guess what, my favourite travel buddy is coming along for the ride again."
+    calls, evaluated = [], []
+    
+    def fake_local(product, transcript, count=10, gen_z=False, ctx=None):
+        calls.append(count)
+        # First batch: 5 near-identical copies + 3 distinct; top-ups are distinct
+        if len(calls) == 1:
+            return [copy] * 5 + [next(fresh) for _ in range(count - 5)]
+        return [next(fresh) for _ in range(count)]
+    
+    def counting_eval(vv, *args, **kwargs):
+        evaluated.append(vv)
+        return {"pass": True, "score": 90, "fixes": []}
+    
+    saved = (generate.GENERATOR, generate._enhanced_local_variations, generate.evaluate_script_new)
+    generate.GENERATOR = "local"
+    generate._enhanced_local_variations = fake_local
+    generate.evaluate_script_new = counting_eval
+    try:
+        out = generate.generate_variations("Dive+", "airport trip", {}, count=8, integrate_product=False)
+        print(f"Generation calls: {calls}, evaluated: {len(evaluated)}")
+        # 8 requested, 4 copies pruned -> one top-up of exactly 4, and only distinct scripts are evaluated
+        assert calls == [8, 4]
+        assert len(evaluated) == 8 and len(set(evaluated)) == 8
+        assert len(out["variations"]) == 8
+        
+        # A batch with nothing to prune is never topped up
+        calls.clear(); evaluated.clear()
+        generate._enhanced_local_variations = lambda p, t, count=10, **k: (calls.append(count), [next(fresh) for _ in range(count)])[1]
+        generate.generate_variations("Dive+", "airport trip", {}, count=2, integrate_product=False)
+        assert calls == [2] and len(evaluated) == 2
+    finally:
+        generate.GENERATOR, generate._enhanced_local_variations, generate.evaluate_script_new = saved
+    
+    print("Test completed!")
+
+if __name__ == "__main__":
+    test_near_duplicates()
+    test_variations_dedupe_before_evaluation()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test the cross-request originality memory and its evaluator caps
+"""
+
+import os
+import tempfile
+
+from flask import Flask
+
+import generate
+from extensions import db
+from models import Record, User
+from originality_memory import OriginalityMemory
+from evaluator import UGCScriptEvaluator, memory_originality
+from text_store import intern_many
+
+SHIPPED = (
+    "Okay so airport security was my biggest fear. Tiny, silent, looks like a lipstick, "
+    "nobody even blinked at it. Ten modes, one button, and it is whisper quiet in a hotel room."
+)
+FRESH = (
+    "My partner and I were stuck in a routine. The warming gel changed date night completely, "
+    "it feels natural and the bottle lasts ages."
+)
+
+
+def test_originality_memory():
+    """Shipped scripts are remembered; unrelated ones are not flagged"""
+    print("🧪 Testing OriginalityMemory...")
+    OriginalityMemory.clear()
+    try:
+        assert OriginalityMemory.max_similarity(SHIPPED) is None
+
+        stats = OriginalityMemory.load_texts([SHIPPED, "", "  "])
+        print(f"📦 Loaded: {stats}")
+        assert stats == {"added": 1, "total": 1}
+
+        same = OriginalityMemory.max_similarity(SHIPPED)
+        other = OriginalityMemory.max_similarity(FRESH)
+        print(f"📊 Same script: {same}")
+        print(f"📊 Fresh script: {other}")
+        assert same["cosine"] > 0.99 and same["fourgram"] == 1.0
+        assert other["cosine"] < 0.3 and other["fourgram"] == 0.0
+
+        # Adds after the first query land in the tail matrix and are visible at once
+        OriginalityMemory.add(FRESH)
+        assert OriginalityMemory.max_similarity(FRESH)["fourgram"] == 1.0
+
+        evaluator = UGCScriptEvaluator()
+        record = evaluator.evaluate_many("travel vibrator review", "Dive", [SHIPPED])[0].originality
+        print(f"📊 Evaluator memory scores: {record}")
+        assert record["cosine_vs_memory_max"] > 0.99
+        assert record["caps_ok"] is False
+    finally:
+        OriginalityMemory.clear()
+
+
+def _save(session, text):
+    transcript_hash, generated_hash = intern_many(session, ["travel transcript", text])
+    session.add(Record(user_id=1, product_name="Dive", transcript_hash=transcript_hash, generated_hash=generated_hash))
+    session.commit()
+
+
+def test_sync_from_records():
+    """Every worker converges on the records table; local adds are not double counted"""
+    print("🧪 Testing OriginalityMemory sync...")
+    OriginalityMemory.clear()
+    with tempfile.TemporaryDirectory() as d:
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(d, 'app.db')}", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+        db.init_app(app)
+        try:
+            with app.app_context():
+                db.create_all()
+                db.session.add(User(id=1, email="public@mymuse.local", password_hash="x"))
+                _save(db.session, SHIPPED)
+
+                assert OriginalityMemory.sync(db.session) == 1
+                # This worker shipped FRESH itself, then another worker saved one more script
+                OriginalityMemory.add(FRESH)
+                _save(db.session, FRESH)
+                _save(db.session, SHIPPED.replace("lipstick", "lip balm"))
+                added = OriginalityMemory.sync(db.session)
+                print(f"📦 Synced {added} new script(s), {OriginalityMemory.size()} remembered")
+                assert added == 1 and OriginalityMemory.size() == 3
+                assert OriginalityMemory.sync(db.session) == 0
+                assert OriginalityMemory.maybe_sync(db.session, check_every=60) == 0
+                db.session.remove()
+        finally:
+            OriginalityMemory.clear()
+
+
+VOCAB = ("airport candles playlist hills sunday bubble balcony rain roadtrip bookshop pottery sunset yoga picnic "
+         "museum garden coffee beach train sketch journal market dance concert kitchen rooftop lake forest bakery "
+         "cinema library festival sauna vinyl puzzle orchard harbour desert canyon glacier meadow island").split()
+CANDIDATES = [
+    f"Honestly my {a} ritual is everything lately.\nThen {b} with the lights low, no rush at all.\n"
+    f"And a little {c} moment just for me before bed."
+    for a, b, c in zip(VOCAB[0::3], VOCAB[1::3], VOCAB[2::3])
+]
+
+
+def test_generate_skips_shipped_scripts():
+    """The /generate path (generate → generate_variations) never ships a remembered script"""
+    print("🧪 Testing originality memory on the generate path...")
+    cursor = [0]
+
+    def fake_local(product, transcript, count=10, gen_z=False, ctx=None):
+        out = CANDIDATES[cursor[0]:cursor[0] + count]
+        cursor[0] += count
+        return out
+
+    saved = (generate.GENERATOR, generate._enhanced_local_variations, generate._enhanced_local_script)
+    generate.GENERATOR = "local"
+    generate._enhanced_local_variations = fake_local
+    generate._enhanced_local_script = lambda *a, **k: SHIPPED.replace(". ", ".\n")
+    OriginalityMemory.clear()
+    try:
+        first = generate.generate("Dive", "airport trip with my travel buddy", {}, [], {})
+        # What /generate saves: the primary script; also remember a variation and a raw candidate
+        shipped_variation = first["variations"][0]["text"]
+        OriginalityMemory.add_many([first["generated_script"], shipped_variation, CANDIDATES[0]])
+
+        cursor[0] = 0
+        second = generate.generate("Dive", "airport trip with my travel buddy", {}, [], {})
+        texts = [second["generated_script"]] + [v["text"] for v in second["variations"]]
+        checks = memory_originality(texts)
+        print(f"📊 Memory cosine of shipped output: {[c['cosine'] for c in checks]}")
+        assert second["generated_script"] != first["generated_script"]
+        assert checks[0]["caps_ok"]
+        # A remembered script only comes back to fill a slot, and is marked when it does
+        for v, check in zip(second["variations"], checks[1:]):
+            assert v["evaluation"]["memory_capped"] == (not check["caps_ok"])
+        assert all(v["evaluation"]["memory_capped"] for v in second["variations"] if v["text"] == shipped_variation)
+        assert all(v["evaluation"]["memory_cosine"] is not None for v in second["variations"])
+    finally:
+        generate.GENERATOR, generate._enhanced_local_variations, generate._enhanced_local_script = saved
+        OriginalityMemory.clear()
+
+
+def test_regenerating_past_the_cap_still_fills_every_slot():
+    """Once every candidate has shipped, the least similar ones fill the slots, marked"""
+    print("🧪 Testing variations past the memory cap...")
+    saved = (generate.GENERATOR, generate._enhanced_local_variations)
+    generate.GENERATOR = "local"
+    # Deterministic generator: the same Reel always yields the same candidates
+    generate._enhanced_local_variations = lambda product, transcript, count=10, gen_z=False, ctx=None: CANDIDATES[:count]
+    OriginalityMemory.clear()
+    try:
+        for run in range(3):
+            out = generate.generate_variations("Dive", "airport trip with my travel buddy", {}, count=5)
+            variations = out["variations"]
+            capped = [v["evaluation"]["memory_capped"] for v in variations]
+            print(f"🔁 Run {run + 1}: {len(variations)} variations, capped={capped}")
+            assert len(variations) == 5
+            if run:
+                assert any(capped)
+            checks = memory_originality([v["text"] for v in variations])
+            assert capped == [not c["caps_ok"] for c in checks]
+            OriginalityMemory.add_many([v["text"] for v in variations])
+    finally:
+        generate.GENERATOR, generate._enhanced_local_variations = saved
+        OriginalityMemory.clear()
+
+
+if __name__ == "__main__":
+    test_originality_memory()
+    test_sync_from_records()
+    test_generate_skips_shipped_scripts()
+    test_regenerating_past_the_cap_still_fills_every_slot()
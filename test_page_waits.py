@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the fast scraping mode: CDP resource blocking and readiness waits
+"""
+
+import time
+from unittest import mock
+
+import page_waits
+
+
+class ScriptedDriver:
+    """Returns page states from a script: busy for `busy_polls` polls, then quiet."""
+
+    def __init__(self, busy_polls: int):
+        self.busy_polls = busy_polls
+        self.polls = 0
+        self.cdp = []
+
+    def execute_script(self, js):
+        self.polls += 1
+        if self.polls <= self.busy_polls:
+            return {"ready": "interactive", "mutation_idle_ms": 5, "network_idle_ms": 5, "inflight": 2}
+        return {"ready": "complete", "mutation_idle_ms": 900, "network_idle_ms": 900, "inflight": 0}
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+        return {}
+
+
+def test_wait_quiet_tracks_readiness():
+    """Returns as soon as the page is quiet, and gives up at the timeout"""
+    print("🧪 Testing wait_quiet...")
+    with mock.patch.object(page_waits, "POLL_SECONDS", 0.01):
+        d = ScriptedDriver(busy_polls=3)
+        t0 = time.monotonic()
+        assert page_waits.wait_quiet(d, quiet_ms=600, timeout=2)
+        print(f"⏱️ Ready after {d.polls} polls in {time.monotonic() - t0:.2f}s")
+        assert d.polls == 4
+
+        stuck = ScriptedDriver(busy_polls=10 ** 6)
+        assert not page_waits.wait_quiet(stuck, timeout=0.1)
+
+
+def test_wait_for_growth():
+    """Stops polling once the count grows; returns the old count on timeout"""
+    print("🧪 Testing wait_for_growth...")
+    counts = iter([10, 10, 10, 20])
+    with mock.patch.object(page_waits, "POLL_SECONDS", 0.01):
+        assert page_waits.wait_for_growth(lambda: next(counts), 10, timeout=2) == 20
+        assert page_waits.wait_for_growth(lambda: 10, 10, timeout=0.05) == 10
+
+
+def test_settle_never_outwaits_legacy_sleep():
+    """A page that never goes quiet costs no more than the sleep it replaced"""
+    print("🧪 Testing settle timeout cap...")
+    with mock.patch.object(page_waits, "SCRAPE_FAST_MODE", True), \
+            mock.patch.object(page_waits, "POLL_SECONDS", 0.01):
+        stuck = ScriptedDriver(busy_polls=10 ** 6)
+        t0 = time.monotonic()
+        page_waits.settle(stuck, 0.2)
+        elapsed = time.monotonic() - t0
+        print(f"⏱️ Gave up after {elapsed:.2f}s")
+        assert elapsed < 1
+
+        idle = ScriptedDriver(busy_polls=0)
+        page_waits.settle(idle, 0)
+        assert idle.polls == 0
+
+
+def test_prepare_tab_blocks_resources():
+    """Fast mode blocks heavy/third-party URLs and installs the watcher via CDP"""
+    print("🧪 Testing prepare_tab...")
+    d = ScriptedDriver(busy_polls=0)
+    with mock.patch.object(page_waits, "SCRAPE_FAST_MODE", True):
+        assert page_waits.prepare_tab(d)
+    cmds = dict(d.cdp)
+    assert "*.woff*" in cmds["Network.setBlockedURLs"]["urls"]
+    assert "__mmWatch" in cmds["Page.addScriptToEvaluateOnNewDocument"]["source"]
+    print(f"🚫 Blocking {len(cmds['Network.setBlockedURLs']['urls'])} URL patterns")
+
+    with mock.patch.object(page_waits, "SCRAPE_FAST_MODE", False):
+        assert not page_waits.prepare_tab(ScriptedDriver(busy_polls=0))
+
+
+if __name__ == "__main__":
+    test_wait_quiet_tracks_readiness()
+    test_wait_for_growth()
+    test_settle_never_outwaits_legacy_sleep()
+    test_prepare_tab_blocks_resources()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test the compiled brand-safety phrase rules used by generate.py
+"""
+
+from generate import (
+    BANNED_CONTENT_RULES,
+    BANNED_TAGLINE_RULES,
+    MEDICAL_CLAIM_RULES,
+    phrase_rule_hits,
+)
+
+
+def test_phrase_rules():
+    """One scan per text: case-insensitive, word-boundary aware, counted per rule"""
+    print("🧪 Testing phrase rules...")
+    BANNED_TAGLINE_RULES.reset_hits()
+    MEDICAL_CLAIM_RULES.reset_hits()
+
+    line = "Ten modes, one button. Trust Your Desires. Feel good.  No apologies!"
+    cleaned = BANNED_TAGLINE_RULES.sub(line)
+    print(f"📝 Taglines removed: {cleaned!r}")
+    assert "desires" not in cleaned.lower() and "apologies" not in cleaned.lower()
+    assert BANNED_TAGLINE_RULES.truncate(line) == "Ten modes, one button"
+    assert BANNED_TAGLINE_RULES.search("Your adventure awaits, loves") == "your adventure awaits"
+
+    # Word boundaries: "secure" and "curated" are not the medical term "cure"
+    assert MEDICAL_CLAIM_RULES.search("Secure case, curated modes") is None
+    rewritten = MEDICAL_CLAIM_RULES.sub("Clinically proven and a total cure, basically therapy")
+    print(f"📝 Medical claims rewritten: {rewritten!r}")
+    assert rewritten == "comfortable and a total comfortable, basically self-care"
+
+    assert BANNED_CONTENT_RULES.sub("not porn, just pleasure").strip() == "not , just pleasure"
+
+    hits = phrase_rule_hits()
+    print(f"📊 Hits: {hits}")
+    assert hits["banned_taglines"]["trust your desires"] == 2  # sub + truncate
+    assert hits["medical_claims"]["clinically proven"] == 1
+
+
+if __name__ == "__main__":
+    test_phrase_rules()
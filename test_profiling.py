@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test request profiling: gating, cProfile / stack-sample output and retention
+"""
+
+import os
+import pstats
+import tempfile
+import time
+
+import profiling
+
+
+def _busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        sum(i * i for i in range(200))
+
+
+def test_gating():
+    """Off unless a token or sample rate is configured; wrong tokens never profile"""
+    print("🧪 Testing profiling gates...")
+    old = profiling.PROFILE_TOKEN, profiling.PROFILE_SAMPLE_RATE
+    try:
+        profiling.PROFILE_TOKEN, profiling.PROFILE_SAMPLE_RATE = "", 0
+        assert not profiling.enabled() and profiling.wanted("anything") is None
+        profiling.PROFILE_TOKEN = "s3cret"
+        assert profiling.wanted("s3cret") == "on-demand"
+        assert profiling.wanted("guess") is None and profiling.wanted(None) is None
+        profiling.PROFILE_TOKEN, profiling.PROFILE_SAMPLE_RATE = "", 4
+        picks = [profiling.wanted(None) for _ in range(40)]
+        print(f"🎲 1-in-4 sampling picked {sum(p == 'sampled' for p in picks)} of 40")
+        assert sum(p == "sampled" for p in picks) == 10
+    finally:
+        profiling.PROFILE_TOKEN, profiling.PROFILE_SAMPLE_RATE = old
+
+
+def test_writes_profiles_and_prunes():
+    """cProfile writes .prof + .txt summary, sampling writes collapsed stacks; old ones are pruned"""
+    print("🧪 Testing profile output...")
+    with tempfile.TemporaryDirectory() as d:
+        old = profiling.PROFILE_DIR, profiling.PROFILE_KEEP
+        profiling.PROFILE_DIR, profiling.PROFILE_KEEP = d, 2
+        try:
+            s = profiling.Session("on-demand", "cprofile").start()
+            _busy(30)
+            name = s.stop("generate_route")
+            assert name.endswith(".prof") and "generate_route_on-demand" in name
+            stats = pstats.Stats(os.path.join(d, name))
+            assert any(func[2] == "_busy" for func in stats.stats)
+            assert "_busy" in open(os.path.join(d, name[:-5] + ".txt")).read()
+
+            s = profiling.Session("sampled", "sample").start()
+            _busy(60)
+            name = s.stop("transcribe_route")
+            collapsed = open(os.path.join(d, name)).read()
+            print(f"🔥 {len(collapsed.splitlines())} distinct stacks, e.g. {collapsed.splitlines()[0][-60:]}")
+            assert "test_profiling.py:_busy" in collapsed
+
+            time.sleep(0.01)
+            profiling.Session("sampled", "sample").start().stop("third")
+            stems = {os.path.splitext(p["name"])[0] for p in profiling.list_profiles()}
+            assert len(stems) == 2 and not any("generate_route" in s for s in stems)
+            assert profiling.resolve("../etc/passwd") is None and profiling.resolve("x.py") is None
+        finally:
+            profiling.PROFILE_DIR, profiling.PROFILE_KEEP = old
+
+
+if __name__ == "__main__":
+    test_gating()
+    test_writes_profiles_and_prunes()
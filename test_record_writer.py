@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test write-behind record batching and the SQLite WAL setup
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from extensions import configure_sqlite
+from record_writer import RecordWriter
+
+
+def test_batches_by_size_and_time():
+    """Rows are committed in batches of N, stragglers after M ms; close() drains"""
+    print("🧪 Testing RecordWriter batching...")
+    batches = []
+    w = RecordWriter(lambda rows: batches.append(list(rows)), batch_size=5, flush_ms=50)
+
+    threads = [threading.Thread(target=lambda i=i: w.submit({"n": i})) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    w.flush()
+    print(f"📦 Batch sizes: {[len(b) for b in batches]}")
+    assert sorted(r["n"] for b in batches for r in b) == list(range(12))
+    assert all(len(b) <= 5 for b in batches) and len(batches) < 12
+
+    t0 = time.monotonic()
+    w.submit({"n": 99})
+    w.flush()
+    assert time.monotonic() - t0 < 1.0 and batches[-1] == [{"n": 99}]
+
+    w.submit({"n": 100})
+    w.close()
+    assert batches[-1] == [{"n": 100}] and w.stats()["written"] == 14
+
+
+def test_bad_row_does_not_sink_batch():
+    """A failing batch is retried row by row so good rows still land"""
+    print("🧪 Testing RecordWriter row-level retry...")
+    written = []
+
+    def write(rows):
+        if any(r.get("bad") for r in rows):
+            raise ValueError("constraint failed")
+        written.extend(rows)
+
+    w = RecordWriter(write, batch_size=10, flush_ms=100)
+    for row in ({"n": 1}, {"bad": True}, {"n": 2}):
+        w.submit(row)
+    w.close()
+    print(f"✅ Written: {written}, stats: {w.stats()}")
+    assert [r["n"] for r in written] == [1, 2] and w.stats()["failed"] == 1
+
+
+def test_sqlite_wal_pragmas():
+    """configure_sqlite switches file databases to WAL + synchronous=NORMAL"""
+    print("🧪 Testing SQLite WAL setup...")
+    with tempfile.TemporaryDirectory() as d:
+        engine = create_engine(f"sqlite:///{os.path.join(d, 'app.db')}")
+        configure_sqlite(engine)
+        with engine.connect() as conn:
+            mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+            sync = conn.execute(text("PRAGMA synchronous")).scalar()
+        engine.dispose()
+        print(f"🗄️ journal_mode={mode} synchronous={sync}")
+        assert mode == "wal" and sync == 1  # 1 == NORMAL
+
+
+if __name__ == "__main__":
+    test_batches_by_size_and_time()
+    test_bad_row_does_not_sink_batch()
+    test_sqlite_wal_pragmas()
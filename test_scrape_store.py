@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test incremental scraping: seen-review fingerprints, append-only store, compaction
+"""
+
+import csv
+import os
+import tempfile
+
+from scrape_store import ScrapeStore, fingerprint
+
+URL = "https://mymuse.in/collections/deal-of-the-day"
+
+
+def _rows(*texts):
+    return [{"product_name": "mymuse", "text": t, "source": "website_review_a", "engagement": 0, "hashtags": []}
+            for t in texts]
+
+
+def _store_texts(store):
+    with open(store.path, newline="", encoding="utf-8") as f:
+        return [r["text"] for r in csv.DictReader(f)]
+
+
+def test_only_new_rows_are_appended():
+    """A rescrape emits only unseen reviews; formatting noise doesn't count as new"""
+    print("🧪 Testing ScrapeStore.add_rows...")
+    with tempfile.TemporaryDirectory() as d:
+        store = ScrapeStore(d)
+        first = store.add_rows(_rows("Review: Whisper quiet, love it!", "Review: Battery lasts a week"), URL)
+        assert len(first) == 2
+
+        again = store.add_rows(_rows("review:  whisper QUIET love it", "Review: Brand new opinion here"), URL)
+        print(f"📥 Second scrape new rows: {[r['text'] for r in again]}")
+        assert [r["text"] for r in again] == ["Review: Brand new opinion here"]
+
+        # Same text on another page is a different review
+        assert len(store.add_rows(_rows("Review: Battery lasts a week"), URL + "?page=2")) == 1
+        assert len(_store_texts(store)) == 4 and store.seen_count() == 4
+        assert fingerprint("A, b!", URL) == fingerprint("a b", URL.upper())
+
+
+def test_compaction_folds_legacy_csvs():
+    """Legacy timestamped CSVs are merged (deduplicated) into the store and removed"""
+    print("🧪 Testing ScrapeStore.compact...")
+    with tempfile.TemporaryDirectory() as d:
+        for ts in (1700000000, 1700003600):
+            with open(os.path.join(d, f"mymuse_website_{ts}.csv"), "w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=["product_name", "text", "source", "engagement", "hashtags"])
+                w.writeheader()
+                w.writerows([{"product_name": "mymuse", "text": "Review: Same review every hour",
+                              "source": "website_review_a", "engagement": 0, "hashtags": ""}])
+        keep = os.path.join(d, "mymuse_reviews.csv")
+        open(keep, "w").close()
+
+        store = ScrapeStore(d)
+        info = store.compact()
+        print(f"🗜️ Compaction: {info}")
+        assert info == {"files": 2, "added": 1}
+        assert sorted(os.listdir(d)) == sorted(["mymuse_reviews.csv", "scraped_seen.sqlite", "scraped_training.csv"])
+
+        # The next live scrape of the same page adds nothing
+        assert store.add_rows(_rows("Review: Same review every hour"), URL) == []
+
+
+def test_instagram_username_kept():
+    """Instagram rows keep their username; a store without the column is migrated"""
+    print("🧪 Testing username column...")
+    with tempfile.TemporaryDirectory() as d:
+        store = ScrapeStore(d)
+        old_cols = ["product_name", "text", "source", "source_url", "engagement", "hashtags", "scraped_at"]
+        with open(store.path, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=old_cols)
+            w.writeheader()
+            w.writerow({"product_name": "mymuse", "text": "Review: Written before the migration",
+                        "source": "website_review_a", "source_url": URL, "engagement": 0,
+                        "hashtags": "", "scraped_at": "2025-01-01T00:00:00"})
+
+        post = {"product_name": "mymuse", "text": "Loving the new glide #selfcare",
+                "source": "instagram_post_0", "username": "mymuse.in", "hashtags": ["selfcare"]}
+        fresh = store.add_rows([post], "https://www.instagram.com/mymuse.in/")
+        assert fresh[0]["username"] == "mymuse.in"
+
+        with open(store.path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        print(f"📋 Columns: {reader.fieldnames}")
+        assert "username" in reader.fieldnames
+        assert [r["username"] for r in rows] == ["", "mymuse.in"]
+        assert rows[0]["text"] == "Review: Written before the migration"
+        assert rows[1]["hashtags"] == "selfcare"
+
+
+if __name__ == "__main__":
+    test_only_new_rows_are_appended()
+    test_compaction_folds_legacy_csvs()
+    test_instagram_username_kept()
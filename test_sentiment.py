@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test the cached VADER analyzer and batched sentiment scoring
+"""
+
+from unittest import mock
+
+import analysis
+
+
+class _CountingAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    def polarity_scores(self, text):
+        self.calls += 1
+        pos = 0.5 if "love" in text else 0.0
+        return {"neg": 0.0, "neu": 1.0 - pos, "pos": pos, "compound": pos}
+
+
+def test_sentiment_many_cached():
+    """Each distinct text is scored once; repeats come from the LRU"""
+    print("🧪 Testing sentiment_many...")
+    fake = _CountingAnalyzer()
+    with mock.patch.object(analysis, "_vader", fake), \
+         mock.patch.object(analysis, "_sentiment_cache", analysis.OrderedDict()):
+        batch = analysis.sentiment_many(["I love it", "meh", "I love it", None])
+        print(f"📊 Batch: {batch}")
+        assert [s["compound"] for s in batch] == [0.5, 0.0, 0.5, 0.0]
+        assert fake.calls == 3  # "I love it" scored once
+
+        again = analysis.sentiment_vader("I love it")
+        assert again == batch[0] and fake.calls == 3
+
+        again["compound"] = -1.0  # callers get copies
+        assert analysis.sentiment_vader("I love it")["compound"] == 0.5
+
+
+def test_sentiment_fallback_neutral():
+    """Without a usable analyzer every text scores neutral"""
+    with mock.patch.object(analysis, "_vader", None), \
+         mock.patch.object(analysis, "_vader_failed", True):
+        assert analysis.sentiment_vader("I love it") == {"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0}
+
+
+if __name__ == "__main__":
+    test_sentiment_many_cached()
+    test_sentiment_fallback_neutral()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent static fetcher against a local HTTP server
+"""
+
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import static_fetcher
+from static_fetcher import HttpCache, StaticFetcher
+
+REVIEW_PAGE = (
+    "<html><body><div class='jdgm-rev__body'>"
+    "Honestly the quietest toy I have owned, battery lasts all week"
+    "</div></body></html>"
+)
+EMPTY_PAGE = "<html><body><div id='reviews-widget'></div></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = []
+    active = [0, 0]  # current, peak
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.hits.append((self.path, self.headers.get("If-None-Match")))
+            self.active[0] += 1
+            self.active[1] = max(self.active[1], self.active[0])
+        try:
+            time.sleep(0.05)
+            etag = f'"{self.path}-v1"'
+            if self.path == "/missing":
+                self.send_response(404)
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            if self.path.startswith("/sitemap"):
+                body = _sitemap(self.path, f"http://{self.headers['Host']}").encode()
+            else:
+                body = (EMPTY_PAGE if self.path.startswith("/js") else REVIEW_PAGE).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.lock:
+                self.active[0] -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _sitemap(path, base):
+    if path == "/sitemap.xml":
+        locs = [f"{base}/sitemap_products_1.xml", f"{base}/sitemap_pages_1.xml"]
+    elif path == "/sitemap_products_1.xml":
+        locs = [f"{base}/products/vibe", f"{base}/products/glide"]
+    else:
+        locs = [f"{base}/pages/about"]
+    return "<urlset>" + "".join(f"<url><loc>{u}</loc></url>" for u in locs) + "</urlset>"
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_conditional_get_and_host_limit():
+    """Second crawl is all 304s from the disk cache; per-host concurrency is capped"""
+    print("🧪 Testing StaticFetcher...")
+    server, base = _serve()
+    _Handler.hits, _Handler.active = [], [0, 0]
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fetcher = StaticFetcher(workers=8, per_host=2, cache=HttpCache(d))
+            urls = [f"{base}/products/p{i}" for i in range(8)]
+
+            first = fetcher.fetch_many(urls)
+            assert [r.status for r in first] == [200] * 8
+            print(f"📈 Peak concurrent requests to one host: {_Handler.active[1]}")
+            assert _Handler.active[1] <= 2
+
+            second = StaticFetcher(per_host=2, cache=HttpCache(d)).fetch_many(urls)
+            assert all(r.status == 304 and r.from_cache for r in second)
+            assert [r.text for r in second] == [r.text for r in first]
+            assert all(inm for _, inm in _Handler.hits[8:])
+            print(f"♻️ Revalidated {len(second)} pages with 304s")
+    finally:
+        server.shutdown()
+
+
+def test_escalates_only_empty_pages():
+    """Only pages the static pass can't read go to the Selenium path"""
+    print("🧪 Testing JS escalation...")
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fetcher = StaticFetcher(cache=HttpCache(d))
+            urls = [f"{base}/products/a", f"{base}/js/b", f"{base}/missing", f"{base}/js/no-reviews"]
+            rendered = lambda url: [] if "no-reviews" in url else ["Rendered review text from the widget here"]
+            with mock.patch("selenium_scraper.scrape_js_reviews", side_effect=rendered) as js:
+                out = static_fetcher.scrape_reviews_many(urls, fetcher=fetcher)
+            print(f"🌐 Escalated: {[c.args[0] for c in js.call_args_list]}")
+            assert [c.args[0] for c in js.call_args_list] == [f"{base}/js/b", f"{base}/js/no-reviews"]
+            assert "quietest toy" in out[urls[0]][0]
+            assert out[urls[1]] and out[urls[2]] == [] and out[urls[3]] == []
+
+            # Unchanged since it was rendered: a 304 and the cached JS outcome, no browser
+            with mock.patch("selenium_scraper.scrape_js_reviews") as js:
+                again = static_fetcher.scrape_reviews_many(urls, fetcher=StaticFetcher(cache=HttpCache(d)))
+            print(f"♻️ Escalated on the rerun: {js.call_count}")
+            assert js.call_count == 0 and again == out
+    finally:
+        server.shutdown()
+
+
+def test_website_scrape_crawls_product_pages():
+    """The scheduled website scrape pulls reviews from every sitemap product page"""
+    print("🧪 Testing product page crawl...")
+    import mymuse_website_scraper as mws
+
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fetcher = StaticFetcher(cache=HttpCache(d))
+            with mock.patch.object(static_fetcher, "get_fetcher", return_value=fetcher):
+                reviews = mws.crawl_product_reviews(f"{base}/collections/deal-of-the-day", [])
+            print(f"🛍️ Crawled reviews for: {[r.product for r in reviews]}")
+            assert sorted(r.product for r in reviews) == ["glide", "vibe"]
+
+            rows = mws.convert_to_training_data(mws.MyMuseWebsiteData([], reviews, [], [], 0))
+            assert {r["source"] for r in rows} == {"website_review_vibe", "website_review_glide"}
+            assert mws.crawl_product_reviews(base, [], limit=0) == []
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_conditional_get_and_host_limit()
+    test_escalates_only_empty_pages()
+    test_website_scrape_crawls_product_pages()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test content-addressed record texts: dedup, compression and the inline-column migration
+"""
+
+import os
+import tempfile
+
+from flask import Flask
+from sqlalchemy import text
+
+from extensions import db
+from models import Record, Text
+from history import ensure_history_schema, query_history
+import text_store
+
+
+def _app(path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    return app
+
+
+def test_encode_round_trip():
+    """Long texts are zlib-compressed, short ones stay raw; both decode back"""
+    print("🧪 Testing text encode/decode...")
+    long_text = "Okay so honestly this changed our nights. " * 100
+    codec, body = text_store.encode(long_text)
+    print(f"🗜️ {len(long_text)} chars -> {codec} {len(body)} bytes")
+    assert codec == "zlib" and len(body) < len(long_text) // 4
+    assert text_store.decode(codec, body) == long_text
+    assert text_store.encode("short") == ("raw", b"short")
+    assert text_store.decode("raw", "नमस्ते".encode("utf-8")) == "नमस्ते"
+
+
+def test_regenerating_adds_no_text_rows():
+    """The same transcript/script is stored once however many records use it"""
+    print("🧪 Testing text dedup...")
+    with tempfile.TemporaryDirectory() as d:
+        app = _app(os.path.join(d, "app.db"))
+        with app.app_context():
+            text_store.register_sqlite_functions(db.engine)
+            db.create_all()
+            ensure_history_schema(db.engine)
+            db.session.execute(text("INSERT INTO users (id, email, password_hash, is_admin) VALUES (1, 'p@x', 'x', 0)"))
+            transcript = "went through airport security with my Dive+ " * 40
+            for _ in range(3):
+                th, gh = text_store.intern_many(db.session, [transcript, "Okay so nobody noticed"])
+                db.session.add(Record(user_id=1, product_name="Dive+", transcript_hash=th, generated_hash=gh))
+                db.session.commit()
+            assert db.session.query(Record).count() == 3
+            assert db.session.query(Text).count() == 2
+            rec = db.session.query(Record).first()
+            assert rec.transcript == transcript and rec.generated_text == "Okay so nobody noticed"
+            assert len(query_history(db.session, Record, q="airport")["items"]) == 3
+
+
+def test_migrates_inline_schema():
+    """Old databases with inline text columns move to texts and stay searchable"""
+    print("🧪 Testing inline-text migration...")
+    with tempfile.TemporaryDirectory() as d:
+        app = _app(os.path.join(d, "app.db"))
+        with app.app_context():
+            text_store.register_sqlite_functions(db.engine)
+            with db.engine.begin() as conn:
+                conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255), "
+                                  "password_hash VARCHAR(255), is_admin BOOLEAN, created_at DATETIME)"))
+                conn.execute(text("CREATE TABLE records (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                                  "product_name VARCHAR(255) NOT NULL, transcript TEXT NOT NULL, "
+                                  "generated_text TEXT NOT NULL, created_at DATETIME)"))
+                conn.execute(text("INSERT INTO users (id, email, password_hash, is_admin) VALUES (1, 'p@x', 'x', 0)"))
+                conn.execute(text("INSERT INTO records (user_id, product_name, transcript, generated_text, created_at) "
+                                  "VALUES (1, 'Groove', :t, :g, '2025-01-01 00:00:00')"),
+                             [{"t": "quiet discreet travel friendly " * 30, "g": "Okay so the Groove"}] * 4
+                             + [{"t": "battery lasts long", "g": "Okay so charging"}])
+            db.create_all()
+            moved = text_store.migrate_inline_texts(db.engine, batch=2)
+            assert text_store.migrate_inline_texts(db.engine) == 0  # idempotent
+            ensure_history_schema(db.engine)
+            print(f"📦 Migrated {moved} records into {db.session.query(Text).count()} texts")
+            assert moved == 5 and db.session.query(Text).count() == 4
+
+            cols = {r[1] for r in db.session.execute(text("PRAGMA table_info(records)"))}
+            assert "transcript" not in cols and "transcript_hash" in cols
+            assert db.session.get(Record, 5).transcript == "battery lasts long"
+            assert len(query_history(db.session, Record, q="discreet travel")["items"]) == 4
+            assert query_history(db.session, Record, q="charging")["items"][0]["generated_preview"] == "Okay so charging"
+
+
+if __name__ == "__main__":
+    test_encode_round_trip()
+    test_regenerating_adds_no_text_rows()
+    test_migrates_inline_schema()
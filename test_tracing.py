@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test per-request tracing: nested spans, Server-Timing and the slowest-requests list
+"""
+
+import time
+
+import metrics
+import tracing
+
+
+def test_nested_spans_and_server_timing():
+    """Spans nest under the request, stages become spans, the header lists the slowest"""
+    print("🧪 Testing nested spans...")
+    tracing.reset()
+    tracing.start("GET_unit_1", "GET", "/unit")
+    with tracing.span("outer"):
+        with metrics.stage("unit_stage"):
+            time.sleep(0.01)
+        with tracing.span("inner", n=3):
+            pass
+    try:
+        with tracing.span("broken"):
+            raise ValueError("x")
+    except ValueError:
+        pass
+    trace = tracing.finish(200)
+    names = [(s["name"], s["depth"]) for s in trace.spans]
+    print(f"🌲 Spans: {names}")
+    assert names == [("outer", 0), ("unit_stage", 1), ("inner", 1), ("broken", 0)]
+    assert trace.spans[1]["parent"] == 0 and trace.spans[2]["attrs"] == {"n": "3"}
+    assert trace.spans[3]["error"] and trace.spans[1]["dur_ms"] >= 10
+    header = tracing.server_timing(trace)
+    print(f"⏱️ Server-Timing: {header}")
+    assert header.startswith("total;dur=") and "unit_stage;dur=" in header
+    assert tracing.current() is None
+
+
+def test_spans_outside_requests_are_noops():
+    """No active trace: span() records nothing and finish() returns None"""
+    with tracing.span("nothing"):
+        pass
+    assert tracing.finish() is None
+
+
+def test_keeps_only_slowest():
+    """Only the N slowest requests are kept, longest first"""
+    print("🧪 Testing slowest-N retention...")
+    tracing.reset()
+    old = tracing.TRACE_KEEP
+    tracing.TRACE_KEEP = 3
+    try:
+        for i, delay in enumerate((0.001, 0.02, 0.005, 0.03, 0.0, 0.01)):
+            tracing.start(f"req{i}")
+            time.sleep(delay)
+            tracing.finish(200)
+        kept = [t["request_id"] for t in tracing.slowest()]
+        print(f"🐢 Kept: {kept}")
+        assert kept == ["req3", "req1", "req5"]
+    finally:
+        tracing.TRACE_KEEP = old
+        tracing.reset()
+
+
+if __name__ == "__main__":
+    test_nested_spans_and_server_timing()
+    test_spans_outside_requests_are_noops()
+    test_keeps_only_slowest()
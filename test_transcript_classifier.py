@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass transcript classifier
+"""
+
+from generate import _detect_transcript_type, classify_transcript
+
+
+def test_transcript_classifier():
+    """All category hits come from one scan; priority order picks the label"""
+    print("🧪 Testing transcript classifier...")
+    transcript = "My boyfriend loves the quiet motor, ten speed modes and the soft silicone"
+    result = classify_transcript(transcript)
+    print(f"📊 {result}")
+
+    assert result.label == "sexual"  # "soft" outranks relationship + feature words
+    assert result.hits["sexual"] == {"soft"}
+    assert result.hits["sexual_diverse"] == {"boyfriend"}
+    assert result.hits["feature_heavy"] == {"quiet", "motor", "speed", "modes", "silicone"}
+    assert not result.hits["anal_play"]
+
+    # Word boundaries: "happen" is not "pp", "classic" is not "ass"
+    assert _detect_transcript_type("It can happen on a classic airport run") == "casual"
+    assert _detect_transcript_type("Airport security, totally discreet") == "feature_heavy"
+    assert _detect_transcript_type("") == "casual"
+
+    # Memoized per transcript: the pipeline reuses the same object
+    assert classify_transcript(transcript) is result
+
+
+if __name__ == "__main__":
+    test_transcript_classifier()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that one TranscriptContext carries a request's transcript analysis end to end
+"""
+
+from unittest import mock
+
+from enhanced_script_generator import EnhancedScriptGenerator
+from generate import generate
+from transcript_context import TranscriptContext
+
+TRANSCRIPT = (
+    "Okay so airport security used to stress me out. "
+    "This one is tiny and quiet, nobody even noticed it in my bag.\n"
+    "Honestly the best travel buy this year!"
+)
+
+
+def test_transcript_context_fields():
+    """Fields are lazy and computed once"""
+    print("🧪 Testing TranscriptContext fields...")
+    ctx = TranscriptContext(TRANSCRIPT)
+    assert "sentiment" not in ctx.__dict__  # nothing computed up front
+
+    print(f"📝 Sentences: {ctx.sentences}")
+    assert len(ctx.sentences) == 3
+    assert ctx.tokens[:3] == ["Okay", "airport", "security"]
+    assert ctx.transcript_type == "feature_heavy"
+    assert ctx.analysis["keywords"] is ctx.keywords
+    assert ctx.flow_cues and ctx.flow_cues[0].startswith("Flow cues from the video: okay, airport")
+    assert TranscriptContext.of(TRANSCRIPT, ctx) is ctx
+    assert TranscriptContext.of("something else", ctx) is not ctx
+
+
+def test_generate_shares_context():
+    """generate() + its variations analyse the transcript once"""
+    print("🧪 Testing generate() with a shared context...")
+    ctx = TranscriptContext(TRANSCRIPT)
+    analysis = ctx.analysis
+    with mock.patch.object(EnhancedScriptGenerator, "_analyze_transcript",
+                           autospec=True,
+                           side_effect=EnhancedScriptGenerator._analyze_transcript) as analyze:
+        result = generate("Dive+", TRANSCRIPT, analysis["sentiment"], analysis["keywords"],
+                          {"tags": analysis["themes"]}, ctx=ctx)
+    print(f"📊 _analyze_transcript calls: {analyze.call_count}")
+    assert result["generated_script"]
+    assert analyze.call_count == 1
+
+
+if __name__ == "__main__":
+    test_transcript_context_fields()
+    test_generate_shares_context()
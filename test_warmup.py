@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test lazy imports and the warm-up / readiness state behind /healthz and /readyz
+"""
+
+import sys
+import threading
+
+import warmup
+from lazy_import import LazyAttr
+
+
+def test_lazy_attr():
+    """Imports on first use, delegates calls/attributes, falls back when missing"""
+    print("🧪 Testing lazy imports...")
+    sys.modules.pop("colorsys", None)
+    rgb = LazyAttr("colorsys", "hsv_to_rgb")
+    assert not rgb.loaded and "colorsys" not in sys.modules
+    assert rgb(0, 0, 1) == (1, 1, 1)
+    assert rgb.loaded and "colorsys" in sys.modules
+
+    Path = LazyAttr("pathlib", "PurePosixPath")
+    assert Path.__name__ == "PurePosixPath"
+
+    missing = LazyAttr("no_such_module_xyz", "thing", None)
+    assert not missing and missing.loaded
+    fallback = LazyAttr("no_such_module_xyz", "fn", lambda: "fallback")
+    assert fallback() == "fallback"
+    try:
+        LazyAttr("no_such_module_xyz", "required")()
+        assert False, "required import should raise"
+    except ImportError:
+        pass
+    print(f"✅ {rgb!r}")
+
+
+def test_warmup_readiness():
+    """Tasks run in order once, failures are recorded without blocking readiness"""
+    print("🧪 Testing warm-up readiness...")
+    saved_tasks, saved_mode = list(warmup._tasks), warmup.WARMUP_MODE
+    warmup._tasks.clear()
+    warmup.reset()
+    ran, gate = [], threading.Event()
+    try:
+        warmup.task("first")(lambda: (gate.wait(5), ran.append("first")))
+        warmup.task("broken")(lambda: 1 / 0)
+        warmup.task("last")(lambda: ran.append("last"))
+        warmup.WARMUP_MODE = "background"
+
+        assert warmup.status()["status"] == "pending" and not warmup.ready()
+        warmup.start()
+        assert warmup.start() is None  # once per process
+        assert warmup.status()["status"] == "running" and not warmup.ready()
+        gate.set()
+        assert warmup.wait(5)
+        state = warmup.status()
+        print(f"⏱️  warm-up state: {state['status']}, tasks {list(state['tasks'])}")
+        assert ran == ["first", "last"] and state["ready"]
+        assert state["tasks"]["broken"]["ok"] is False and "division" in state["tasks"]["broken"]["error"]
+        assert state["tasks"]["last"]["ok"] is True
+
+        warmup.reset()
+        warmup.WARMUP_MODE = "off"
+        warmup.start()
+        assert warmup.ready() and ran == ["first", "last"]
+    finally:
+        warmup._tasks[:] = saved_tasks
+        warmup.WARMUP_MODE = saved_mode
+        warmup.reset()
+
+
+if __name__ == "__main__":
+    test_lazy_attr()
+    test_warmup_readiness()
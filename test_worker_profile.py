@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the multi-process pieces: review-index snapshots and background ownership
+"""
+
+import importlib.util
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import background_owner
+from review_store import ReviewIndex
+
+CSV = (
+    "product_name,text\n"
+    "Dive+,Tiny and whisper quiet so airport security never noticed it\n"
+    "Dive+,The app control is great for long distance dates\n"
+    "Oh! Please Gel,Silky glide and no sticky mess afterwards\n"
+)
+
+
+def test_review_index_snapshot_attach():
+    """A build publishes a snapshot; another process attaches it memory-mapped"""
+    print("🧪 Testing ReviewIndex snapshots...")
+    saved = (ReviewIndex._docs, ReviewIndex._vec, ReviewIndex._X,
+             ReviewIndex._snapshot_dir, ReviewIndex._snapshot_version)
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            ReviewIndex._docs = []
+            ReviewIndex.configure_snapshots(d)
+            ReviewIndex.import_csv(CSV.encode())
+            ReviewIndex.build()
+            version = ReviewIndex.snapshot_version()
+            print(f"📦 Published: {version}")
+            assert version and version == ReviewIndex._snapshot_version
+            assert not ReviewIndex.attach_snapshot()  # already current
+
+            # Simulate a freshly forked worker holding nothing
+            ReviewIndex._docs, ReviewIndex._vec, ReviewIndex._X = [], None, None
+            ReviewIndex._snapshot_version = None
+            assert ReviewIndex.attach_snapshot()
+            # Read-only views over the mapped .npy files, not private copies
+            assert not ReviewIndex._X.data.flags.owndata and not ReviewIndex._X.data.flags.writeable
+            hits = ReviewIndex.search("Dive+", "airport security", k=1)
+            print(f"🔍 Search after attach: {hits}")
+            assert hits and "airport" in hits[0]
+    finally:
+        (ReviewIndex._docs, ReviewIndex._vec, ReviewIndex._X,
+         ReviewIndex._snapshot_dir, ReviewIndex._snapshot_version) = saved
+
+
+def test_background_owner_single_claim():
+    """Only one process on the host can hold the background lock"""
+    print("🧪 Testing background ownership...")
+    with tempfile.TemporaryDirectory() as d:
+        lock = os.path.join(d, "background.lock")
+        assert background_owner.claim(lock)
+        try:
+            other = subprocess.run(
+                [sys.executable, "-c", f"import background_owner; print(background_owner.claim({lock!r}))"],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            print(f"👥 Second process claim: {other.stdout.strip()}")
+            assert other.stdout.strip() == "False"
+        finally:
+            background_owner.release()
+        assert not background_owner.is_owner()
+
+
+def test_background_process_supervised_by_master():
+    """Background work runs in its own process, restarted by the master, not in a worker"""
+    print("🧪 Testing the background-owner process hooks...")
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf_under_test", path)
+    conf = importlib.util.module_from_spec(spec)
+    saved_env = dict(os.environ)
+    spec.loader.exec_module(conf)  # sets the server env defaults; restored below
+    conf.BACKGROUND_CMD = [sys.executable, "-c", "import time; time.sleep(60)"]
+    server = type("Server", (), {"log": logging.getLogger("gunicorn.test")})()
+    os.environ.pop("SKIP_STARTUP", None)
+    try:
+        conf.pre_fork(server, None)
+        assert conf._background is None  # nothing until the server is ready
+        conf.when_ready(server)
+        first = conf._background
+        conf.pre_fork(server, None)  # a recycled worker leaves it alone
+        assert conf._background is first and first.poll() is None
+
+        first.kill()
+        first.wait()
+        conf.pre_fork(server, None)
+        second = conf._background
+        print(f"🔁 Background owner restarted: {first.pid} -> {second.pid}")
+        assert second is not first and second.poll() is None
+
+        conf.on_exit(server)
+        deadline = time.time() + 5
+        while second.poll() is None and time.time() < deadline:
+            time.sleep(0.05)
+        assert second.poll() is not None
+    finally:
+        if conf._background is not None and conf._background.poll() is None:
+            conf._background.kill()
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+if __name__ == "__main__":
+    test_review_index_snapshot_attach()
+    test_background_owner_single_claim()
+    test_background_process_supervised_by_master()
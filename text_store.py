@@ -0,0 +1,139 @@
+# text_store.py — content-addressed, optionally zlib-compressed storage for large record texts
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text as sql
+
+logger = logging.getLogger("mymuse")
+
+TEXT_COMPRESS_MIN = int(os.getenv("TEXT_COMPRESS_MIN", "512"))  # bytes; smaller texts stay raw
+TEXT_ZLIB_LEVEL = 6
+_IN_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+
+def text_hash(value: str) -> str:
+    return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+
+def encode(value: str) -> Tuple[str, bytes]:
+    """(codec, body) for a text: zlib when it is big enough and actually shrinks."""
+    raw = (value or "").encode("utf-8")
+    if len(raw) >= TEXT_COMPRESS_MIN:
+        packed = zlib.compress(raw, TEXT_ZLIB_LEVEL)
+        if len(packed) < len(raw) * 0.9:
+            return "zlib", packed
+    return "raw", raw
+
+
+def decode(codec: Optional[str], body: Optional[bytes]) -> str:
+    if body is None:
+        return ""
+    if codec == "zlib":
+        body = zlib.decompress(body)
+    return bytes(body).decode("utf-8")
+
+
+def _dialect(executor) -> str:
+    # Works for a Session or a Connection
+    dialect = getattr(executor, "dialect", None) or executor.get_bind().dialect
+    return dialect.name
+
+
+def intern_many(session, values: Iterable[str]) -> List[str]:
+    """Store each distinct text once (insert-or-ignore) and return the hashes,
+    in input order. Regenerating the same Reel adds no new text rows.
+    """
+    values = list(values)
+    hashes = [text_hash(v) for v in values]
+    unique: Dict[str, str] = {}
+    for h, v in zip(hashes, values):
+        unique.setdefault(h, v)
+    if unique:
+        keys = list(unique)
+        existing = set()
+        for i in range(0, len(keys), _IN_CHUNK):
+            existing.update(h for (h,) in session.execute(
+                sql("SELECT hash FROM texts WHERE hash IN :hs").bindparams(bindparam("hs", expanding=True)),
+                {"hs": keys[i:i + _IN_CHUNK]}))
+        rows = []
+        for h, v in unique.items():
+            if h in existing:
+                continue
+            codec, body = encode(v)
+            rows.append({"hash": h, "codec": codec, "size": len(v.encode("utf-8")), "body": body})
+        if rows:
+            # A concurrent writer may have stored the same text in between
+            verb = "INSERT OR IGNORE" if _dialect(session) == "sqlite" else "INSERT"
+            tail = "" if verb != "INSERT" else " ON CONFLICT (hash) DO NOTHING"
+            session.execute(sql(f"{verb} INTO texts (hash, codec, size, body, created_at) "
+                                f"VALUES (:hash, :codec, :size, :body, CURRENT_TIMESTAMP){tail}"), rows)
+    return hashes
+
+
+def load_many(session, hashes: Iterable[str]) -> Dict[str, str]:
+    """hash -> decoded text for the given hashes."""
+    hs = list({h for h in hashes if h})
+    out: Dict[str, str] = {}
+    for i in range(0, len(hs), _IN_CHUNK):
+        rows = session.execute(
+            sql("SELECT hash, codec, body FROM texts WHERE hash IN :hs").bindparams(bindparam("hs", expanding=True)),
+            {"hs": hs[i:i + _IN_CHUNK]})
+        out.update((h, decode(codec, body)) for h, codec, body in rows)
+    return out
+
+
+# --------------- SQLite integration ---------------
+def register_sqlite_functions(engine) -> None:
+    """mm_text(codec, body) on every SQLite connection, so SQL (the FTS source
+    view and its triggers) can read compressed texts.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _mm_text(dbapi_conn, _record):
+        dbapi_conn.create_function("mm_text", 2, decode, deterministic=True)
+
+
+def migrate_inline_texts(engine, batch: int = 500) -> int:
+    """Move texts stored inline on records (older schema) into `texts`, point
+    records at them by hash and drop the inline columns. Returns rows moved.
+    """
+    from sqlalchemy import inspect
+
+    cols = {c["name"] for c in inspect(engine).get_columns("records")}
+    if "transcript" not in cols:
+        return 0
+    logger.info("Migrating inline record texts into the texts table...")
+    moved = 0
+    with engine.begin() as conn:
+        # Search index and triggers read the old columns; history rebuilds them
+        for stmt in ("DROP TRIGGER IF EXISTS records_fts_ai", "DROP TRIGGER IF EXISTS records_fts_ad",
+                     "DROP TRIGGER IF EXISTS records_fts_au", "DROP TABLE IF EXISTS records_fts"):
+            conn.execute(sql(stmt))
+        for name in ("transcript_hash", "generated_hash"):
+            if name not in cols:
+                conn.execute(sql(f"ALTER TABLE records ADD COLUMN {name} VARCHAR(64)"))
+        while True:
+            rows = conn.execute(sql(
+                "SELECT id, transcript, generated_text FROM records WHERE transcript_hash IS NULL LIMIT :n"),
+                {"n": batch}).fetchall()
+            if not rows:
+                break
+            hashes = intern_many(conn, [v for r in rows for v in (r[1], r[2])])
+            conn.execute(sql("UPDATE records SET transcript_hash = :t, generated_hash = :g WHERE id = :id"),
+                         [{"id": r[0], "t": hashes[2 * i], "g": hashes[2 * i + 1]} for i, r in enumerate(rows)])
+            moved += len(rows)
+        conn.execute(sql("ALTER TABLE records DROP COLUMN transcript"))
+        conn.execute(sql("ALTER TABLE records DROP COLUMN generated_text"))
+    logger.info("Migrated %d records to content-addressed texts", moved)
+    return moved
+
+
+__all__ = ["text_hash", "encode", "decode", "intern_many", "load_many",
+           "register_sqlite_functions", "migrate_inline_texts", "TEXT_COMPRESS_MIN"]
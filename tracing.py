@@ -0,0 +1,189 @@
+# tracing.py — per-request stage spans: Server-Timing header + slowest-requests waterfall
+from __future__ import annotations
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("mymuse")
+
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "25"))                  # slowest N requests kept per process
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))       # per request; loops can't blow it up
+SERVER_TIMING_MAX = 30                                           # entries in the header
+# Under gunicorn each worker writes its slowest traces here so the admin page sees all of them
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+
+
+class Trace:
+    """Spans of one request. Offsets are ms from the start of the request."""
+    __slots__ = ("request_id", "method", "path", "started", "t0", "spans", "stack", "duration_ms", "status", "dropped")
+
+    def __init__(self, request_id: str, method: str = "", path: str = ""):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.stack: List[int] = []
+        self.duration_ms = 0.0
+        self.status = 0
+        self.dropped = 0
+
+    def to_dict(self) -> Dict:
+        return {"request_id": self.request_id, "method": self.method, "path": self.path,
+                "started": self.started, "duration_ms": round(self.duration_ms, 2), "status": self.status,
+                "spans": self.spans, "dropped": self.dropped}
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("mymuse_trace", default=None)
+
+
+def start(request_id: str, method: str = "", path: str = "") -> Trace:
+    trace = Trace(request_id, method, path)
+    _current.set(trace)
+    return trace
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block inside the current request. Outside a request it costs one
+    ContextVar lookup and records nothing.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        yield
+        return
+    rec = {"name": name, "depth": len(trace.stack),
+           "parent": trace.stack[-1] if trace.stack else None,
+           "start_ms": (time.perf_counter() - trace.t0) * 1000.0, "dur_ms": 0.0}
+    if attrs:
+        rec["attrs"] = {k: str(v)[:120] for k, v in attrs.items()}
+    trace.spans.append(rec)
+    trace.stack.append(len(trace.spans) - 1)
+    try:
+        yield
+    except BaseException:
+        rec["error"] = True
+        raise
+    finally:
+        rec["dur_ms"] = round((time.perf_counter() - trace.t0) * 1000.0 - rec["start_ms"], 3)
+        rec["start_ms"] = round(rec["start_ms"], 3)
+        trace.stack.pop()
+
+
+_TOKEN_BAD = re.compile(r"[^A-Za-z0-9_.\-]")
+
+
+def server_timing(trace: Trace) -> str:
+    """Server-Timing header value: the request total, then time per span name
+    (repeated spans such as per-variation evaluations are summed), longest first.
+    """
+    totals: Dict[str, List[float]] = {}
+    for s in trace.spans:
+        name = _TOKEN_BAD.sub("_", s["name"])[:64] or "span"
+        t = totals.setdefault(name, [0.0, 0])
+        t[0] += s["dur_ms"]
+        t[1] += 1
+    entries = [f"total;dur={trace.duration_ms:.1f}"]
+    for name, (dur, n) in sorted(totals.items(), key=lambda kv: kv[1][0], reverse=True)[:SERVER_TIMING_MAX - 1]:
+        entries.append(f'{name};desc="x{n}";dur={dur:.1f}' if n > 1 else f"{name};dur={dur:.1f}")
+    return ", ".join(entries)
+
+
+# --------------- Slowest requests ---------------
+_slowest: List = []          # min-heap of (duration_ms, seq, trace dict)
+_slowest_lock = threading.Lock()
+_seq = 0
+
+
+def finish(status: int = 0) -> Optional[Trace]:
+    """Close the current trace and keep it if it is among the slowest."""
+    global _seq
+    trace = _current.get()
+    if trace is None:
+        return None
+    _current.set(None)
+    trace.duration_ms = (time.perf_counter() - trace.t0) * 1000.0
+    trace.status = status
+    with _slowest_lock:
+        if len(_slowest) >= TRACE_KEEP and trace.duration_ms <= _slowest[0][0]:
+            return trace
+        _seq += 1
+        item = (trace.duration_ms, _seq, trace.to_dict())
+        if len(_slowest) < TRACE_KEEP:
+            heapq.heappush(_slowest, item)
+        else:
+            heapq.heapreplace(_slowest, item)
+        kept = [t for _, _, t in _slowest]
+    if TRACE_DIR:
+        _write_slowest(kept)
+    return trace
+
+
+def _write_slowest(traces: List[Dict]) -> None:
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(traces, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("trace dump failed: %s", e)
+
+
+def slowest(n: int = TRACE_KEEP) -> List[Dict]:
+    """Slowest traces, longest first (all workers when TRACE_DIR is set)."""
+    with _slowest_lock:
+        traces = {t["request_id"]: t for _, _, t in _slowest}
+    if TRACE_DIR and os.path.isdir(TRACE_DIR):
+        for name in os.listdir(TRACE_DIR):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(TRACE_DIR, name), "r", encoding="utf-8") as f:
+                    for t in json.load(f):
+                        traces.setdefault(t["request_id"], t)
+            except (OSError, ValueError):
+                continue
+    return sorted(traces.values(), key=lambda t: t["duration_ms"], reverse=True)[:n]
+
+
+def reset() -> None:
+    with _slowest_lock:
+        _slowest.clear()
+
+
+def clear_dir() -> None:
+    """Forget traces from a previous server run (gunicorn master, before forking)."""
+    if not TRACE_DIR or not os.path.isdir(TRACE_DIR):
+        return
+    for name in os.listdir(TRACE_DIR):
+        try:
+            os.remove(os.path.join(TRACE_DIR, name))
+        except OSError:
+            pass
+
+
+if hasattr(os, "register_at_fork"):
+    # The master's slowest list belongs to the master
+    os.register_at_fork(after_in_child=reset)
+
+
+__all__ = ["Trace", "start", "current", "span", "finish", "server_timing", "slowest", "reset", "clear_dir",
+           "TRACE_KEEP", "TRACE_DIR"]
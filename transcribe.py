@@ -9,6 +9,9 @@ try:
 except Exception:
     sf = None  # optional; if missing we will trust the uploaded WAV
 
+import metrics
+import tracing
+
 logger = logging.getLogger("mymuse")
 
 # ---- Env config ----
@@ -17,6 +20,7 @@ WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")              # tiny/base/smal
 WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")# "int8","float16","int8_float16",...
 ENABLE_LINK_DOWNLOAD = os.getenv("ENABLE_LINK_DOWNLOAD", "true").lower() in ("1","true","yes","on")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_WHISPER_ENDPOINT = os.getenv("OPENAI_WHISPER_ENDPOINT", "https://api.openai.com/v1/audio/transcriptions")
 # Default to openai if key is present; otherwise local
 TRANSCRIBE_BACKEND = (os.getenv("TRANSCRIBE_BACKEND") or ("openai" if OPENAI_API_KEY else "local")).lower()
 
@@ -98,12 +102,14 @@ def _to_wav(src_path: str) -> str:
     """
     ext = os.path.splitext(src_path)[1].lower()
     if ext == ".wav":
-        norm = _normalize_wav_no_ffmpeg(src_path)
+        with tracing.span("normalize_wav"):
+            norm = _normalize_wav_no_ffmpeg(src_path)
         return norm or src_path
     _ensure_ffmpeg()
     dst = tempfile.mktemp(suffix=".wav")
     cmd = [FFMPEG_BIN, "-y", "-i", src_path, "-ac", "1", "-ar", "16000", "-f", "wav", dst]
-    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    with metrics.stage("ffmpeg"):
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     return dst
 
 # ---- Public: transcribe local file ----
@@ -120,9 +126,9 @@ def transcribe_media(file_path: str) -> str:
             import requests
             headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
             data = {"model": "whisper-1", "temperature": "0"}
-            with open(file_path, "rb") as f:
+            with open(file_path, "rb") as f, metrics.stage("whisper"):
                 files = {"file": (os.path.basename(file_path), f, "application/octet-stream")}
-                r = requests.post("https://api.openai.com/v1/audio/transcriptions", headers=headers, data=data, files=files, timeout=120)
+                r = requests.post(OPENAI_WHISPER_ENDPOINT, headers=headers, data=data, files=files, timeout=120)
             if r.status_code >= 400:
                 logger.warning("OpenAI Whisper HTTP %s: %s", r.status_code, r.text[:300])
             else:
@@ -143,9 +149,11 @@ def transcribe_media(file_path: str) -> str:
         return "Sample transcript (dev fallback). Install ffmpeg + faster-whisper for real transcription."
 
     try:
-        model = WhisperModel(WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE)
-        segments, info = model.transcribe(wav, vad_filter=True)
-        text = " ".join(s.text.strip() for s in segments if s.text).strip() or " "
+        with metrics.stage("whisper"):
+            model = WhisperModel(WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE)
+            segments, info = model.transcribe(wav, vad_filter=True)
+            # segments is lazy: decoding happens while joining
+            text = " ".join(s.text.strip() for s in segments if s.text).strip() or " "
         logger.info("Transcribed %s via local/%s", os.path.basename(file_path), WHISPER_MODEL)
         return text if text.strip() else "Sample transcript (dev fallback)."
     except Exception as e:
@@ -173,7 +181,7 @@ def _download_media(url: str) -> Optional[str]:
     outtmpl = os.path.join(tempdir, "media.%(ext)s")
     ydl_opts = {"outtmpl": outtmpl, "quiet": True, "noplaylist": True, "nocheckcertificate": True}
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl, metrics.stage("download"):
             info = ydl.extract_info(url, download=True)
             path = ydl.prepare_filename(info)
             logger.info("Downloaded URL to %s", path)
@@ -0,0 +1,111 @@
+# transcript_context.py — per-request transcript analysis, computed once and shared by reference
+from __future__ import annotations
+import re
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional
+
+_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z+'-]{2,}")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class TranscriptContext:
+    """
+    Everything derived from one transcript during a request. Each field is lazy
+    (computed on first access, then cached on the instance), so analyses a stage
+    never touches cost nothing.
+    Use:
+      ctx = TranscriptContext(transcript_text)       # once, in the route
+      analysis = ctx.analysis                        # analyze_agent() output
+      generate(..., ctx=ctx) / generate_variations(..., ctx=ctx)
+    Stages accept `ctx=None` and fall back to TranscriptContext.of(transcript_text),
+    so direct callers and old tests keep working.
+    """
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or ""
+        self._memo: Dict[str, Any] = {}
+
+    @classmethod
+    def of(cls, text: Optional[str], ctx: Optional["TranscriptContext"] = None) -> "TranscriptContext":
+        """Reuse `ctx` when it belongs to `text`, else build a fresh context."""
+        if ctx is not None and ctx.text == (text or ""):
+            return ctx
+        return cls(text)
+
+    # ----- text views -----
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def normalized(self) -> str:
+        """Lowercased, whitespace collapsed."""
+        return " ".join(self.lower.split())
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Whitespace-split words (used for length matching)."""
+        return self.text.split()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Alphabetic tokens of 3+ chars, original case."""
+        return _TOKEN_RE.findall(self.text)
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return [s.strip() for s in _SENTENCE_RE.split(self.text) if s and s.strip()]
+
+    def has_any(self, needles: List[str]) -> bool:
+        """Substring check against the lowercased transcript."""
+        return any(n in self.lower for n in needles)
+
+    # ----- generator signals -----
+    @cached_property
+    def classification(self):
+        from generate import classify_transcript
+        return classify_transcript(self.text)
+
+    @cached_property
+    def transcript_type(self) -> str:
+        from generate import _detect_transcript_type
+        return _detect_transcript_type(self.text)
+
+    @cached_property
+    def flow_cues(self) -> List[str]:
+        from generate import _transcript_flow
+        return _transcript_flow(self.text, ctx=self)
+
+    # ----- analysis signals -----
+    @cached_property
+    def sentiment(self) -> Dict[str, float]:
+        from analysis import sentiment_vader
+        return sentiment_vader(self.text)
+
+    @cached_property
+    def keywords(self) -> List[str]:
+        from analysis import key_phrases
+        return key_phrases(self.text, max_phrases=8)
+
+    @cached_property
+    def themes(self) -> List[str]:
+        from analysis import themes
+        return themes(self.text).get("tags", [])
+
+    @cached_property
+    def analysis(self) -> Dict[str, Any]:
+        """analyze_agent() output. Callers that add keys should copy it first."""
+        from analysis import analyze_agent
+        return analyze_agent(self.text, ctx=self)
+
+    # ----- anything else -----
+    def memo(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Cache an arbitrary per-transcript result (e.g. the enhanced generator's
+        _analyze_transcript) for the rest of the request.
+        """
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+
+__all__ = ["TranscriptContext"]
@@ -0,0 +1,112 @@
+# warmup.py — post-start warm-up tasks and the readiness state behind /readyz
+"""
+The server binds and answers /healthz straight away; heavy imports, the review
+index and the originality memory are loaded afterwards by the tasks registered
+here, and /readyz reports 503 until they have all run. A failing task is logged
+and recorded but doesn't hold readiness back: the routes degrade the same way
+they did when those steps failed at import time.
+
+    WARMUP=background   run the tasks in a daemon thread (default)
+    WARMUP=sync         run them inline in start() (scripts, tests)
+    WARMUP=off          skip them; everything loads on first use
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger("mymuse")
+
+WARMUP_MODE = os.getenv("WARMUP", "background").lower()
+
+_tasks: List[Tuple[str, Callable[[], None]]] = []
+_lock = threading.Lock()
+_done = threading.Event()
+_state: Dict = {}
+
+
+def _initial_state() -> Dict:
+    return {"status": "pending", "mode": WARMUP_MODE, "started": None, "seconds": None, "tasks": {}}
+
+
+_state.update(_initial_state())
+
+
+def task(name: str):
+    """Register fn as a warm-up task; tasks run in registration order."""
+    def deco(fn: Callable[[], None]) -> Callable[[], None]:
+        _tasks.append((name, fn))
+        return fn
+    return deco
+
+
+def _run() -> None:
+    t_all = time.perf_counter()
+    for name, fn in list(_tasks):
+        t0 = time.perf_counter()
+        entry = {"ok": True, "seconds": None}
+        _state["tasks"][name] = entry
+        try:
+            with metrics.stage(f"warmup_{name}"):
+                fn()
+        except Exception as e:
+            entry.update(ok=False, error=str(e))
+            logger.warning("Warm-up task %s failed: %s", name, e)
+        entry["seconds"] = round(time.perf_counter() - t0, 3)
+    _state.update(status="ready", seconds=round(time.perf_counter() - t_all, 3))
+    logger.info("Warm-up finished in %.2fs", _state["seconds"])
+    _done.set()
+
+
+def start() -> Optional[threading.Thread]:
+    """Run the warm-up once per process according to WARMUP."""
+    with _lock:
+        if _state["status"] != "pending":
+            return None
+        _state.update(status="running", started=time.time())
+    if WARMUP_MODE == "off":
+        _state.update(status="ready", seconds=0.0)
+        _done.set()
+        return None
+    if WARMUP_MODE == "sync":
+        _run()
+        return None
+    t = threading.Thread(target=_run, name="warmup", daemon=True)
+    t.start()
+    return t
+
+
+def ready() -> bool:
+    return _done.is_set()
+
+
+def wait(timeout: Optional[float] = None) -> bool:
+    return _done.wait(timeout)
+
+
+def status() -> Dict:
+    return {**_state, "ready": ready(), "tasks": {k: dict(v) for k, v in _state["tasks"].items()}}
+
+
+def reset() -> None:
+    """Back to pending (tests; the task list is kept)."""
+    _done.clear()
+    _state.clear()
+    _state.update(_initial_state())
+
+
+def _after_fork() -> None:
+    # A worker forked before warm-up finished runs its own
+    if not ready():
+        reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+__all__ = ["WARMUP_MODE", "task", "start", "ready", "wait", "status", "reset"]